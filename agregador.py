@@ -0,0 +1,282 @@
+"""Resumen de réplicas a medida que terminan, con memoria acotada.
+
+Agregador recibe las series de cada réplica (sanos, infectados, recuperados e
+inoculados, como las entrega lote.ejecutar) y las descarta después de
+actualizar:
+
+* la media y la varianza por dia de cada serie (algoritmo de Welford, con la
+  combinación de Chan para agregar varias réplicas o agregadores a la vez),
+* un histograma por dia de cada serie, con el que se aproximan los cuantiles
+  (exactos si la población tiene menos valores posibles que el histograma), y
+* las distribuciones del máximo de infectados, del dia del máximo y del dia en
+  que se alcanza la inmunidad (sin sanos ni infectados).
+
+La memoria es proporcional al número de días y no depende del número de
+réplicas. El resumen se puede leer o guardar en cualquier momento, por ejemplo
+mientras un barrido sigue ejecutándose (ver lote.barrido_agregado).
+
+Ejemplo::
+
+    agregador = Agregador(2000, 100)
+    for series in resultados: # Arreglos de (4, 2000)
+        agregador.agregar(series)
+    bandas = agregador.bandas("infectados")
+"""
+import os
+
+import numpy as np
+
+# Series de cada réplica, en el orden de lote.SERIES
+SERIES = ["sanos", "infectados", "recuperados", "inoculados"]
+
+# Número máximo de intervalos de los histogramas
+INTERVALOS = 64
+
+# Distribuciones por réplica: nombre -> límite superior de sus valores ("poblacion" o "dias")
+DISTRIBUCIONES = {"pico": "poblacion", "dia_pico": "dias", "inmunidad": "dias"}
+
+def _intervalo(valores, maximo, intervalos):
+    """Intervalo del histograma de cada valor entre 0 y maximo"""
+    return np.minimum(valores.astype(np.int64) * intervalos // (maximo + 1), intervalos - 1)
+
+def _cuantiles(histograma, cuantiles, maximo):
+    """Cuantiles aproximados a partir de histogramas de valores enteros entre 0 y maximo.
+
+    El cuantil q es el menor valor con al menos q * n valores menores o iguales.
+    Dentro de un intervalo se interpola linealmente, por lo que el error es menor
+    que el ancho de un intervalo, (maximo + 1) / intervalos, y nulo si es 1.
+
+    Parámetros
+    ----------
+    histograma : numpy.ndarray
+        Arreglo de (..., intervalos) con los conteos
+    cuantiles : tuple
+        Cuantiles entre 0 y 1
+    maximo : int
+        Valor máximo
+
+    Retorna
+    -------
+    numpy.ndarray
+        Arreglo de (len(cuantiles), ...) con los cuantiles
+    """
+    intervalos = histograma.shape[-1]
+    ancho = (maximo + 1) / intervalos
+    acumulado = np.cumsum(histograma, axis=-1)
+    total = acumulado[..., -1:]
+    resultado = []
+    for q in cuantiles:
+        objetivo = np.maximum(q * total, 1)
+        indice = np.minimum(np.argmax(acumulado >= objetivo, axis=-1), intervalos - 1)[..., None]
+        antes = np.where(indice > 0, np.take_along_axis(acumulado, np.maximum(indice - 1, 0), axis=-1), 0)
+        conteo = np.take_along_axis(histograma, indice, axis=-1)
+        fraccion = np.where(conteo > 0, (objetivo - antes) / np.maximum(conteo, 1), 0)
+        inicio = np.ceil(indice * ancho)
+        fin = np.ceil((indice + 1) * ancho) - 1 # Último valor entero del intervalo
+        valor = inicio + (fin - inicio) * fraccion
+        resultado.append(np.where(total > 0, valor, np.nan)[..., 0])
+    return np.array(resultado)
+
+class Agregador:
+    """Clase para resumir series de réplicas sin guardarlas"""
+
+    def __init__(self, dias, poblacion, intervalos=INTERVALOS):
+        """Constructor del agregador
+
+        Parámetros
+        ----------
+        dias : int
+            Largo de las series (dias_simulacion)
+        poblacion : int
+            Número de personas, valor máximo de las series
+        intervalos : int, opcional
+            Intervalos de los histogramas de las series, por omisión INTERVALOS.
+            Se usan menos si la población tiene menos valores posibles
+        """
+        self.dias = dias
+        self.poblacion = poblacion
+        self.intervalos = min(intervalos, poblacion + 1)
+        self.n = 0 # Réplicas agregadas
+        self._media = np.zeros((len(SERIES), dias))
+        self._m2 = np.zeros((len(SERIES), dias)) # Suma de cuadrados de las diferencias con la media
+        self.minimo = np.full((len(SERIES), dias), np.iinfo(np.int64).max)
+        self.maximo = np.full((len(SERIES), dias), -1)
+        self.histograma = np.zeros((len(SERIES), dias, self.intervalos), dtype=np.int64)
+        # Distribuciones por réplica, con el valor exacto de cada una
+        self.distribuciones = {nombre: np.zeros(self._limite(nombre) + 1, dtype=np.int64) for nombre in DISTRIBUCIONES}
+        self.sin_inmunidad = 0 # Réplicas que no alcanzan la inmunidad
+
+    def _limite(self, nombre):
+        """Valor máximo de una distribución por réplica"""
+        return self.poblacion if DISTRIBUCIONES[nombre] == "poblacion" else self.dias - 1
+
+    def agregar(self, series):
+        """Agregar una réplica.
+
+        Parámetros
+        ----------
+        series : numpy.ndarray
+            Arreglo de (4, dias) con sanos, infectados, recuperados e inoculados
+        """
+        self.agregar_lote(np.asarray(series)[None])
+
+    def agregar_lote(self, lote):
+        """Agregar varias réplicas a la vez (por ejemplo, las de un Ensamble).
+
+        Parámetros
+        ----------
+        lote : numpy.ndarray
+            Arreglo de (replicas, 4, dias)
+        """
+        lote = np.asarray(lote)
+        if lote.shape[1:] != (len(SERIES), self.dias):
+            raise ValueError("se esperaban series de %d días, no de forma %s" % (self.dias, lote.shape[1:]))
+        n_b = len(lote)
+        if n_b == 0:
+            return
+        # Media y varianza (combinación de Chan de dos conjuntos de Welford)
+        media_b = lote.mean(axis=0)
+        m2_b = ((lote - media_b) ** 2).sum(axis=0)
+        n = self.n + n_b
+        delta = media_b - self._media
+        self._media += delta * n_b / n
+        self._m2 += m2_b + delta ** 2 * self.n * n_b / n
+        self.n = n
+        self.minimo = np.minimum(self.minimo, lote.min(axis=0))
+        self.maximo = np.maximum(self.maximo, lote.max(axis=0))
+        # Histogramas por serie y dia
+        intervalo = _intervalo(lote, self.poblacion, self.intervalos)
+        celda = np.arange(len(SERIES) * self.dias).reshape(len(SERIES), self.dias) * self.intervalos
+        self.histograma += np.bincount((celda + intervalo).ravel(),
+            minlength=self.histograma.size).reshape(self.histograma.shape)
+        # Distribuciones por réplica
+        infectados = lote[:, SERIES.index("infectados")]
+        inmune = (lote[:, SERIES.index("sanos")] == 0) & (infectados == 0)
+        alcanzada = inmune.any(axis=1)
+        valores = {"pico": infectados.max(axis=1), "dia_pico": infectados.argmax(axis=1),
+            "inmunidad": inmune.argmax(axis=1)[alcanzada]}
+        for nombre, valor in valores.items():
+            self.distribuciones[nombre] += np.bincount(valor, minlength=len(self.distribuciones[nombre]))
+        self.sin_inmunidad += int(n_b - alcanzada.sum())
+
+    def combinar(self, otro):
+        """Agregar las réplicas resumidas en otro agregador del mismo tamaño (por ejemplo, de otro proceso)"""
+        if (otro.dias, otro.poblacion, otro.intervalos) != (self.dias, self.poblacion, self.intervalos):
+            raise ValueError("los agregadores tienen distinto tamaño")
+        if otro.n == 0:
+            return
+        n = self.n + otro.n
+        delta = otro._media - self._media
+        self._media += delta * otro.n / n
+        self._m2 += otro._m2 + delta ** 2 * self.n * otro.n / n
+        self.n = n
+        self.minimo = np.minimum(self.minimo, otro.minimo)
+        self.maximo = np.maximum(self.maximo, otro.maximo)
+        self.histograma += otro.histograma
+        for nombre in DISTRIBUCIONES:
+            self.distribuciones[nombre] += otro.distribuciones[nombre]
+        self.sin_inmunidad += otro.sin_inmunidad
+
+    def media(self, nombre):
+        """Promedio de una serie entre las réplicas, por dia"""
+        return self._media[SERIES.index(nombre)].copy()
+
+    def varianza(self, nombre):
+        """Varianza muestral de una serie entre las réplicas, por dia (nan con menos de dos réplicas)"""
+        if self.n < 2:
+            return np.full(self.dias, np.nan)
+        return self._m2[SERIES.index(nombre)] / (self.n - 1)
+
+    def cuantiles(self, nombre, cuantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        """Cuantiles aproximados de una serie por dia (ver _cuantiles).
+
+        Retorna
+        -------
+        numpy.ndarray
+            Arreglo de (len(cuantiles), dias)
+        """
+        return _cuantiles(self.histograma[SERIES.index(nombre)], cuantiles, self.poblacion)
+
+    def bandas(self, nombre, cuantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        """Promedio y cuantiles de una serie entre las réplicas, por dia (ver Ensamble.bandas)
+
+        Retorna
+        -------
+        dict
+            "media" -> arreglo de días, y cada cuantil -> arreglo de días
+        """
+        bandas = {"media": self.media(nombre)}
+        for q, valores in zip(cuantiles, self.cuantiles(nombre, cuantiles)):
+            bandas[q] = valores
+        return bandas
+
+    def distribucion(self, nombre):
+        """Conteo de réplicas por valor de una distribución por réplica.
+
+        Parámetros
+        ----------
+        nombre : str
+            "pico" (máximo de infectados), "dia_pico" (dia del máximo) o
+            "inmunidad" (primer dia sin sanos ni infectados, solo de las réplicas
+            que la alcanzan; ver sin_inmunidad)
+
+        Retorna
+        -------
+        numpy.ndarray
+            Réplicas con cada valor, desde 0
+        """
+        return self.distribuciones[nombre].copy()
+
+    def resumen_distribucion(self, nombre, cuantiles=(0.05, 0.5, 0.95)):
+        """Réplicas, media, desviación estándar y cuantiles (exactos) de una distribución por réplica"""
+        conteo = self.distribuciones[nombre]
+        n = int(conteo.sum())
+        resumen = {"replicas": n}
+        if n > 0:
+            valores = np.arange(len(conteo))
+            media = float((valores * conteo).sum() / n)
+            resumen["media"] = media
+            resumen["desviacion"] = float(np.sqrt((conteo * (valores - media) ** 2).sum() / max(n - 1, 1)))
+            for q, valor in zip(cuantiles, _cuantiles(conteo, cuantiles, len(conteo) - 1)):
+                resumen[q] = float(valor)
+        return resumen
+
+    def resumen(self):
+        """Resumen de las distribuciones por réplica.
+
+        Retorna
+        -------
+        dict
+            Réplicas agregadas, réplicas sin inmunidad y resumen de cada distribución
+        """
+        resumen = {"replicas": self.n, "sin_inmunidad": self.sin_inmunidad}
+        for nombre in DISTRIBUCIONES:
+            resumen[nombre] = self.resumen_distribucion(nombre)
+        return resumen
+
+    def guardar(self, ruta):
+        """Guardar el estado del agregador en un archivo .npz.
+
+        Se escribe en un archivo temporal que luego reemplaza al anterior, por lo
+        que otro proceso puede leer el resumen mientras el barrido sigue.
+        """
+        temporal = ruta + ".tmp.npz"
+        np.savez(temporal, dias=self.dias, poblacion=self.poblacion, n=self.n, media=self._media, m2=self._m2,
+            minimo=self.minimo, maximo=self.maximo, histograma=self.histograma, sin_inmunidad=self.sin_inmunidad,
+            **{"distribucion_" + nombre: conteo for nombre, conteo in self.distribuciones.items()})
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Agregador guardado con guardar"""
+        with np.load(ruta) as datos:
+            agregador = cls(int(datos["dias"]), int(datos["poblacion"]), datos["histograma"].shape[-1])
+            agregador.n = int(datos["n"])
+            agregador._media = datos["media"]
+            agregador._m2 = datos["m2"]
+            agregador.minimo = datos["minimo"]
+            agregador.maximo = datos["maximo"]
+            agregador.histograma = datos["histograma"]
+            agregador.sin_inmunidad = int(datos["sin_inmunidad"])
+            agregador.distribuciones = {nombre: datos["distribucion_" + nombre] for nombre in DISTRIBUCIONES}
+        return agregador
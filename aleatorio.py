@@ -0,0 +1,69 @@
+import random
+import numpy as np
+
+# Semilla por omisión de las simulaciones
+SEMILLA = 12345
+
+def secuencia(semilla=SEMILLA, replica=None):
+    """Secuencia de semillas de NumPy para una réplica.
+
+    La réplica r corresponde al hijo r de SeedSequence(semilla).spawn, por lo
+    que cada par (semilla, réplica) define un flujo independiente y reproducible.
+
+    Parámetros
+    ----------
+    semilla : int, opcional
+        Semilla base, por omisión SEMILLA
+    replica : int, opcional
+        Identificador de la réplica. Si se omite se usa la semilla base
+
+    Retorna
+    -------
+    numpy.random.SeedSequence
+        Secuencia de semillas de la réplica
+    """
+    if replica is None:
+        return np.random.SeedSequence(semilla)
+    return np.random.SeedSequence(semilla, spawn_key=(replica,))
+
+def generador(semilla=SEMILLA, replica=None):
+    """Generador de NumPy para una réplica (ver secuencia).
+
+    Retorna
+    -------
+    numpy.random.Generator
+        Generador de números aleatorios
+    """
+    return np.random.default_rng(secuencia(semilla, replica))
+
+def generador_py(semilla=SEMILLA, replica=None):
+    """Generador del módulo random para una réplica (ver secuencia).
+
+    Sin réplica equivale a random.seed(semilla), lo que reproduce las
+    simulaciones de la semilla global original.
+
+    Retorna
+    -------
+    random.Random
+        Generador de números aleatorios
+    """
+    if replica is None:
+        return random.Random(semilla)
+    return random.Random(int(secuencia(semilla, replica).generate_state(1, np.uint64)[0]))
+
+def flujos(semilla=SEMILLA, replicas=1):
+    """Generadores de NumPy independientes para varias réplicas.
+
+    Parámetros
+    ----------
+    semilla : int, opcional
+        Semilla base, por omisión SEMILLA
+    replicas : int, opcional
+        Número de réplicas, por omisión 1
+
+    Retorna
+    -------
+    list
+        Lista con un numpy.random.Generator por réplica
+    """
+    return [generador(semilla, r) for r in range(replicas)]
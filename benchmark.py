@@ -0,0 +1,250 @@
+"""Medición del costo de cada etapa de la simulación.
+
+Construye simulaciones con semilla fija para una grilla de tamaños y mide por
+separado cada etapa y el dibujo (con el driver de video "dummy" de SDL). Cada
+llamada se mide sobre un clon nuevo de la simulación (ver Simulacion.clonar),
+por lo que todas parten del mismo estado y las mediciones son reproducibles
+aunque las etapas cambien la simulación. Reporta
+operaciones por segundo y memoria máxima, guarda los resultados en JSON y los
+compara con una medición base para detectar regresiones.
+
+Ejemplo::
+
+    python benchmark.py --poblacion 100 1000 10000 --guardar-base base.json
+    python benchmark.py --poblacion 100 1000 10000 --base base.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from aleatorio import SEMILLA
+from simulacion import Simulacion
+from simulacion_np import SimulacionNP
+
+# Población y tamaño del mundo del juego. Por omisión se mantiene la densidad
+POBLACION_JUEGO = 100
+X_MAX_JUEGO = 788
+Y_MAX_JUEGO = 475
+
+# Motores disponibles
+MOTORES = {"python": Simulacion, "numpy": SimulacionNP}
+
+def crear(motor, poblacion, vacunas, densidad=True, semilla=SEMILLA):
+    """Crear una simulación para medir.
+
+    Parámetros
+    ----------
+    motor : str
+        "python" o "numpy"
+    poblacion : int
+        Número de personas
+    vacunas : int
+        Número de vacunas
+    densidad : bool, opcional
+        Escalar el mundo para mantener la densidad del juego, por omisión verdadero
+    semilla : int, opcional
+        Semilla de la simulación, por omisión 12345
+
+    Retorna
+    -------
+    Simulacion o SimulacionNP
+        Simulación nueva
+    """
+    escala = (poblacion / POBLACION_JUEGO) ** 0.5 if densidad else 1
+    x_max = int(X_MAX_JUEGO * escala)
+    y_max = int(Y_MAX_JUEGO * escala)
+    sim = MOTORES[motor](poblacion, vacunas, 2000, 0, x_max, 0, y_max, porc_infectados=0.05, prob_vacuna=1, semilla=semilla)
+    return sim
+
+def etapas(umbrales):
+    """Etapas a medir, como funciones de la simulación.
+
+    Parámetros
+    ----------
+    umbrales : dict
+        Umbrales vel_per, umb_col, umb_con y umb_vac
+
+    Retorna
+    -------
+    dict
+        Diccionario nombre -> función f(sim)
+    """
+    u = umbrales
+    return {
+        "mover_personas": lambda sim: sim.mover_personas(u["vel_per"], u["umb_col"], modo="indexado"),
+        "revisar_colision": lambda sim: sim.revisar_colision(sim.x_max // 2, sim.y_max // 2, u["umb_col"]),
+        "revisar_contagio": lambda sim: sim.revisar_contagio(u["umb_con"]),
+        "revisar_vacunacion": lambda sim: sim.revisar_vacunacion(u["umb_vac"]),
+        "estadisticas": lambda sim: sim.estadisticas(),
+        "paso": lambda sim: sim.paso(u["vel_per"], u["umb_col"], u["umb_con"], u["umb_vac"]),
+    }
+
+def etapas_dibujo():
+    """Etapas de dibujo a medir, usando main con el driver de video "dummy".
+
+    Retorna
+    -------
+    dict
+        Diccionario nombre -> función f(sim)
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    import main
+    pygame.init()
+    if pygame.display.get_surface() is None:
+        pygame.display.set_mode((main.XMAX + 200, main.YMAX + 20))
+        main.precargar()
+    superficie = pygame.display.get_surface()
+    return {
+        "plot": lambda sim: main.plot(superficie, sim.personas, sim.vacunas),
+        "plot_sim": lambda sim: main.plot_sim(superficie, sim),
+        "colorear": lambda sim: main.colorear(main.PERIMG, main.ROJO),
+        "dibujar_baldosas": lambda sim: main.dibujar_baldosas(superficie),
+    }
+
+def medir(funcion, sim, repeticiones=5, tiempo_min=0.2):
+    """Medir una función de la simulación.
+
+    Se ejecuta hasta completar al menos `repeticiones` llamadas y `tiempo_min` segundos.
+    Cada llamada recibe un clon nuevo de sim (sin contar el tiempo de clonarla), por lo
+    que todas miden el mismo estado aunque la función lo cambie. La memoria máxima se
+    mide en una llamada adicional con tracemalloc.
+
+    Parámetros
+    ----------
+    funcion : callable
+        Función f(sim) a medir
+    sim : Simulacion o SimulacionNP
+        Estado de partida de cada llamada. No se modifica
+    repeticiones : int, opcional
+        Llamadas mínimas, por omisión 5
+    tiempo_min : float, opcional
+        Segundos mínimos, contando también los clones, por omisión 0.2
+
+    Retorna
+    -------
+    dict
+        Segundos por llamada (mínimo y mediana), operaciones por segundo y memoria máxima en bytes
+    """
+    tiempos = []
+    inicio = time.perf_counter()
+    while len(tiempos) < repeticiones or time.perf_counter() - inicio < tiempo_min:
+        copia = sim.clonar()
+        t = time.perf_counter()
+        funcion(copia)
+        tiempos.append(time.perf_counter() - t)
+    tiempos.sort()
+    copia = sim.clonar()
+    tracemalloc.start()
+    funcion(copia)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    mediana = tiempos[len(tiempos) // 2]
+    return {"llamadas": len(tiempos), "minimo": tiempos[0], "mediana": mediana,
+        "ops_s": 1 / mediana if mediana > 0 else float("inf"), "memoria_pico": pico}
+
+def ejecutar(motores, poblaciones, vacunas, umbrales, densidad=True, dibujo=True, repeticiones=5, mostrar=print):
+    """Ejecutar todas las mediciones de la grilla.
+
+    Retorna
+    -------
+    list
+        Lista de resultados, un diccionario por (motor, poblacion, vacunas, etapa)
+    """
+    resultados = []
+    for motor in motores:
+        for poblacion in poblaciones:
+            for n_vac in vacunas:
+                sim = crear(motor, poblacion, n_vac, densidad)
+                fases = etapas(umbrales)
+                if dibujo:
+                    fases.update(etapas_dibujo())
+                for nombre, funcion in fases.items():
+                    medicion = medir(funcion, sim, repeticiones)
+                    resultado = dict(motor=motor, poblacion=poblacion, vacunas=n_vac, etapa=nombre, **umbrales, **medicion)
+                    resultados.append(resultado)
+                    if mostrar:
+                        mostrar("%-7s %8d %4d %-20s %12.1f ops/s %10.3f ms %10.1f KiB" % (motor, poblacion, n_vac,
+                            nombre, medicion["ops_s"], medicion["mediana"] * 1e3, medicion["memoria_pico"] / 1024))
+    return resultados
+
+def clave(resultado):
+    """Clave para comparar un resultado con la medición base"""
+    return (resultado["motor"], resultado["poblacion"], resultado["vacunas"], resultado["etapa"],
+        resultado["vel_per"], resultado["umb_col"], resultado["umb_con"], resultado["umb_vac"])
+
+def comparar(resultados, base, tolerancia=0.25):
+    """Comparar resultados con una medición base.
+
+    Parámetros
+    ----------
+    resultados : list
+        Resultados de ejecutar
+    base : list
+        Resultados de la medición base
+    tolerancia : float, opcional
+        Aumento relativo de la mediana que se considera regresión, por omisión 25%
+
+    Retorna
+    -------
+    list
+        Lista de (resultado, resultado base, razón) con las regresiones
+    """
+    indice = {clave(r): r for r in base}
+    regresiones = []
+    for r in resultados:
+        b = indice.get(clave(r))
+        if b is not None and b["mediana"] > 0:
+            razon = r["mediana"] / b["mediana"]
+            if razon > 1 + tolerancia:
+                regresiones.append((r, b, razon))
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description="Medición de las etapas de la simulación")
+    parser.add_argument("--motores", nargs="+", choices=list(MOTORES), default=list(MOTORES))
+    parser.add_argument("--poblacion", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--vacunas", type=int, nargs="+", default=[1])
+    parser.add_argument("--vel-per", type=int, default=10)
+    parser.add_argument("--umb-col", type=float, default=11)
+    parser.add_argument("--umb-con", type=float, default=15)
+    parser.add_argument("--umb-vac", type=float, default=30)
+    parser.add_argument("--densidad-fija", action="store_true", help="no escalar el mundo con la población")
+    parser.add_argument("--sin-dibujo", action="store_true", help="no medir el dibujo")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--salida", default="benchmark.json")
+    parser.add_argument("--base", help="archivo JSON de la medición base")
+    parser.add_argument("--guardar-base", help="guardar también los resultados como medición base")
+    parser.add_argument("--tolerancia", type=float, default=0.25)
+    args = parser.parse_args()
+    salida = args.salida
+    base = args.base
+    guardar_base = args.guardar_base
+
+    umbrales = {"vel_per": args.vel_per, "umb_col": args.umb_col, "umb_con": args.umb_con, "umb_vac": args.umb_vac}
+    resultados = ejecutar(args.motores, args.poblacion, args.vacunas, umbrales,
+        not args.densidad_fija, not args.sin_dibujo, args.repeticiones)
+    datos = {"python": sys.version, "plataforma": platform.platform(), "procesador": platform.processor(),
+        "resultados": resultados}
+    with open(salida, "w") as archivo:
+        json.dump(datos, archivo, indent=1)
+    if guardar_base:
+        with open(guardar_base, "w") as archivo:
+            json.dump(datos, archivo, indent=1)
+
+    if base:
+        with open(base) as archivo:
+            regresiones = comparar(resultados, json.load(archivo)["resultados"], args.tolerancia)
+        for r, b, razon in regresiones:
+            print("REGRESIÓN %s %d %d %s: %.3f ms -> %.3f ms (x%.2f)" % (r["motor"], r["poblacion"], r["vacunas"],
+                r["etapa"], b["mediana"] * 1e3, r["mediana"] * 1e3, razon))
+        if regresiones:
+            sys.exit(1)
+        print("Sin regresiones respecto de %s" % base)
+
+if __name__ == '__main__':
+    main()
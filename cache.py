@@ -0,0 +1,230 @@
+"""Cache en disco de los resultados de las simulaciones.
+
+Cada resultado se guarda en un archivo .npy cuyo nombre es un hash SHA-256 de
+todo lo que lo determina: los parámetros del escenario (argumentos de
+Simulacion, umbrales y velocidades), la semilla, la réplica, el motor y la
+versión del código (un hash de todos los archivos .py del directorio). Un único
+archivo indice.json lista las entradas con su tamaño y último uso, para
+listarlas y podarlas sin leer los resultados. Cuando el cache supera su
+tamaño máximo se borran las entradas usadas hace más tiempo.
+
+El cache no admite escrituras concurrentes: lote.barrido lo consulta y lo
+actualiza solo desde el proceso principal.
+
+Ejemplo::
+
+    python cache.py --directorio .cache --listar
+    python cache.py --directorio .cache --podar 100
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+# Directorio y tamaño máximo por omisión
+DIRECTORIO = ".cache_simulaciones"
+MAX_BYTES = 1 << 30
+
+_version = None
+
+def version_codigo():
+    """Hash de todos los archivos .py del directorio, calculado una vez por proceso.
+
+    Se incluyen todos y no solo los de la simulación para que ningún módulo que
+    cambie los resultados (agregador, punto_control, ...) quede fuera del hash.
+    """
+    global _version
+    if _version is None:
+        h = hashlib.sha256()
+        base = os.path.dirname(os.path.abspath(__file__))
+        for ruta in sorted(glob.glob(os.path.join(base, "*.py"))):
+            h.update(os.path.basename(ruta).encode())
+            with open(ruta, "rb") as archivo:
+                h.update(archivo.read())
+        _version = h.hexdigest()[:16]
+    return _version
+
+def clave(escenario, semilla, replica=None, motor="python"):
+    """Clave de un resultado.
+
+    Parámetros
+    ----------
+    escenario : dict
+        Parámetros completos del escenario (argumentos, umbrales y velocidades)
+    semilla : int
+        Semilla base
+    replica : int, opcional
+        Identificador de la réplica
+    motor : str, opcional
+        Motor de la simulación, por omisión "python"
+
+    Retorna
+    -------
+    str
+        Hash SHA-256 en hexadecimal
+    """
+    datos = {"escenario": escenario, "semilla": semilla, "replica": replica, "motor": motor,
+        "version": version_codigo()}
+    texto = json.dumps(datos, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+class Cache:
+    """Clase para guardar resultados en disco con desalojo LRU"""
+
+    def __init__(self, directorio=DIRECTORIO, max_bytes=MAX_BYTES):
+        """Constructor del cache
+
+        Parámetros
+        ----------
+        directorio : str, opcional
+            Directorio del cache, se crea si no existe
+        max_bytes : int, opcional
+            Tamaño máximo de los resultados guardados, por omisión 1 GiB
+        """
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.ruta_indice = os.path.join(directorio, "indice.json")
+        os.makedirs(directorio, exist_ok=True)
+        if os.path.exists(self.ruta_indice):
+            with open(self.ruta_indice) as archivo:
+                self.indice = json.load(archivo)
+        else:
+            self.indice = {}
+
+    def __len__(self):
+        return len(self.indice)
+
+    def __contains__(self, clave):
+        return clave in self.indice
+
+    def bytes(self):
+        """Tamaño total de los resultados guardados"""
+        return sum(entrada["bytes"] for entrada in self.indice.values())
+
+    def ruta(self, clave):
+        """Archivo de un resultado"""
+        return os.path.join(self.directorio, clave + ".npy")
+
+    def guardar_indice(self):
+        """Escribir el índice en disco"""
+        temporal = self.ruta_indice + ".tmp"
+        with open(temporal, "w") as archivo:
+            json.dump(self.indice, archivo, indent=1)
+        os.replace(temporal, self.ruta_indice)
+
+    def obtener(self, clave, guardar_indice=True):
+        """Leer un resultado.
+
+        Parámetros
+        ----------
+        clave : str
+            Clave del resultado (ver clave)
+        guardar_indice : bool, opcional
+            Escribir el índice con el nuevo último uso, por omisión verdadero
+
+        Retorna
+        -------
+        numpy.ndarray o None
+            Resultado guardado, o None si no está en el cache
+        """
+        entrada = self.indice.get(clave)
+        if entrada is None:
+            return None
+        try:
+            resultado = np.load(self.ruta(clave))
+        except FileNotFoundError:
+            del self.indice[clave]
+            return None
+        entrada["uso"] = time.time()
+        if guardar_indice:
+            self.guardar_indice()
+        return resultado
+
+    def agregar(self, clave, resultado, descripcion=None, guardar_indice=True):
+        """Guardar un resultado y desalojar los menos usados si se supera el tamaño máximo.
+
+        Parámetros
+        ----------
+        clave : str
+            Clave del resultado (ver clave)
+        resultado : numpy.ndarray
+            Resultado a guardar
+        descripcion : dict, opcional
+            Datos serializables en JSON para listar la entrada (por ejemplo, el escenario)
+        guardar_indice : bool, opcional
+            Escribir el índice, por omisión verdadero
+        """
+        np.save(self.ruta(clave), resultado)
+        ahora = time.time()
+        self.indice[clave] = {"bytes": os.path.getsize(self.ruta(clave)), "creado": ahora, "uso": ahora,
+            "descripcion": descripcion}
+        self.podar(guardar_indice=False)
+        if guardar_indice:
+            self.guardar_indice()
+
+    def borrar(self, clave, guardar_indice=True):
+        """Borrar un resultado"""
+        self.indice.pop(clave, None)
+        try:
+            os.remove(self.ruta(clave))
+        except FileNotFoundError:
+            pass
+        if guardar_indice:
+            self.guardar_indice()
+
+    def podar(self, max_bytes=None, guardar_indice=True):
+        """Borrar los resultados usados hace más tiempo hasta no superar max_bytes.
+
+        Parámetros
+        ----------
+        max_bytes : int, opcional
+            Tamaño máximo, por omisión el del cache
+        guardar_indice : bool, opcional
+            Escribir el índice, por omisión verdadero
+
+        Retorna
+        -------
+        int
+            Número de resultados borrados
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        total = self.bytes()
+        borrados = 0
+        for clave in sorted(self.indice, key=lambda c: self.indice[c]["uso"]):
+            if total <= max_bytes:
+                break
+            total -= self.indice[clave]["bytes"]
+            self.borrar(clave, guardar_indice=False)
+            borrados += 1
+        if guardar_indice:
+            self.guardar_indice()
+        return borrados
+
+    def entradas(self):
+        """Lista de (clave, entrada) del índice, de la usada más recientemente a la más antigua"""
+        return sorted(self.indice.items(), key=lambda item: -item[1]["uso"])
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache de resultados de simulaciones")
+    parser.add_argument("--directorio", default=DIRECTORIO)
+    parser.add_argument("--listar", action="store_true", help="listar las entradas")
+    parser.add_argument("--podar", type=float, metavar="MB", help="reducir el cache a MB megabytes")
+    args = parser.parse_args()
+
+    cache = Cache(args.directorio)
+    if args.podar is not None:
+        borrados = cache.podar(int(args.podar * 2 ** 20))
+        print("%d entradas borradas" % borrados)
+    if args.listar:
+        for c, entrada in cache.entradas():
+            print("%s %8d B %s %s" % (c[:16], entrada["bytes"], time.strftime("%Y-%m-%d %H:%M",
+                time.localtime(entrada["uso"])), json.dumps(entrada["descripcion"])))
+    print("%d entradas, %.1f MB" % (len(cache), cache.bytes() / 2 ** 20))
+
+if __name__ == '__main__':
+    main()
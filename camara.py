@@ -0,0 +1,173 @@
+"""Cámara para ver un mundo más grande que la pantalla.
+
+La cámara guarda la esquina inferior izquierda de la vista en coordenadas del
+mundo y un zoom (pixeles por unidad del mundo) de una lista fija de niveles.
+Convierte entre coordenadas del mundo y de la pantalla, selecciona los agentes
+visibles y, con zoom lejano, cuenta los agentes por celda de la pantalla para
+dibujar su densidad en vez de cada agente. Solo usa numpy; el dibujo está en main.
+
+Ejemplo::
+
+    camara = Camara(800, 480, 5000, 3000)
+    camara.acercar(-1) # Alejar un nivel
+    visibles, px, py = camara.visibles(x, y, 12, 20)
+"""
+import numpy as np
+
+# Niveles de zoom (pixeles por unidad del mundo)
+ZOOMS = [1 / 16, 1 / 8, 1 / 4, 1 / 2, 1, 2, 4]
+
+# Con zoom menor a este se dibuja la densidad en vez de cada agente
+ZOOM_DENSIDAD = 1 / 2
+
+class Camara:
+    """Clase para la vista de un rectángulo del mundo en el área de juego"""
+
+    def __init__(self, ancho, alto, x_max, y_max, x0=0, y0=0, zoom=1):
+        """Constructor de la cámara
+
+        Parámetros
+        ----------
+        ancho : int
+            Ancho del área de juego en pixeles
+        alto : int
+            Alto del área de juego en pixeles
+        x_max : int
+            Ancho del mundo
+        y_max : int
+            Alto del mundo
+        x0 : int, opcional
+            Posición x de la pantalla donde se dibuja x = 0 del mundo, por omisión 0
+        y0 : int, opcional
+            Posición y de la pantalla donde se dibuja y = 0 del mundo, por omisión 0
+        zoom : float, opcional
+            Nivel de zoom inicial (uno de ZOOMS), por omisión 1
+        """
+        self.ancho = ancho
+        self.alto = alto
+        self.x_max = x_max
+        self.y_max = y_max
+        self.x0 = x0
+        self.y0 = y0
+        self.nivel = ZOOMS.index(zoom)
+        self.x = 0.0 # Esquina inferior izquierda de la vista en el mundo
+        self.y = 0.0
+        self.limitar()
+
+    @property
+    def zoom(self):
+        """Pixeles por unidad del mundo"""
+        return ZOOMS[self.nivel]
+
+    def densidad_activa(self):
+        """Indica si se dibuja la densidad en vez de cada agente"""
+        return self.zoom < ZOOM_DENSIDAD
+
+    def vista(self):
+        """Ancho y alto del mundo que se ve en el área de juego"""
+        return self.ancho / self.zoom, self.alto / self.zoom
+
+    def limitar(self):
+        """Mantener la vista dentro del mundo. Si el mundo es más chico que la vista, se ve desde 0"""
+        ancho, alto = self.vista()
+        self.x = min(max(self.x, 0.0), max(self.x_max - ancho, 0.0))
+        self.y = min(max(self.y, 0.0), max(self.y_max - alto, 0.0))
+
+    def mover(self, dx, dy):
+        """Mover la vista en (dx, dy) pixeles de la pantalla (y hacia arriba)"""
+        self.x += dx / self.zoom
+        self.y += dy / self.zoom
+        self.limitar()
+
+    def centrar(self, x, y):
+        """Centrar la vista en la posición (x, y) del mundo"""
+        ancho, alto = self.vista()
+        self.x = x - ancho / 2
+        self.y = y - alto / 2
+        self.limitar()
+
+    def acercar(self, niveles, px=None, py=None):
+        """Cambiar el zoom en niveles de ZOOMS, manteniendo fijo el punto (px, py) de la pantalla.
+
+        No se aleja más allá del nivel en que el mundo completo cabe en la vista.
+
+        Parámetros
+        ----------
+        niveles : int
+            Niveles a acercar (positivo) o alejar (negativo)
+        px, py : int, opcional
+            Punto de la pantalla que queda fijo, por omisión el centro de la vista
+        """
+        if px is None:
+            px, py = self.x0 + self.ancho / 2, self.y0 - self.alto / 2
+        x, y = self.a_mundo(px, py)
+        nivel = min(max(self.nivel + niveles, 0), len(ZOOMS) - 1)
+        while nivel < self.nivel and self.x_max * ZOOMS[nivel + 1] <= self.ancho and self.y_max * ZOOMS[nivel + 1] <= self.alto:
+            nivel += 1 # El mundo ya cabía en la vista con el nivel siguiente
+        self.nivel = nivel
+        self.x = x - (px - self.x0) / self.zoom
+        self.y = y - (self.y0 - py) / self.zoom
+        self.limitar()
+
+    def a_pantalla(self, x, y):
+        """Coordenadas del mundo (escalares o arreglos) a coordenadas de la pantalla"""
+        return self.x0 + (x - self.x) * self.zoom, self.y0 - (y - self.y) * self.zoom
+
+    def a_mundo(self, px, py):
+        """Coordenadas de la pantalla a coordenadas del mundo"""
+        return self.x + (px - self.x0) / self.zoom, self.y + (self.y0 - py) / self.zoom
+
+    def visibles(self, x, y, ancho=0, alto=0):
+        """Agentes visibles y su posición en la pantalla.
+
+        Cada agente se dibuja con su esquina superior izquierda en la posición
+        de la pantalla, por lo que es visible si esa esquina no está bajo el
+        área de juego y algún pixel de su imagen de ancho x alto queda en ella.
+
+        Parámetros
+        ----------
+        x, y : numpy.ndarray
+            Posiciones en el mundo
+        ancho, alto : int, opcional
+            Tamaño en pixeles de la imagen de cada agente
+
+        Retorna
+        -------
+        tuple
+            Índices de los visibles y sus posiciones x e y en la pantalla (enteros)
+        """
+        px, py = self.a_pantalla(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+        izquierda = self.x0
+        arriba = self.y0 - self.alto
+        visibles = np.flatnonzero((px > izquierda - ancho) & (px < izquierda + self.ancho) &
+            (py > arriba - alto) & (py <= self.y0))
+        return visibles, px[visibles].astype(int), py[visibles].astype(int)
+
+    def densidad(self, x, y, clases, n_clases, celda=4):
+        """Número de agentes de cada clase por celda de la pantalla.
+
+        Parámetros
+        ----------
+        x, y : numpy.ndarray
+            Posiciones en el mundo
+        clases : numpy.ndarray
+            Clase de cada agente (por ejemplo, el color con que se dibuja), de 0 a n_clases - 1
+        n_clases : int
+            Número de clases
+        celda : int, opcional
+            Lado de cada celda en pixeles, por omisión 4
+
+        Retorna
+        -------
+        numpy.ndarray
+            Arreglo (columnas, filas, n_clases) con los conteos. La fila 0 es la de arriba
+        """
+        nx = -(-self.ancho // celda)
+        ny = -(-self.alto // celda)
+        px, py = self.a_pantalla(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+        arriba = self.y0 - self.alto
+        dentro = (px >= self.x0) & (px <= self.x0 + self.ancho) & (py >= arriba) & (py <= self.y0)
+        i = np.minimum((px[dentro] - self.x0) // celda, nx - 1).astype(np.int64)
+        j = np.minimum((py[dentro] - arriba) // celda, ny - 1).astype(np.int64)
+        indice = (i * ny + j) * n_clases + np.asarray(clases)[dentro]
+        return np.bincount(indice, minlength=nx * ny * n_clases).reshape(nx, ny, n_clases)
@@ -0,0 +1,283 @@
+"""Ensambles de réplicas de Monte Carlo que avanzan juntas.
+
+Las R réplicas de una misma configuración se guardan en arreglos planos de
+(réplica x persona) y cada etapa se ejecuta una sola vez para todas, con la
+búsqueda de vecinos separada por réplica. Cada réplica usa su propio flujo
+aleatorio (aleatorio.flujos) y sortea en el mismo orden que SimulacionNP, por
+lo que la réplica r reproduce exactamente a SimulacionNP(..., semilla, replica=r).
+
+Ejemplo::
+
+    ens = Ensamble(100, 1, 2000, 0, 788, 0, 475, porc_infectados=0.05, replicas=200)
+    ens.simular()
+    bandas = ens.bandas("infectados")
+"""
+import numpy as np
+
+from aleatorio import SEMILLA, flujos
+from series import NOMBRES
+from simulacion_np import mover_lote, pares_cercanos, sortear
+
+class Ensamble:
+    """Clase para simular varias réplicas de una simulación a la vez"""
+
+    def __init__(self, poblacion, vacunas, dias_simulacion, x_min, x_max, y_min, y_max,
+        porc_infectados=0.1, prob_vacuna=0.5, prob_reb=0.5, replicas=10, semilla=SEMILLA, rngs=None):
+        """Constructor del ensamble
+
+        Parámetros
+        ----------
+        poblacion : int
+            Número de personas en cada réplica
+        vacunas : int
+            Número de vacunas en cada réplica
+        dias_simulacion : int
+            Días de duración de simulación
+        x_min : int
+            Frontera izquierda del dominio
+        x_max : int
+            Frontera derecha del dominio
+        y_min : int
+            Frontera inferior del dominio
+        y_max : int
+            Frontera superior del dominio
+        porc_infectados : float, opcional
+            Porcentaje inicial de infectados, por omisión 10%
+        prob_vacuna : float, opcional
+            Probabilidad de que una persona se vacune, por omisión 50%
+        prob_reb : float, opcional
+            Probabilidad de rebrote, por omisión 50%
+        replicas : int, opcional
+            Número de réplicas, por omisión 10
+        semilla : int, opcional
+            Semilla base. La réplica r usa el flujo (semilla, r), por omisión 12345
+        rngs : list, opcional
+            Lista con un numpy.random.Generator por réplica. Si se entrega, se
+            ignoran semilla y replicas
+        """
+        self.rngs = rngs if rngs is not None else flujos(semilla, replicas)
+        self.replicas = len(self.rngs)
+        self.poblacion = poblacion
+        self.n_vacunas = vacunas
+        self.dias_simulacion = dias_simulacion
+        self.x_min = x_min
+        self.x_max = x_max
+        self.y_min = y_min
+        self.y_max = y_max
+        self.porc_infectados = porc_infectados
+        self.prob_vacuna = prob_vacuna # Probabilidad que una persona se vacune
+        self.prob_reb = prob_reb # Probabilidad de rebrote
+
+        # Crear personas y vacunas de cada réplica, con los mismos sorteos que SimulacionNP
+        x, y, estado, dias_enfermo, vac_x, vac_y, vac_efectividad = [], [], [], [], [], [], []
+        for rng in self.rngs:
+            x.append(rng.integers(x_min, x_max, size=poblacion, endpoint=True, dtype=np.int32))
+            y.append(rng.integers(y_min, y_max, size=poblacion, endpoint=True, dtype=np.int32))
+            estado.append((rng.random(poblacion) < porc_infectados).astype(np.int8))
+            dias_enfermo.append(rng.integers(28, 50, size=poblacion, endpoint=True, dtype=np.int16))
+            vac_x.append(rng.integers(x_min, x_max, size=vacunas, endpoint=True, dtype=np.int32))
+            vac_y.append(rng.integers(y_min, y_max, size=vacunas, endpoint=True, dtype=np.int32))
+            vac_efectividad.append(rng.uniform(0.6, 0.95, size=vacunas))
+        # Arreglos planos: la persona i de la réplica r está en r * poblacion + i
+        self.x = np.concatenate(x)
+        self.y = np.concatenate(y)
+        self.estado = np.concatenate(estado)
+        self.dias_enfermo = np.concatenate(dias_enfermo)
+        self.inoculacion = np.zeros(self.replicas * poblacion)
+        self.vac_x = np.concatenate(vac_x)
+        self.vac_y = np.concatenate(vac_y)
+        self.vac_efectividad = np.concatenate(vac_efectividad)
+        self.grupo = np.repeat(np.arange(self.replicas), poblacion) # Réplica de cada persona
+        self.grupo_vac = np.repeat(np.arange(self.replicas), vacunas) # Réplica de cada vacuna
+
+        # Contadores por réplica
+        self.n_infectados = self.contar(self.estado == 1)
+        self.n_sanos = poblacion - self.n_infectados
+        self.n_recuperados = np.zeros(self.replicas, dtype=np.int64)
+        self.n_inoculados = np.zeros(self.replicas, dtype=np.int64)
+
+        # Series de (replicas, 4, días), preasignadas
+        self.datos = np.zeros((self.replicas, len(NOMBRES), max(1, dias_simulacion)), dtype=np.int32)
+        self.n = 0
+
+        # Calendario de recuperaciones: tick -> lista de arreglos de índices
+        self.tick = 0
+        self.recuperaciones = {}
+        infectados = np.flatnonzero(self.estado == 1)
+        self.programar_recuperacion(infectados, self.dias_enfermo[infectados].astype(np.int64) - 1)
+
+        # Índices de las personas sin inoculacion
+        self.sin_vacuna = np.arange(self.replicas * poblacion)
+
+    def contar(self, mascara):
+        """Número de personas de cada réplica que cumplen la máscara"""
+        return np.bincount(self.grupo[mascara], minlength=self.replicas)
+
+    def programar_recuperacion(self, indices, ticks):
+        """Agendar la recuperación de varias personas (ver SimulacionNP.programar_recuperacion)"""
+        for tick in np.unique(ticks):
+            self.recuperaciones.setdefault(int(tick), []).append(indices[ticks == tick])
+
+    def serie(self, nombre):
+        """Serie de cada réplica, sin copiar.
+
+        Parámetros
+        ----------
+        nombre : str
+            "sanos", "infectados", "recuperados" o "inoculados"
+
+        Retorna
+        -------
+        numpy.ndarray
+            Arreglo de (replicas, días)
+        """
+        return self.datos[:, NOMBRES.index(nombre), :self.n]
+
+    @property
+    def sanos(self):
+        """Número de sanos por réplica y dia"""
+        return self.serie("sanos")
+
+    @property
+    def infectados(self):
+        """Número de infectados por réplica y dia"""
+        return self.serie("infectados")
+
+    @property
+    def recuperados(self):
+        """Número de recuperados por réplica y dia"""
+        return self.serie("recuperados")
+
+    @property
+    def inoculados(self):
+        """Número de vacunados por réplica y dia"""
+        return self.serie("inoculados")
+
+    def media(self, nombre):
+        """Promedio de una serie entre las réplicas, por dia"""
+        return self.serie(nombre).mean(axis=0)
+
+    def bandas(self, nombre, cuantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        """Promedio y cuantiles de una serie entre las réplicas, por dia.
+
+        Parámetros
+        ----------
+        nombre : str
+            "sanos", "infectados", "recuperados" o "inoculados"
+        cuantiles : tuple, opcional
+            Cuantiles a calcular, por omisión 5%, 25%, 50%, 75% y 95%
+
+        Retorna
+        -------
+        dict
+            "media" -> arreglo de días, y cada cuantil -> arreglo de días
+        """
+        serie = self.serie(nombre)
+        bandas = {"media": serie.mean(axis=0)}
+        for q, valores in zip(cuantiles, np.quantile(serie, cuantiles, axis=0)):
+            bandas[q] = valores
+        return bandas
+
+    def mover_personas(self, vel=5, umbral=5, max_intentos=10):
+        """Movimiento de las personas de todas las réplicas (ver mover_lote)"""
+        mover_lote(self.x, self.y, vel, umbral, self.x_max, self.y_max, self.rngs, max_intentos, self.grupo)
+
+    def revisar_contagio(self, umbral=10.0):
+        """Simular el contagio en todas las réplicas, sin propagación dentro del tick (ver SimulacionNP.revisar_contagio)"""
+        sanos = np.flatnonzero(self.estado == 0)
+        infectados = np.flatnonzero(self.estado == 1)
+        ia, _ = pares_cercanos(self.x[sanos], self.y[sanos], self.x[infectados], self.y[infectados],
+            umbral, self.x_max, self.y_max, grupo_a=self.grupo[sanos], grupo_b=self.grupo[infectados],
+            grupos=self.replicas)
+        # Número de infectados cerca de cada persona sana
+        k = np.bincount(ia, minlength=len(sanos))
+        expuestos = sanos[k > 0]
+        prob = 1 - self.inoculacion[expuestos] ** k[k > 0]
+        azar = sortear(self.rngs, lambda rng, n: rng.random(n), len(expuestos), self.grupo[expuestos])
+        contagiados = expuestos[azar <= prob]
+        self.estado[contagiados] = 1 # Cambio a estado infectado
+        self.programar_recuperacion(contagiados, self.tick + self.dias_enfermo[contagiados].astype(np.int64) - 1)
+        nuevos = np.bincount(self.grupo[contagiados], minlength=self.replicas)
+        self.n_sanos -= nuevos
+        self.n_infectados += nuevos
+
+    def revisar_vacunacion(self, umbral=10.0):
+        """Simular el proceso de vacunación en todas las réplicas (ver SimulacionNP.revisar_vacunacion)"""
+        candidatos = self.sin_vacuna = self.sin_vacuna[self.inoculacion[self.sin_vacuna] == 0]
+        ia, ib = pares_cercanos(self.x[candidatos], self.y[candidatos], self.vac_x, self.vac_y,
+            umbral, self.x_max, self.y_max, periodico=False, grupo_a=self.grupo[candidatos],
+            grupo_b=self.grupo_vac, grupos=self.replicas)
+        # Ordenados por persona (y por lo tanto por réplica) y luego por vacuna
+        orden = np.lexsort((ib, ia))
+        ia = ia[orden]
+        ib = ib[orden]
+        azar = sortear(self.rngs, lambda rng, n: rng.random(n), len(ia), self.grupo[candidatos[ia]])
+        exito = azar <= self.prob_vacuna
+        ia = ia[exito]
+        ib = ib[exito]
+        ia, primera = np.unique(ia, return_index=True)
+        self.inoculacion[candidatos[ia]] += self.vac_efectividad[ib[primera]]
+        self.n_inoculados += np.bincount(self.grupo[candidatos[ia]], minlength=self.replicas)
+        self.sin_vacuna = np.delete(candidatos, ia)
+
+    def rebrote(self, r, porc=0.02):
+        """Simular rebrote de virus en la réplica r (ver SimulacionNP.rebrote)"""
+        n = int(np.ceil(self.poblacion * porc))
+        inicio = r * self.poblacion
+        fin = inicio + self.poblacion
+        candidatos = inicio + np.flatnonzero((self.estado[inicio:fin] == 0) & (self.inoculacion[inicio:fin] == 0))[:n]
+        self.estado[candidatos] = 1 # Infectado
+        self.dias_enfermo[candidatos] = self.rngs[r].integers(28, 50, size=len(candidatos), endpoint=True)
+        self.programar_recuperacion(candidatos, self.tick + self.dias_enfermo[candidatos].astype(np.int64))
+        self.n_sanos[r] -= len(candidatos)
+        self.n_infectados[r] += len(candidatos)
+
+    def estadisticas(self):
+        """Obtención de estadísticas y actualización de estados de todas las réplicas"""
+        infectados = self.n_infectados.copy()
+        if self.n == self.datos.shape[2]:
+            datos = np.zeros(self.datos.shape[:2] + (2 * self.n,), dtype=self.datos.dtype)
+            datos[:, :, :self.n] = self.datos
+            self.datos = datos
+        self.datos[:, :, self.n] = np.column_stack((self.n_sanos, self.n_infectados, self.n_recuperados, self.n_inoculados))
+        self.n += 1
+        # Recuperar a los infectados que terminan sus días enfermos en este tick
+        grupos = self.recuperaciones.pop(self.tick, None)
+        if grupos:
+            recuperados = np.concatenate(grupos)
+            self.estado[recuperados] = 2 # Recuperado
+            self.dias_enfermo[recuperados] = 0
+            conteo = np.bincount(self.grupo[recuperados], minlength=self.replicas)
+            self.n_infectados -= conteo
+            self.n_recuperados += conteo
+        # Rebrote, solo en las réplicas sin infectados
+        for r in np.flatnonzero(infectados == 0):
+            if self.rngs[r].random() <= self.prob_reb:
+                self.rebrote(r)
+        self.tick += 1
+
+    def paso(self, vel_per=10, umb_col=11, umb_con=15, umb_vac=30):
+        """Avanzar todas las réplicas en 12 horas, con las mismas etapas del juego.
+
+        Parámetros
+        ----------
+        vel_per : int, opcional
+            Velocidad de movimiento de las personas (pixeles / tick), por omisión 10
+        umb_col : float, opcional
+            Umbral de colisión, por omisión 11
+        umb_con : float, opcional
+            Umbral de contagio, por omisión 15
+        umb_vac : float, opcional
+            Umbral de vacunación, por omisión 30
+        """
+        self.mover_personas(vel_per, umb_col) # Movimiento aleatorio de personas
+        self.revisar_contagio(umb_con) # Simular el contagio
+        self.revisar_vacunacion(umb_vac) # Simular el proceso de vacunación
+        self.estadisticas() # Obtención de estadísticas
+
+    def simular(self, hasta=None, **parametros_paso):
+        """Avanzar todas las réplicas hasta el tick hasta, por omisión dias_simulacion"""
+        if hasta is None:
+            hasta = self.dias_simulacion
+        while self.tick < hasta:
+            self.paso(**parametros_paso)
@@ -0,0 +1,98 @@
+"""Error del contagio por densidad frente al contagio exacto.
+
+Ejecuta con lote.barrido las mismas réplicas de cada población con contagio
+"exacto" y "densidad" (motor numpy, sin rebrotes, con la vacuna del juego) y
+muestra, en una tabla en Markdown, la media y el error estándar del pico de
+infectados, del día del pico y de la fracción recuperada al final. Con los
+valores por omisión reproduce la tabla del README.
+
+Ejemplo::
+
+    python error_densidad.py --poblacion 100 200 300 --replicas 40 --dias 400
+"""
+import argparse
+
+import numpy as np
+
+from aleatorio import SEMILLA
+from lote import ESCENARIO, SERIES, barrido
+
+def resumen(series, poblacion):
+    """Media y error estándar del pico, el día del pico y la fracción recuperada.
+
+    Parámetros
+    ----------
+    series : numpy.ndarray
+        Arreglo de (replicas, 4, dias) de un escenario
+    poblacion : int
+        Número de personas
+
+    Retorna
+    -------
+    dict
+        Nombre -> (media, error estándar)
+    """
+    infectados = series[:, SERIES.index("infectados")]
+    valores = {
+        "pico": infectados.max(axis=1),
+        "dia_pico": infectados.argmax(axis=1),
+        "recuperados": series[:, SERIES.index("recuperados"), -1] / poblacion,
+    }
+    n = len(series)
+    return {nombre: (v.mean(), v.std(ddof=1) / np.sqrt(n) if n > 1 else np.nan) for nombre, v in valores.items()}
+
+def tabla(poblaciones, replicas, dias, semilla=SEMILLA, procesos=None, vacunas=ESCENARIO["vacunas"]):
+    """Filas de la tabla de error, una por población y modo de contagio.
+
+    Parámetros
+    ----------
+    poblaciones : list
+        Poblaciones a comparar
+    replicas : int
+        Réplicas por escenario
+    dias : int
+        Días de simulación
+    semilla : int, opcional
+        Semilla base, por omisión 12345
+    procesos : int, opcional
+        Número de procesos, por omisión uno por núcleo
+    vacunas : int, opcional
+        Número de vacunas, por omisión la del juego (1)
+
+    Retorna
+    -------
+    list
+        Lista de (poblacion, contagio, resumen)
+    """
+    filas = []
+    for contagio in ("exacto", "densidad"):
+        fijos = {"dias_simulacion": dias, "prob_reb": 0.0, "vacunas": vacunas, "contagio": contagio}
+        lista, series = barrido({"poblacion": poblaciones}, replicas, semilla, procesos, motor="numpy", fijos=fijos)
+        for esc, s in zip(lista, series):
+            filas.append((esc["poblacion"], contagio, resumen(s, esc["poblacion"])))
+    filas.sort(key=lambda fila: (fila[0], fila[1] != "exacto"))
+    return filas
+
+def formatear(filas):
+    """Tabla en Markdown, con coma decimal como en el README"""
+    lineas = ["| población | contagio | pico de infectados | día del pico | fracción recuperada |",
+        "|-----------|----------|--------------------|--------------|---------------------|"]
+    for poblacion, contagio, r in filas:
+        celdas = ["%.1f ± %.1f" % r["pico"], "%.1f ± %.1f" % r["dia_pico"], "%.3f ± %.3f" % r["recuperados"]]
+        celdas = tuple(celda.replace(".", ",") for celda in celdas)
+        lineas.append("| %-9d | %-8s | %-18s | %-12s | %-19s |" % ((poblacion, contagio) + celdas))
+    return "\n".join(lineas)
+
+def main():
+    parser = argparse.ArgumentParser(description="Error del contagio por densidad frente al exacto")
+    parser.add_argument("--poblacion", type=int, nargs="+", default=[100, 200, 300])
+    parser.add_argument("--replicas", type=int, default=40)
+    parser.add_argument("--dias", type=int, default=400)
+    parser.add_argument("--vacunas", type=int, default=ESCENARIO["vacunas"])
+    parser.add_argument("--semilla", type=int, default=SEMILLA)
+    parser.add_argument("--procesos", type=int, default=None)
+    args = parser.parse_args()
+    print(formatear(tabla(args.poblacion, args.replicas, args.dias, args.semilla, args.procesos, args.vacunas)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""Grabación de trayectorias y reproducción sin simular.
+
+Una grabación es un archivo con:
+
+* 8 bytes con la firma MAGIA
+* 8 bytes con el largo de la cabecera (entero sin signo, little endian)
+* la cabecera en JSON (población, vacunas, tamaño del mundo y tipos de datos),
+  rellenada hasta INICIO bytes
+* un cuadro de tamaño fijo por tick, agregado al final del archivo
+
+Cada cuadro guarda el tick, los contadores y, por persona, la posición, el
+estado y la inoculacion, además de la posición de las vacunas, con tipos
+compactos. Reproduccion lee los cuadros con numpy.memmap, sin copiarlos, y
+puede leer una grabación que todavía se está escribiendo.
+
+Ejemplo::
+
+    with Grabadora("partida.grab", sim) as grabadora:
+        for _ in range(sim.dias_simulacion):
+            sim.paso()
+            grabadora.grabar(sim)
+    repro = Reproduccion("partida.grab")
+    cuadro = repro.cuadro(100)
+"""
+import json
+import os
+import struct
+
+import numpy as np
+
+# Firma de los archivos de grabación
+MAGIA = b"SIMGR001"
+
+# Posición del primer cuadro en el archivo
+INICIO = 4096
+
+def tipo_cuadro(poblacion, vacunas, x_max, y_max):
+    """Tipo de datos de un cuadro.
+
+    Las posiciones usan 16 bits si el mundo cabe en ellos y la inoculacion
+    usa media precisión, por lo que cada persona ocupa 7 u 11 bytes.
+
+    Retorna
+    -------
+    numpy.dtype
+        Tipo estructurado con tick, contadores, personas y vacunas
+    """
+    posicion = "<u2" if max(x_max, y_max) < 2 ** 16 else "<u4"
+    persona = np.dtype([("x", posicion), ("y", posicion), ("estado", "u1"), ("inoculacion", "<f2")])
+    vacuna = np.dtype([("x", posicion), ("y", posicion)])
+    return np.dtype([("tick", "<u4"), ("contadores", "<u4", (4,)),
+        ("personas", persona, (poblacion,)), ("vacunas", vacuna, (vacunas,))])
+
+def _tipo(descr):
+    """Tipo de datos a partir de numpy.dtype.descr leído de JSON (listas en vez de tuplas)"""
+    return np.dtype([(campo[0], _tipo(campo[1]) if isinstance(campo[1], list) else campo[1],
+        *[tuple(forma) for forma in campo[2:]]) for campo in descr])
+
+def arreglos(sim):
+    """Posiciones, estado e inoculacion de personas y vacunas de una simulación"""
+    if isinstance(getattr(sim, "x", None), np.ndarray): # SimulacionNP
+        return sim.x, sim.y, sim.estado, sim.inoculacion, sim.vac_x, sim.vac_y
+    personas = sim.personas
+    vacunas = sim.vacunas
+    return ([p.x for p in personas], [p.y for p in personas], [p.estado for p in personas],
+        [p.inoculacion for p in personas], [v.x for v in vacunas], [v.y for v in vacunas])
+
+def llenar_cuadro(cuadro, sim):
+    """Copiar el estado actual de la simulación en un cuadro.
+
+    Los contadores son los últimos de las series, igual que los del contador del juego.
+
+    Parámetros
+    ----------
+    cuadro : numpy.ndarray
+        Arreglo de dimensión 0 con el tipo de tipo_cuadro (por ejemplo, una vista a memoria compartida)
+    sim : Simulacion o SimulacionNP
+        Simulación
+    """
+    x, y, estado, inoculacion, vac_x, vac_y = arreglos(sim)
+    personas = cuadro["personas"]
+    personas["x"] = x
+    personas["y"] = y
+    personas["estado"] = estado
+    personas["inoculacion"] = inoculacion
+    cuadro["vacunas"]["x"] = vac_x
+    cuadro["vacunas"]["y"] = vac_y
+    cuadro["tick"] = sim.tick
+    series = sim.series.arreglo()
+    cuadro["contadores"] = series[:, -1] if series.shape[1] > 0 else 0
+
+class Grabadora:
+    """Clase para grabar los cuadros de una simulación en un archivo"""
+
+    def __init__(self, ruta, sim):
+        """Constructor de la grabadora. Si el archivo existe, se agregan cuadros al final.
+
+        Parámetros
+        ----------
+        ruta : str
+            Ruta del archivo
+        sim : Simulacion o SimulacionNP
+            Simulación a grabar
+        """
+        self.ruta = ruta
+        self.dtype = tipo_cuadro(sim.poblacion, len(sim.vacunas), sim.x_max, sim.y_max)
+        self.cuadro = np.zeros((), dtype=self.dtype) # Cuadro reutilizado en cada grabación
+        if os.path.exists(ruta) and os.path.getsize(ruta) > 0:
+            cabecera = leer_cabecera(ruta)
+            if _tipo(cabecera["dtype"]) != self.dtype:
+                raise ValueError("%s es una grabación de otra simulación" % ruta)
+            # Descartar un cuadro incompleto al final
+            completos = (os.path.getsize(ruta) - INICIO) // self.dtype.itemsize
+            with open(ruta, "r+b") as archivo:
+                archivo.truncate(INICIO + completos * self.dtype.itemsize)
+        else:
+            cabecera = json.dumps({"poblacion": sim.poblacion, "vacunas": len(sim.vacunas),
+                "x_max": sim.x_max, "y_max": sim.y_max, "dtype": self.dtype.descr}).encode()
+            if 16 + len(cabecera) > INICIO:
+                raise ValueError("cabecera demasiado grande")
+            with open(ruta, "wb") as archivo:
+                archivo.write(MAGIA)
+                archivo.write(struct.pack("<Q", len(cabecera)))
+                archivo.write(cabecera)
+                archivo.write(bytes(INICIO - 16 - len(cabecera)))
+        self.archivo = open(ruta, "ab")
+
+    def grabar(self, sim):
+        """Agregar el estado actual de la simulación como un cuadro (ver llenar_cuadro).
+
+        Parámetros
+        ----------
+        sim : Simulacion o SimulacionNP
+            Simulación a grabar
+        """
+        llenar_cuadro(self.cuadro, sim)
+        self.archivo.write(self.cuadro.tobytes())
+
+    def cerrar(self):
+        """Escribir los cuadros pendientes y cerrar el archivo"""
+        if not self.archivo.closed:
+            self.archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.cerrar()
+
+def leer_cabecera(ruta):
+    """Cabecera de una grabación.
+
+    Retorna
+    -------
+    dict
+        Población, vacunas, tamaño del mundo y tipo de los cuadros
+    """
+    with open(ruta, "rb") as archivo:
+        if archivo.read(8) != MAGIA:
+            raise ValueError("%s no es una grabación" % ruta)
+        largo, = struct.unpack("<Q", archivo.read(8))
+        return json.loads(archivo.read(largo).decode())
+
+class Reproduccion:
+    """Clase para leer los cuadros de una grabación sin copiarlos.
+
+    Las propiedades sanos, infectados, recuperados e inoculados entregan los
+    contadores hasta el cuadro actual (posicion), igual que las series de una
+    simulación, por lo que se puede usar en lugar de la simulación para dibujar.
+    """
+
+    def __init__(self, ruta):
+        """Constructor de la reproducción
+
+        Parámetros
+        ----------
+        ruta : str
+            Ruta del archivo
+        """
+        self.ruta = ruta
+        cabecera = leer_cabecera(ruta)
+        self.poblacion = cabecera["poblacion"]
+        self.x_max = cabecera["x_max"]
+        self.y_max = cabecera["y_max"]
+        self.dtype = _tipo(cabecera["dtype"])
+        self.cuadros = None
+        self.posicion = 0 # Cuadro actual
+        self.actualizar()
+
+    def actualizar(self):
+        """Volver a mapear el archivo para ver los cuadros agregados después de abrirlo.
+
+        Retorna
+        -------
+        int
+            Número de cuadros
+        """
+        n = (os.path.getsize(self.ruta) - INICIO) // self.dtype.itemsize
+        if self.cuadros is None or n != len(self.cuadros):
+            if n > 0:
+                self.cuadros = np.memmap(self.ruta, dtype=self.dtype, mode="r", offset=INICIO, shape=(n,))
+            else:
+                self.cuadros = np.zeros(0, dtype=self.dtype)
+        return n
+
+    def __len__(self):
+        return len(self.cuadros)
+
+    def cuadro(self, i=None):
+        """Cuadro i (por omisión el actual), sin copiar.
+
+        Retorna
+        -------
+        numpy.void
+            Registro con tick, contadores, personas y vacunas
+        """
+        return self.cuadros[self.posicion if i is None else i]
+
+    def buscar_tick(self, tick):
+        """Índice del primer cuadro con tick mayor o igual a tick"""
+        return int(np.searchsorted(self.cuadros["tick"], tick))
+
+    def _contadores(self, k):
+        return self.cuadros["contadores"][:self.posicion + 1, k] if len(self.cuadros) else np.zeros(0)
+
+    @property
+    def sanos(self):
+        """Número de sanos por cuadro, hasta el actual"""
+        return self._contadores(0)
+
+    @property
+    def infectados(self):
+        """Número de infectados por cuadro, hasta el actual"""
+        return self._contadores(1)
+
+    @property
+    def recuperados(self):
+        """Número de recuperados por cuadro, hasta el actual"""
+        return self._contadores(2)
+
+    @property
+    def inoculados(self):
+        """Número de vacunados por cuadro, hasta el actual"""
+        return self._contadores(3)
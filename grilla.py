@@ -0,0 +1,93 @@
+class Grilla:
+    """Clase para indexar agentes en celdas de un dominio periódico"""
+
+    def __init__(self, x_max, y_max, tam):
+        """Constructor de la grilla
+
+        Parámetros
+        ----------
+        x_max : int
+            Ancho del dominio periódico
+        y_max : int
+            Alto del dominio periódico
+        tam : float
+            Tamaño mínimo de cada celda (por ejemplo, el umbral de contagio)
+        """
+        self.x_max = x_max
+        self.y_max = y_max
+        # Número de celdas por eje. Cada celda mide al menos tam para que
+        # basten las 8 celdas vecinas al buscar agentes a distancia tam
+        self.nx = max(1, int(x_max // tam)) if tam > 0 else 1
+        self.ny = max(1, int(y_max // tam)) if tam > 0 else 1
+        self.ancho = x_max / self.nx
+        self.alto = y_max / self.ny
+        self.celdas = {} # Diccionario celda -> lista de índices de agentes
+
+    def celda(self, x, y):
+        """Obtener la celda que contiene a la posición (x, y).
+
+        Parámetros
+        ----------
+        x : int
+            Coordenada x
+        y : int
+            Coordenada y
+
+        Retorna
+        -------
+        tuple
+            Índices (columna, fila) de la celda
+        """
+        return (int(x // self.ancho) % self.nx, int(y // self.alto) % self.ny)
+
+    def agregar(self, i, x, y):
+        """Agregar el agente i en la posición (x, y).
+
+        Parámetros
+        ----------
+        i : int
+            Índice del agente
+        x : int
+            Coordenada x
+        y : int
+            Coordenada y
+        """
+        self.celdas.setdefault(self.celda(x, y), []).append(i)
+
+    def quitar(self, i, x, y):
+        """Quitar el agente i registrado en la posición (x, y).
+
+        Parámetros
+        ----------
+        i : int
+            Índice del agente
+        x : int
+            Coordenada x con la que se agregó
+        y : int
+            Coordenada y con la que se agregó
+        """
+        self.celdas[self.celda(x, y)].remove(i)
+
+    def vecinos(self, x, y):
+        """Agentes en la celda de (x, y) y en sus 8 celdas vecinas.
+
+        Las celdas vecinas se calculan con las condiciones periódicas del dominio.
+
+        Parámetros
+        ----------
+        x : int
+            Coordenada x
+        y : int
+            Coordenada y
+
+        Retorna
+        -------
+        generator
+            Índices de los agentes candidatos
+        """
+        cx, cy = self.celda(x, y)
+        # Conjunto para no repetir celdas cuando la grilla tiene menos de 3 celdas por eje
+        visitadas = {((cx + dx) % self.nx, (cy + dy) % self.ny) for dx in (-1, 0, 1) for dy in (-1, 0, 1)}
+        for c in visitadas:
+            for i in self.celdas.get(c, ()):
+                yield i
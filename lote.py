@@ -0,0 +1,377 @@
+"""Ejecución de simulaciones sin interfaz gráfica.
+
+Recorre una grilla de parámetros, ejecuta varias réplicas de cada escenario en un
+grupo de procesos y guarda todas las series en un único archivo .npz. Con
+--agregar, las series no se guardan: cada réplica se resume al terminar en un
+agregador.Agregador por escenario, con memoria que no depende de las réplicas.
+
+Ejemplo::
+
+    python lote.py --poblacion 100 500 --porc-infectados 0.05 0.1 --replicas 20 --salida barrido.npz
+    python lote.py --poblacion 100 500 --replicas 10000 --agregar --salida resumen/
+"""
+import argparse
+import itertools
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from agregador import Agregador
+from aleatorio import SEMILLA
+from cache import Cache, clave
+from ensamble import Ensamble
+from simulacion import Simulacion
+from simulacion_np import SimulacionNP
+
+# Escenario por omisión, con los mismos valores que main.main
+ESCENARIO = {
+    "poblacion": 100,
+    "vacunas": 1,
+    "dias_simulacion": 2000,
+    "x_max": 788,
+    "y_max": 475,
+    "porc_infectados": 0.05,
+    "prob_vacuna": 1.0,
+    "prob_reb": 0.5,
+    "vel_per": 10,
+    "umb_col": 11,
+    "umb_con": 15,
+    "umb_vac": 30,
+    "saltar": False, # Avanzar de una vez los periodos sin infectados (ver Simulacion.saltar)
+    "contagio": "exacto", # "densidad" aproxima el contagio con un campo de densidad (solo motor "numpy")
+}
+
+# Parámetros que se pueden variar en un barrido
+PARAMETROS = ["poblacion", "porc_infectados", "prob_vacuna", "prob_reb", "umb_col", "umb_con", "umb_vac"]
+
+# Series que entrega cada simulación
+SERIES = ["sanos", "infectados", "recuperados", "inoculados"]
+
+def crear(escenario, semilla, replica=None, motor="python"):
+    """Crear la simulación de un escenario, con la vacuna en el centro como en el juego.
+
+    Parámetros
+    ----------
+    escenario : dict
+        Parámetros del escenario (ver ESCENARIO)
+    semilla : int
+        Semilla base
+    replica : int, opcional
+        Identificador de la réplica
+    motor : str, opcional
+        "python" para Simulacion o "numpy" para SimulacionNP, por omisión "python"
+
+    Retorna
+    -------
+    tuple
+        Simulación y parámetros de paso (vel_per, umb_col, umb_con, umb_vac y contagio si no es "exacto")
+    """
+    esc = dict(ESCENARIO, **escenario)
+    if esc["contagio"] != "exacto" and motor != "numpy":
+        raise ValueError("el contagio %r solo está disponible con el motor numpy" % esc["contagio"])
+    argumentos = (esc["poblacion"], esc["vacunas"], esc["dias_simulacion"], 0, esc["x_max"], 0, esc["y_max"])
+    opciones = dict(porc_infectados=esc["porc_infectados"], prob_vacuna=esc["prob_vacuna"], prob_reb=esc["prob_reb"])
+    clase = SimulacionNP if motor == "numpy" else Simulacion
+    sim = clase(*argumentos, semilla=semilla, replica=replica, **opciones)
+    # Posicion inicial vacuna, igual que en el juego
+    if esc["vacunas"] > 0:
+        sim.vacunas[0].x = esc["x_max"] // 2
+        sim.vacunas[0].y = esc["y_max"] // 2
+    parametros = {nombre: esc[nombre] for nombre in ("vel_per", "umb_col", "umb_con", "umb_vac")}
+    if esc["contagio"] != "exacto":
+        parametros["contagio"] = esc["contagio"]
+    return sim, parametros
+
+def ejecutar(escenario, semilla, replica=None, motor="python"):
+    """Ejecutar una simulación completa sin interfaz gráfica.
+
+    Parámetros
+    ----------
+    escenario : dict
+        Parámetros del escenario (ver ESCENARIO)
+    semilla : int
+        Semilla base
+    replica : int, opcional
+        Identificador de la réplica. El par (semilla, replica) reproduce la simulación
+    motor : str, opcional
+        "python" para Simulacion o "numpy" para SimulacionNP, por omisión "python"
+
+    Retorna
+    -------
+    numpy.ndarray
+        Arreglo de (4, dias_simulacion) con sanos, infectados, recuperados e inoculados
+    """
+    sim, parametros = crear(escenario, semilla, replica, motor)
+    sim.simular(saltar=dict(ESCENARIO, **escenario)["saltar"], **parametros)
+    return np.array([getattr(sim, serie) for serie in SERIES], dtype=np.int32)
+
+def ejecutar_ensamble(escenario, semilla, replicas):
+    """Ejecutar todas las réplicas de un escenario a la vez con Ensamble.
+
+    La réplica r es idéntica a ejecutar(escenario, semilla, r, motor="numpy").
+
+    Parámetros
+    ----------
+    escenario : dict
+        Parámetros del escenario (ver ESCENARIO)
+    semilla : int
+        Semilla base
+    replicas : int
+        Número de réplicas
+
+    Retorna
+    -------
+    numpy.ndarray
+        Arreglo de (replicas, 4, dias_simulacion) con sanos, infectados, recuperados e inoculados
+    """
+    esc = dict(ESCENARIO, **escenario)
+    if esc["saltar"]:
+        raise ValueError("el motor ensamble no avanza de una vez los periodos sin infectados")
+    if esc["contagio"] != "exacto":
+        raise ValueError("el motor ensamble solo tiene contagio exacto")
+    ens = Ensamble(esc["poblacion"], esc["vacunas"], esc["dias_simulacion"], 0, esc["x_max"], 0, esc["y_max"],
+        porc_infectados=esc["porc_infectados"], prob_vacuna=esc["prob_vacuna"], prob_reb=esc["prob_reb"],
+        replicas=replicas, semilla=semilla)
+    # Posicion inicial de la primera vacuna de cada réplica, igual que en el juego
+    if esc["vacunas"] > 0:
+        ens.vac_x[::esc["vacunas"]] = esc["x_max"] // 2
+        ens.vac_y[::esc["vacunas"]] = esc["y_max"] // 2
+    ens.simular(vel_per=esc["vel_per"], umb_col=esc["umb_col"], umb_con=esc["umb_con"], umb_vac=esc["umb_vac"])
+    return np.array([ens.serie(serie) for serie in SERIES], dtype=np.int32).transpose(1, 0, 2)
+
+def _ejecutar_tarea(tarea):
+    """Función auxiliar para el grupo de procesos"""
+    return ejecutar(*tarea)
+
+def _ejecutar_ensamble(tarea):
+    """Función auxiliar para el grupo de procesos"""
+    return ejecutar_ensamble(*tarea)
+
+def escenarios(grilla):
+    """Producto cartesiano de la grilla de parámetros.
+
+    Parámetros
+    ----------
+    grilla : dict
+        Diccionario parámetro -> lista de valores
+
+    Retorna
+    -------
+    list
+        Lista de diccionarios, uno por escenario
+    """
+    nombres = list(grilla)
+    return [dict(zip(nombres, valores)) for valores in itertools.product(*(grilla[n] for n in nombres))]
+
+def barrido(grilla, replicas=1, semilla=SEMILLA, procesos=None, salida=None, motor="python", fijos=None, cache=None):
+    """Ejecutar todas las réplicas de todos los escenarios de la grilla.
+
+    Parámetros
+    ----------
+    grilla : dict
+        Diccionario parámetro -> lista de valores
+    replicas : int, opcional
+        Número de réplicas por escenario, por omisión 1
+    semilla : int, opcional
+        Semilla base del barrido, por omisión 12345
+    procesos : int, opcional
+        Número de procesos, por omisión uno por núcleo
+    salida : str, opcional
+        Archivo .npz donde guardar los resultados
+    motor : str, opcional
+        "python", "numpy" o "ensamble" (todas las réplicas de un escenario a la vez,
+        con los mismos resultados que "numpy"), por omisión "python"
+    fijos : dict, opcional
+        Parámetros comunes a todos los escenarios
+    cache : cache.Cache, opcional
+        Cache de resultados. Solo se simulan las réplicas que no están guardadas
+
+    Retorna
+    -------
+    tuple
+        Lista de escenarios y arreglo de (escenarios, replicas, 4, dias) con las series
+    """
+    lista = [dict(fijos or {}, **esc) for esc in escenarios(grilla)]
+    resultados = [[None] * replicas for _ in lista]
+    if cache is not None:
+        # "ensamble" entrega los mismos resultados que "numpy", por lo que comparten las entradas
+        motor_cache = "numpy" if motor == "ensamble" else motor
+        claves = [[clave(dict(ESCENARIO, **esc), semilla, r, motor_cache) for r in range(replicas)] for esc in lista]
+        for e in range(len(lista)):
+            for r in range(replicas):
+                resultados[e][r] = cache.obtener(claves[e][r], guardar_indice=False)
+    faltan = [(e, r) for e in range(len(lista)) for r in range(replicas) if resultados[e][r] is None]
+
+    # La réplica r de cada escenario usa el flujo (semilla, r)
+    if motor == "ensamble":
+        funcion = _ejecutar_ensamble
+        pendientes = sorted({e for e, _ in faltan})
+        tareas = [(lista[e], semilla, replicas) for e in pendientes]
+    else:
+        funcion = _ejecutar_tarea
+        tareas = [(lista[e], semilla, r, motor) for e, r in faltan]
+    if tareas:
+        with ProcessPoolExecutor(max_workers=procesos) as grupo:
+            nuevos = list(grupo.map(funcion, tareas, chunksize=max(1, len(tareas) // (8 * (procesos or 8)))))
+        if motor == "ensamble":
+            for e, series in zip(pendientes, nuevos):
+                resultados[e] = list(series)
+        else:
+            for (e, r), serie in zip(faltan, nuevos):
+                resultados[e][r] = serie
+    if cache is not None:
+        for e, r in faltan:
+            cache.agregar(claves[e][r], resultados[e][r], dict(lista[e], semilla=semilla, replica=r, motor=motor_cache),
+                guardar_indice=False)
+        cache.guardar_indice()
+    series = np.array(resultados, dtype=np.int32).reshape(len(lista), replicas, len(SERIES), -1)
+    if salida is not None:
+        guardar(salida, lista, series, semilla)
+    return lista, series
+
+def barrido_agregado(grilla, replicas=1, semilla=SEMILLA, procesos=None, salida=None, motor="python", fijos=None,
+    cache=None, guardar_cada=100, pendientes_max=None):
+    """Ejecutar todas las réplicas de todos los escenarios de la grilla, resumiéndolas al terminar.
+
+    A diferencia de barrido, no se guardan las series: cada réplica se agrega a
+    un Agregador por escenario apenas termina y se descarta. Se envían al grupo
+    de procesos a lo más pendientes_max tareas a la vez, por lo que la memoria no
+    depende del número de réplicas.
+
+    Parámetros
+    ----------
+    grilla, replicas, semilla, procesos, motor, fijos, cache : opcional
+        Ver barrido
+    salida : str, opcional
+        Directorio donde guardar los agregadores (escenario_0.npz, ...). Se
+        guardan cada guardar_cada réplicas terminadas y al final, por lo que se
+        pueden leer con Agregador.cargar mientras el barrido sigue
+    guardar_cada : int, opcional
+        Réplicas entre guardados parciales, por omisión 100
+    pendientes_max : int, opcional
+        Tareas enviadas al grupo de procesos a la vez, por omisión dos por proceso
+
+    Retorna
+    -------
+    tuple
+        Lista de escenarios y lista de Agregador, uno por escenario
+    """
+    lista = [dict(fijos or {}, **esc) for esc in escenarios(grilla)]
+    agregadores = []
+    for esc in lista:
+        esc = dict(ESCENARIO, **esc)
+        agregadores.append(Agregador(esc["dias_simulacion"], esc["poblacion"]))
+    if salida is not None:
+        os.makedirs(salida, exist_ok=True)
+    motor_cache = "numpy" if motor == "ensamble" else motor
+
+    def guardar_agregadores():
+        if salida is not None:
+            for e, agregador in enumerate(agregadores):
+                agregador.guardar(os.path.join(salida, "escenario_%d.npz" % e))
+
+    # Réplicas en el cache y tareas pendientes
+    tareas = []
+    for e, esc in enumerate(lista):
+        faltan = []
+        for r in range(replicas):
+            serie = None
+            if cache is not None:
+                serie = cache.obtener(clave(dict(ESCENARIO, **esc), semilla, r, motor_cache), guardar_indice=False)
+            if serie is None:
+                faltan.append(r)
+            else:
+                agregadores[e].agregar(serie)
+        if motor == "ensamble" and faltan:
+            # Se simulan todas las réplicas del escenario aunque algunas estén en el cache
+            agregadores[e] = Agregador(agregadores[e].dias, agregadores[e].poblacion)
+            tareas.append((e, list(range(replicas)), (esc, semilla, replicas)))
+        else:
+            tareas.extend((e, [r], (esc, semilla, r, motor)) for r in faltan)
+    guardar_agregadores()
+
+    funcion = _ejecutar_ensamble if motor == "ensamble" else _ejecutar_tarea
+    pendientes_max = pendientes_max or 2 * (procesos or os.cpu_count() or 1)
+    terminadas = 0
+    if tareas:
+        with ProcessPoolExecutor(max_workers=procesos) as grupo:
+            tareas = iter(tareas)
+            enviadas = {}
+            while True:
+                for e, rs, tarea in itertools.islice(tareas, pendientes_max - len(enviadas)):
+                    enviadas[grupo.submit(funcion, tarea)] = (e, rs)
+                if not enviadas:
+                    break
+                listas, _ = wait(enviadas, return_when=FIRST_COMPLETED)
+                for futuro in listas:
+                    e, rs = enviadas.pop(futuro)
+                    series = futuro.result().reshape(len(rs), len(SERIES), -1)
+                    agregadores[e].agregar_lote(series)
+                    if cache is not None:
+                        for r, serie in zip(rs, series):
+                            cache.agregar(clave(dict(ESCENARIO, **lista[e]), semilla, r, motor_cache), serie,
+                                dict(lista[e], semilla=semilla, replica=r, motor=motor_cache), guardar_indice=False)
+                    if (terminadas + len(rs)) // guardar_cada > terminadas // guardar_cada:
+                        guardar_agregadores()
+                    terminadas += len(rs)
+    if cache is not None:
+        cache.guardar_indice()
+    guardar_agregadores()
+    return lista, agregadores
+
+def guardar(salida, lista, series, semilla):
+    """Guardar un barrido en un archivo .npz comprimido.
+
+    El archivo contiene un arreglo por parámetro (un valor por escenario), las
+    series de (escenarios, replicas, 4, dias) y la semilla base.
+    """
+    columnas = {nombre: np.array([dict(ESCENARIO, **esc)[nombre] for esc in lista]) for nombre in ESCENARIO}
+    np.savez_compressed(salida, series=series, nombres_series=np.array(SERIES), semilla=semilla, **columnas)
+
+def main():
+    parser = argparse.ArgumentParser(description="Barrido de parámetros sin interfaz gráfica")
+    for nombre in PARAMETROS:
+        tipo = int if isinstance(ESCENARIO[nombre], int) else float
+        parser.add_argument("--" + nombre.replace("_", "-"), type=tipo, nargs="+", default=[ESCENARIO[nombre]])
+    parser.add_argument("--vacunas", type=int, default=ESCENARIO["vacunas"])
+    parser.add_argument("--dias", type=int, default=ESCENARIO["dias_simulacion"])
+    parser.add_argument("--x-max", type=int, default=ESCENARIO["x_max"])
+    parser.add_argument("--y-max", type=int, default=ESCENARIO["y_max"])
+    parser.add_argument("--vel-per", type=int, default=ESCENARIO["vel_per"])
+    parser.add_argument("--saltar", action="store_true", help="avanzar de una vez los periodos sin infectados")
+    parser.add_argument("--replicas", type=int, default=1)
+    parser.add_argument("--semilla", type=int, default=SEMILLA)
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--motor", choices=["python", "numpy", "ensamble"], default="python")
+    parser.add_argument("--contagio", choices=["exacto", "densidad"], default=ESCENARIO["contagio"],
+        help="densidad: contagio aproximado con un campo de densidad (motor numpy)")
+    parser.add_argument("--salida", default=None, help="por omisión barrido.npz, o barrido/ con --agregar")
+    parser.add_argument("--cache", metavar="DIRECTORIO", help="directorio del cache de resultados")
+    parser.add_argument("--cache-mb", type=float, default=1024, help="tamaño máximo del cache en MB")
+    parser.add_argument("--agregar", action="store_true",
+        help="resumir las réplicas al terminar en vez de guardar sus series; --salida es un directorio")
+    parser.add_argument("--guardar-cada", type=int, default=100, help="réplicas entre guardados parciales con --agregar")
+    args = parser.parse_args()
+
+    grilla = {nombre: getattr(args, nombre) for nombre in PARAMETROS}
+    fijos = {"vacunas": args.vacunas, "dias_simulacion": args.dias, "x_max": args.x_max,
+        "y_max": args.y_max, "vel_per": args.vel_per, "saltar": args.saltar,
+        "contagio": args.contagio}
+    cache = Cache(args.cache, int(args.cache_mb * 2 ** 20)) if args.cache else None
+    if args.salida is None:
+        args.salida = "barrido" if args.agregar else "barrido.npz"
+    if args.agregar:
+        lista, agregadores = barrido_agregado(grilla, args.replicas, args.semilla, args.procesos, args.salida,
+            args.motor, fijos, cache, args.guardar_cada)
+        for esc, agregador in zip(lista, agregadores):
+            resumen = agregador.resumen()
+            print(esc, "pico medio %.1f, inmunidad en %d de %d réplicas" % (resumen["pico"]["media"],
+                resumen["inmunidad"]["replicas"], resumen["replicas"]))
+        print("%d resúmenes guardados en %s" % (len(lista), args.salida))
+        return
+    lista, series = barrido(grilla, args.replicas, args.semilla, args.procesos, args.salida, args.motor, fijos, cache)
+    print("%d escenarios x %d réplicas guardados en %s" % (len(lista), args.replicas, args.salida))
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,17 @@
+import argparse
+import atexit
+import os
 import sys
+import time
+import numpy as np
 import pygame
 from pygame.locals import *
 from simulacion import Simulacion
+from simulacion_np import SimulacionNP
+from grabacion import Grabadora, Reproduccion, arreglos
+from camara import Camara
+from proceso import SimulacionRemota
+from ramas import grilla, sugerir_vacuna
 
 # Colores utilizados en el juego #
 NEGRO    = (0, 0, 0)
@@ -28,15 +38,41 @@ ANCHO = XMAX - XMIN
 ALTO = YMAX - YMIN
  
 # Frames por segundo #
-FPS = 5
+FPS = 30
+
+# Pasos de simulación (12 horas) por segundo a velocidad 1x #
+TPS = 5
+
+# Velocidades de simulación. None avanza lo más rápido posible #
+VELOCIDADES = [1, 2, 4, 8, 16, 32, 64, None]
+
+# Máximo de cuadros seguidos sin dibujar cuando la simulación va atrasada #
+MAX_SALTOS = 5
+
+# Pixeles que se mueve la cámara con W, A, S y D #
+PASO_CAMARA = 4 * PIX
+
+# Lado en pixeles de las celdas del dibujo de densidad #
+CELDA_DENSIDAD = 4
+
+# Ticks y réplicas de las ramas de la sugerencia de vacuna (tecla V) #
+# Con 10 ticks y una réplica la sugerencia tarda unos 0,25 s en un núcleo con 100 personas
+TICKS_SUGERENCIA = 10
+REPLICAS_SUGERENCIA = 1
 
 # Radio de círculo #
 RADIO = 5
 
 # Imágenes #
-VACIMG = pygame.image.load('img/vaccine.png') # Vacuna
-PERIMG = pygame.image.load('img/person.png') # Personas
-BALDO = pygame.image.load('img/tile.png') # Baldosas
+IMG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'img') # Directorio de imágenes
+VACIMG = pygame.image.load(os.path.join(IMG, 'vaccine.png')) # Vacuna
+PERIMG = pygame.image.load(os.path.join(IMG, 'person.png')) # Personas
+BALDO = pygame.image.load(os.path.join(IMG, 'tile.png')) # Baldosas
+
+# Cache de dibujo. Guarda lo que no cambia entre cuadros #
+SPRITES = {} # Imagen de persona por color
+FUENTES = {} # Fuentes por (nombre, tamaño, negrita)
+FONDOS = {} # Baldosas compuestas en una sola superficie, por zoom
 
 def colorear(imagen, color):
     """Crea una copia de la imagen con el color especificado.
@@ -59,6 +95,79 @@ def colorear(imagen, color):
     return imagen
 
 
+def convertir(imagen):
+    """Convierte la imagen al formato de la pantalla, si ya existe una.
+
+    Parámetros
+    ----------
+    imagen : Imagen de Pygame
+        Imagen con transparencia
+
+    Retorna
+    -------
+    Imagen de Pygame
+        Imagen convertida, más rápida de dibujar
+    """
+    if pygame.display.get_surface() is None:
+        return imagen
+    return imagen.convert_alpha()
+
+def persona_coloreada(color):
+    """Imagen de persona del color especificado, creada una sola vez.
+
+    Parámetros
+    ----------
+    color : Color de Pygame
+        Color de la persona
+
+    Retorna
+    -------
+    Imagen de Pygame
+        Imagen coloreada guardada en SPRITES
+    """
+    imagen = SPRITES.get(color)
+    if imagen is None:
+        imagen = SPRITES[color] = convertir(colorear(PERIMG, color))
+    return imagen
+
+def fuente(nombre, tamano, negrita=False):
+    """Fuente del sistema, creada una sola vez.
+
+    Parámetros
+    ----------
+    nombre : str
+        Nombre de la fuente
+    tamano : int
+        Tamaño de la fuente
+    negrita : bool, opcional
+        Fuente en negrita, por omisión falso
+
+    Retorna
+    -------
+    Fuente de Pygame
+        Fuente guardada en FUENTES
+    """
+    clave = (nombre, tamano, negrita)
+    if clave not in FUENTES:
+        FUENTES[clave] = pygame.font.SysFont(nombre, tamano, bold=negrita)
+    return FUENTES[clave]
+
+def precargar():
+    """Crea las imágenes de cada estado, las fuentes y el fondo antes del primer cuadro.
+
+    Se debe llamar después de configurar la pantalla, para que las imágenes
+    queden en el formato de la pantalla.
+    """
+    global VACIMG
+    SPRITES.clear()
+    FONDOS.clear()
+    VACIMG = convertir(VACIMG)
+    for color in COLORES + [CYAN]:
+        persona_coloreada(color)
+    fuente("Arial", 11, True)
+    fuente("Arial", 12)
+    fondo_baldosas()
+
 def revisar_final():
     """Revisa si el juego se cierra."""
     for event in pygame.event.get(QUIT): # Obtener todos los eventos de tipo QUIT (cerrar)
@@ -111,26 +220,60 @@ def dibujar_persona(display, posicion, color):
     color : Color de Pygame
         Color utilizado para colorear a la persona
     """
-    display.blit(colorear(PERIMG, color), posicion)
+    display.blit(persona_coloreada(color), posicion)
+
+def fondo_baldosas(zoom=1):
+    """Superficie con baldosas para cubrir el área de juego con cualquier desplazamiento, creada una sola vez por zoom.
 
-def dibujar_baldosas(display):
-    """Dibuja las baldosas en la pantalla.
+    Cubre una baldosa más que el área de juego en cada eje, además de una fila
+    bajo YMAX, donde se dibujan las personas con y cercano a 0.
+
+    Parámetros
+    ----------
+    zoom : float, opcional
+        Pixeles por unidad del mundo (ver camara.ZOOMS), por omisión 1
+
+    Retorna
+    -------
+    Imagen de Pygame
+        Fondo guardado en FONDOS
+    """
+    if zoom not in FONDOS:
+        lado = max(1, round(PIX * zoom)) # Lado de cada baldosa
+        baldosa = BALDO if lado == PIX else pygame.transform.scale(BALDO, (lado, lado))
+        fil = (ALTO + PIX) // lado + 2 # Número de filas
+        col = ANCHO // lado + 2 # Número de columnas
+        fondo = pygame.Surface((col * lado, fil * lado), pygame.SRCALPHA)
+        for i in range(fil):
+            for j in range(col):
+                fondo.blit(baldosa, (j * lado, i * lado))
+        FONDOS[zoom] = convertir(fondo)
+    return FONDOS[zoom]
+
+def dibujar_baldosas(display, camara=None):
+    """Dibuja las baldosas visibles en la pantalla.
+
+    Las baldosas quedan fijas en el mundo, por lo que se desplazan con la
+    cámara. Cuesta un solo blit del tamaño del área de juego, sin importar el
+    tamaño del mundo.
 
     Parámetros
     ----------
     display : Pantalla de Pygame
         Pantalla donde se dibujarán las baldosas
+    camara : Camara, opcional
+        Vista del mundo, por omisión el mundo desde el origen sin zoom
     """
-    fil = ALTO // PIX + 1 # Número de filas
-    col = ANCHO // PIX # Número de columnas
-    posy = 0
-    # Dibujar las baldosas en el área de juego
-    for i in range(fil):
-        posx = 0
-        for j in range(col):
-            display.blit(BALDO, (posx + XMIN, posy + YMIN))
-            posx += PIX
-        posy += PIX
+    if camara is None:
+        display.blit(fondo_baldosas(), (XMIN, YMIN), pygame.Rect(0, 0, ANCHO, ALTO + PIX))
+        return
+    if camara.densidad_activa():
+        return # El dibujo de densidad cubre el área de juego
+    lado = max(1, round(PIX * camara.zoom))
+    # Desplazamiento de la primera baldosa visible, con los bordes de baldosa en múltiplos de PIX del mundo
+    dx = round(camara.x * camara.zoom) % lado
+    dy = round(YMIN - YMAX - camara.y * camara.zoom) % lado
+    display.blit(fondo_baldosas(camara.zoom), (XMIN, YMIN), pygame.Rect(dx, dy, ANCHO, ALTO + PIX))
 
 def plot(display, personas, vacunas):
     """Dibujar los agentes de la simulación.
@@ -144,17 +287,170 @@ def plot(display, personas, vacunas):
     vacunas : list
         Lista de vacunas
     """
+    # Imagen de cada estado y de las personas vacunadas
+    imagenes = [persona_coloreada(color) for color in COLORES]
+    vacunado = persona_coloreada(CYAN)
     # Dibujar personas
+    dibujos = []
     for persona in personas:
         if persona.inoculacion > 0 and persona.estado != 1: # Persona vacunada
-            dibujar_persona(display, pos(persona.x, persona.y), CYAN) 
+            dibujos.append((vacunado, pos(persona.x, persona.y)))
         else:
-            dibujar_persona(display, pos(persona.x, persona.y), COLORES[persona.estado])
+            dibujos.append((imagenes[persona.estado], pos(persona.x, persona.y)))
+    display.blits(dibujos, doreturn=False)
     # Dibujar vacunas
     for vacuna in vacunas:
         dibujar_vacuna(display, pos(vacuna.x, vacuna.y))
 
-def contador(display, sim, d):
+def plot_cuadro(display, cuadro, camara=None):
+    """Dibujar los agentes de un cuadro de una grabación.
+
+    Parámetros
+    ----------
+    display : Pantalla de Pygame
+        Pantalla donde se dibujarán los agentes
+    cuadro : numpy.void
+        Cuadro de grabacion.Reproduccion
+    camara : Camara, opcional
+        Vista del mundo, por omisión el mundo desde el origen sin zoom
+    """
+    personas = cuadro["personas"]
+    vacunas = cuadro["vacunas"]
+    plot_arreglos(display, personas["x"], personas["y"], personas["estado"], personas["inoculacion"],
+        vacunas["x"], vacunas["y"], camara)
+
+def plot_sim(display, sim, camara=None):
+    """Dibujar los agentes de una simulación (Simulacion o SimulacionNP) vistos por la cámara.
+
+    Parámetros
+    ----------
+    display : Pantalla de Pygame
+        Pantalla donde se dibujarán los agentes
+    sim : Simulacion o SimulacionNP
+        Simulación
+    camara : Camara, opcional
+        Vista del mundo, por omisión el mundo desde el origen sin zoom
+    """
+    plot_arreglos(display, *arreglos(sim), camara)
+
+def plot_arreglos(display, x, y, estado, inoculacion, vac_x, vac_y, camara=None):
+    """Dibujar los agentes visibles a partir de arreglos de posiciones y estados.
+
+    Solo se dibujan las imágenes de los agentes que quedan en el área de juego.
+    Con zoom lejano (ver Camara.densidad_activa) se dibuja en cambio la densidad
+    de personas por celda, con el color promedio de sus estados. Las vacunas se
+    dibujan siempre con su imagen.
+
+    Parámetros
+    ----------
+    display : Pantalla de Pygame
+        Pantalla donde se dibujarán los agentes
+    x, y, estado, inoculacion : array_like
+        Posición, estado e inoculacion de cada persona
+    vac_x, vac_y : array_like
+        Posición de cada vacuna
+    camara : Camara, opcional
+        Vista del mundo, por omisión el mundo desde el origen sin zoom
+    """
+    if camara is None:
+        camara = Camara(ANCHO, ALTO, ANCHO, ALTO, XMIN, YMAX)
+    imagenes = [persona_coloreada(color) for color in COLORES] + [persona_coloreada(CYAN)]
+    estado = np.asarray(estado)
+    # Índice de la imagen de cada persona: su estado, o 3 si está vacunada y no infectada
+    vacunado = (np.asarray(inoculacion) > 0) & (estado != 1)
+    clase = np.where(vacunado, 3, estado)
+    # Recortar las imágenes que quedan en parte fuera del área de juego (con la fila bajo YMAX del fondo)
+    recorte = display.get_clip()
+    display.set_clip(pygame.Rect(XMIN, YMIN, ANCHO, ALTO + PIX))
+    if camara.densidad_activa():
+        dibujar_densidad(display, camara.densidad(x, y, clase, len(imagenes), CELDA_DENSIDAD))
+    else:
+        visibles, px, py = camara.visibles(x, y, *PERIMG.get_size())
+        imagen = clase[visibles].tolist()
+        display.blits([(imagenes[k], (i, j)) for k, i, j in zip(imagen, px.tolist(), py.tolist())], doreturn=False)
+    visibles, px, py = camara.visibles(vac_x, vac_y, *VACIMG.get_size())
+    for i, j in zip(px.tolist(), py.tolist()):
+        dibujar_vacuna(display, (i, j))
+    display.set_clip(recorte)
+
+def dibujar_sugerencia(display, posicion, camara, radio):
+    """Dibuja un círculo en la posición sugerida para la vacuna (ver ramas.sugerir_vacuna).
+
+    Parámetros
+    ----------
+    display : Pantalla de Pygame
+        Pantalla donde se dibujará la sugerencia
+    posicion : tuple
+        Posición sugerida en el mundo
+    camara : Camara
+        Vista del mundo
+    radio : float
+        Radio del círculo en el mundo (el umbral de vacunación)
+    """
+    px, py = camara.a_pantalla(*posicion)
+    centro = (int(px) + VACIMG.get_width() // 2, int(py) + VACIMG.get_height() // 2)
+    recorte = display.get_clip()
+    display.set_clip(pygame.Rect(XMIN, YMIN, ANCHO, ALTO + PIX))
+    pygame.draw.circle(display, CYAN, centro, max(int(radio * camara.zoom), RADIO), width=2)
+    display.set_clip(recorte)
+
+def dibujar_densidad(display, conteos):
+    """Dibuja la densidad de personas en el área de juego.
+
+    Cada celda toma el color promedio de sus personas (ver COLORES y CYAN),
+    mezclado con el color medio de las baldosas según el logaritmo del número
+    de personas, relativo a la celda más poblada.
+
+    Parámetros
+    ----------
+    display : Pantalla de Pygame
+        Pantalla donde se dibujará la densidad
+    conteos : numpy.ndarray
+        Personas de cada clase por celda (ver Camara.densidad)
+    """
+    colores = np.array(COLORES + [CYAN], dtype=float)
+    total = conteos.sum(axis=2)
+    mezcla = conteos @ colores / np.maximum(total, 1)[..., None]
+    alfa = np.log1p(total) / np.log1p(max(total.max(), 1))
+    fondo = np.array(pygame.transform.average_color(BALDO)[:3], dtype=float)
+    rgb = fondo + (mezcla - fondo) * alfa[..., None]
+    superficie = pygame.surfarray.make_surface(rgb.astype(np.uint8))
+    superficie = pygame.transform.scale(superficie, (conteos.shape[0] * CELDA_DENSIDAD, conteos.shape[1] * CELDA_DENSIDAD))
+    display.blit(superficie, (XMIN, YMIN), pygame.Rect(0, 0, ANCHO, ALTO))
+
+def mover_camara(camara, event):
+    """Mover la cámara según un evento de pygame.
+
+    La rueda del mouse (o Z y X) acerca y aleja alrededor del puntero, y
+    W, A, S y D desplazan la vista.
+
+    Parámetros
+    ----------
+    camara : Camara
+        Cámara del juego
+    event : Evento de Pygame
+        Evento a revisar
+
+    Retorna
+    -------
+    boolean
+        Verdadero si el evento era de la cámara
+    """
+    if event.type == MOUSEWHEEL:
+        camara.acercar(event.y, *pygame.mouse.get_pos())
+    elif event.type in (MOUSEBUTTONDOWN, MOUSEBUTTONUP) and event.button in (4, 5):
+        pass # La rueda también genera clics de los botones 4 y 5
+    elif event.type == KEYDOWN and event.key in (pygame.K_z, pygame.K_x):
+        camara.acercar(1 if event.key == pygame.K_z else -1)
+    elif event.type == KEYDOWN and event.key in (pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d):
+        dx = {pygame.K_a: -PASO_CAMARA, pygame.K_d: PASO_CAMARA}.get(event.key, 0)
+        dy = {pygame.K_s: -PASO_CAMARA, pygame.K_w: PASO_CAMARA}.get(event.key, 0)
+        camara.mover(dx, dy)
+    else:
+        return False
+    return True
+
+def contador(display, sim, d, velocidad=None):
     """Generar el contador con estadísticas y mensajes del juego
 
     Parámetros
@@ -163,10 +459,14 @@ def contador(display, sim, d):
         Pantalla donde se dibujará el contador
     sim : Simulacion
         Objeto simulación con toda la información necesaria
+    d : int
+        Pasos de 12 horas simulados
+    velocidad : int, opcional
+        Velocidad de simulación a mostrar. 0 indica la máxima
     """
     # Fuentes utilizadas
-    font_1 = pygame.font.SysFont("Arial", 11, bold=True)
-    font_2 = pygame.font.SysFont("Arial", 12)
+    font_1 = fuente("Arial", 11, True)
+    font_2 = fuente("Arial", 12)
     # Marco
     pygame.draw.rect(display, NEGRO, pygame.Rect(XMAX + 25, YMIN , 120, 100), width=1)
     # Titulo
@@ -194,30 +494,241 @@ def contador(display, sim, d):
     # Días de simulación
     label = font_2.render("Día: " + str(d / 2), 1, NEGRO)
     display.blit(label, (XMAX + 42, YMIN + 100))
+    # Velocidad de simulación
+    if velocidad is not None:
+        texto = "máx" if velocidad == 0 else str(velocidad) + "x"
+        label = font_2.render("Velocidad: " + texto, 1, NEGRO)
+        display.blit(label, (XMAX + 42, YMIN + 115))
+
+class Curva:
+    """Clase para la curva epidémica apilada del panel, con una columna por tick.
+
+    Guarda el gráfico en una superficie y en cada cuadro solo dibuja las
+    columnas de los ticks nuevos, desplazando el gráfico a la izquierda cuando
+    se llena, por lo que el costo por cuadro no depende de la duración de la
+    partida ni de la velocidad (a lo más se dibuja el ancho del gráfico). La
+    suma de infectados, sanos y recuperados es la población, por lo que la
+    escala vertical es fija y nunca hay que redibujar lo anterior.
+    """
+
+    def __init__(self, ancho=118, alto=60):
+        """Constructor de la curva
+
+        Parámetros
+        ----------
+        ancho : int, opcional
+            Ancho del gráfico en pixeles (ticks visibles), por omisión 118
+        alto : int, opcional
+            Alto del gráfico en pixeles, por omisión 60
+        """
+        self.ancho = ancho
+        self.alto = alto
+        self.superficie = pygame.Surface((ancho, alto))
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Borrar el gráfico"""
+        self.superficie.fill(BLANCO)
+        self.n = 0 # Ticks dibujados
+        self.columna = 0 # Columna donde se dibuja el siguiente tick
+
+    def actualizar(self, origen, n):
+        """Dibujar las columnas de los ticks nuevos.
+
+        Parámetros
+        ----------
+        origen : Simulacion, SimulacionRemota o Reproduccion
+            Objeto con las series sanos, infectados y recuperados. Si solo tiene
+            el último valor (SimulacionRemota), se repite en los ticks que faltan
+        n : int
+            Ticks transcurridos. Si es menor que los ya dibujados (por ejemplo, al
+            retroceder una reproducción) se vuelve a dibujar desde el principio
+        """
+        if n < self.n:
+            self.reiniciar()
+        nuevos = n - self.n
+        if nuevos <= 0:
+            return
+        inicio = max(self.n, n - self.ancho) # Ticks que quedan a la vista
+        series = []
+        for serie in (origen.infectados, origen.sanos, origen.recuperados):
+            if len(serie) >= n:
+                series.append(np.asarray(serie[inicio:n], dtype=float))
+            else:
+                series.append(np.full(n - inicio, float(serie[-1]) if len(serie) else 0.0))
+        infectados, sanos, recuperados = series
+        total = np.maximum(infectados + sanos + recuperados, 1)
+        # Alturas acumuladas desde abajo: infectados, sanos y recuperados
+        h_inf = np.rint(infectados / total * self.alto).astype(int)
+        h_san = np.rint((infectados + sanos) / total * self.alto).astype(int)
+        altura = np.arange(self.alto)[::-1] # Altura de cada fila del gráfico, desde abajo
+        clase = np.where(altura[None, :] < h_inf[:, None], 0, np.where(altura[None, :] < h_san[:, None], 1, 2))
+        columnas = np.array([ROJO, VERDE, AZUL], dtype=np.uint8)[clase]
+        # Desplazar el gráfico si las columnas nuevas no caben
+        if self.columna + len(columnas) > self.ancho:
+            desplazamiento = self.columna + len(columnas) - self.ancho
+            self.superficie.scroll(-desplazamiento, 0)
+            self.columna -= desplazamiento
+        self.superficie.blit(pygame.surfarray.make_surface(columnas), (self.columna, 0))
+        self.columna += len(columnas)
+        self.n = n
+
+def panel_curva(display, grafico, origen, n):
+    """Generar el panel con la curva epidémica, bajo el panel de rendimiento
+
+    Parámetros
+    ----------
+    display : Pantalla de Pygame
+        Pantalla donde se dibujará el panel
+    grafico : Curva
+        Curva del panel, que se actualiza con los ticks nuevos
+    origen : Simulacion, SimulacionRemota o Reproduccion
+        Objeto con las series (ver Curva.actualizar)
+    n : int
+        Ticks transcurridos
+    """
+    grafico.actualizar(origen, n)
+    pygame.draw.rect(display, NEGRO, pygame.Rect(XMAX + 25, YMIN + 245, 120, 76), width=1)
+    display.blit(fuente("Arial", 11, True).render("CURVA", 1, NEGRO), (XMAX + 27, YMIN + 245))
+    display.blit(grafico.superficie, (XMAX + 26, YMIN + 260))
+
+def rendimiento(display, perfil, ticks_s, cuadro, dibujo):
+    """Generar el panel de rendimiento, bajo el contador
+
+    Parámetros
+    ----------
+    display : Pantalla de Pygame
+        Pantalla donde se dibujará el panel
+    perfil : Perfil
+        Perfil activo de la simulación
+    ticks_s : float
+        Pasos de simulación por segundo
+    cuadro : float
+        Segundos por cuadro
+    dibujo : float
+        Segundos de dibujo por cuadro
+    """
+    font_1 = fuente("Arial", 11, True)
+    font_2 = fuente("Arial", 12)
+    pygame.draw.rect(display, NEGRO, pygame.Rect(XMAX + 25, YMIN + 150, 120, 85), width=1)
+    display.blit(font_1.render("RENDIMIENTO", 1, NEGRO), (XMAX + 27, YMIN + 150))
+    fase, segundos = perfil.mas_lenta()
+    lineas = [
+        "Ticks/s: %.1f" % ticks_s,
+        "Cuadro: %.1f ms" % (cuadro * 1e3),
+        "Dibujo: %.1f ms" % (dibujo * 1e3),
+        "Lenta: %s" % (fase or "-"),
+        "       %.2f ms" % (segundos * 1e3),
+    ]
+    for k, linea in enumerate(lineas):
+        display.blit(font_2.render(linea, 1, NEGRO), (XMAX + 30, YMIN + 166 + 13 * k))
 
 def final(display, motivo):
-    font = pygame.font.SysFont("Arial", 11, bold=True)
+    font = fuente("Arial", 11, True)
     if motivo == 1:
         mensaje = "INMUNIDAD ALCANZADA"
+    elif motivo == 3:
+        mensaje = "EPIDEMIA CONTROLADA"
     else:
         mensaje = "SIMULACIÓN TERMINADA"
     label = font.render(mensaje, 1, NEGRO)
     display.blit(label, (XMAX + 20, YMIN + 130))
 
-# Función principal #
-def main():
-    global FPSCLOCK, DISPLAY, BASICFONT # Variables de PyGame
-    game_over = False # Variable para terminar el juego
+def motivo_fin(sim, d):
+    """Motivo por el que terminó el juego (ver final).
 
-    # Configuración PyGame #
-    pygame.init() 
-    FPSCLOCK = pygame.time.Clock() # Reloj del juego
-    DISPLAY = pygame.display.set_mode((0, 0), pygame.FULLSCREEN) # Configurar pantalla
-    BASICFONT = pygame.font.Font('freesansbold.ttf', 16) # Tipografía
-    pygame.display.set_caption('Videojuégatela por la Inmunidad - STEM 2021') # Título de la ventana
+    Parámetros
+    ----------
+    sim : Simulacion
+        Objeto simulación
+    d : int
+        Pasos de 12 horas simulados
+
+    Retorna
+    -------
+    int
+        0 si sigue, 1 si se alcanzó la inmunidad, 3 si las estadísticas ya no
+        pueden cambiar (sin infectados, sin nadie más que vacunar y sin rebrotes
+        posibles, ver Simulacion.terminada) y 2 si se cumplieron los días
+    """
+    if sim.inmunidad_alcanzada():
+        return 1
+    if sim.terminada():
+        return 3
+    if d >= sim.dias_simulacion:
+        return 2
+    return 0
+
+def terminada(sim, d):
+    """Indica si el juego terminó: se cumplieron los días de simulación, se alcanzó la
+    inmunidad o las estadísticas ya no pueden cambiar (ver motivo_fin).
 
-    # Personas en la simulacion
-    poblacion = 100
+    Parámetros
+    ----------
+    sim : Simulacion
+        Objeto simulación
+    d : int
+        Pasos de 12 horas simulados
+
+    Retorna
+    -------
+    boolean
+        Verdadero si no se debe seguir simulando
+    """
+    return motivo_fin(sim, d) > 0
+
+def dibujar_juego(display, sim, d, camara=None, velocidad=None, grafico=None):
+    """Dibujar un cuadro del juego en una pantalla o en cualquier superficie de pygame.
+
+    Parámetros
+    ----------
+    display : Pantalla o superficie de Pygame
+        Superficie donde se dibujará el cuadro
+    sim : Simulacion o SimulacionNP
+        Objeto simulación
+    d : int
+        Pasos de 12 horas simulados
+    camara : Camara, opcional
+        Vista del mundo, por omisión el mundo desde el origen sin zoom
+    velocidad : int, opcional
+        Velocidad de simulación a mostrar (ver contador)
+    grafico : Curva, opcional
+        Curva epidémica del panel. Sin curva no se dibuja el panel
+    """
+    # Pantalla blanca
+    display.fill(BLANCO)
+
+    # Dibujar el fondo con baldosas
+    dibujar_baldosas(display, camara)
+
+    # Contador estadísticas
+    contador(display, sim, d, velocidad)
+    if grafico is not None:
+        panel_curva(display, grafico, sim, d)
+
+    motivo = motivo_fin(sim, d)
+    if motivo: # Sin sanos ni infectados, sin cambios posibles o con los días cumplidos
+        final(display, motivo)
+
+    plot_sim(display, sim, camara) # Dibujar a los agentes visibles
+
+def crear_simulacion(poblacion=100, mundo=None, motor="python"):
+    """Simulación del juego, con la vacuna en el centro.
+
+    Parámetros
+    ----------
+    poblacion : int, opcional
+        Personas en la simulación, por omisión 100
+    mundo : tuple, opcional
+        Ancho y alto del mundo. Por omisión, el tamaño del área de juego
+    motor : str, opcional
+        "python" (Simulacion) o "numpy" (SimulacionNP), por omisión "python"
+
+    Retorna
+    -------
+    tuple
+        Simulación, parámetros de paso (vel_per, umb_col, umb_con, umb_vac) y velocidad de la vacuna
+    """
     # Vacunas disponible en el juego
     vacunas = 1
     # Dias de simulacion
@@ -227,6 +738,8 @@ def main():
     x_max = ANCHO - 12 # Ancho del juego - corrección tamaño de persona
     y_min = 0
     y_max = ALTO - 5
+    if mundo is not None: # Mundo independiente de la pantalla, visto con la cámara
+        x_max, y_max = mundo
     # Porcentaje inicial de infectados
     porcentaje_infectados = 0.05
     # Probabilidad de que una persona se vacune
@@ -244,38 +757,94 @@ def main():
     # Umbral vacuna
     umb_vac = vel_vac + 20
     # Objeto de simulación
-    sim = Simulacion(poblacion, vacunas, dias_simulacion, x_min, x_max, y_min, y_max, 
+    clase = SimulacionNP if motor == "numpy" else Simulacion
+    sim = clase(poblacion, vacunas, dias_simulacion, x_min, x_max, y_min, y_max, 
         porc_infectados=porcentaje_infectados, prob_vacuna=probabilidad_vacuna, prob_reb=probabilidad_rebrote)
-    # 12 horas de simulacion
-    d = 0 
     # Posicion inicial vacuna 
     sim.vacunas[0].x = x_max // 2
     sim.vacunas[0].y = y_max // 2
+    parametros = {"vel_per": vel_per, "umb_col": umb_col, "umb_con": umb_con, "umb_vac": umb_vac}
+    return sim, parametros, vel_vac
 
-    # Ciclo principal del juego. 
-    while not game_over:
+def iniciar_pantalla():
+    """Configurar PyGame, la pantalla y las imágenes en cache"""
+    global FPSCLOCK, DISPLAY, BASICFONT # Variables de PyGame
+    pygame.init() 
+    FPSCLOCK = pygame.time.Clock() # Reloj del juego
+    DISPLAY = pygame.display.set_mode((0, 0), pygame.FULLSCREEN) # Configurar pantalla
+    BASICFONT = pygame.font.Font('freesansbold.ttf', 16) # Tipografía
+    pygame.display.set_caption('Videojuégatela por la Inmunidad - STEM 2021') # Título de la ventana
+    precargar() # Imágenes, fuentes y fondo en cache
 
-        # Pantalla blanca
-        DISPLAY.fill(BLANCO)
+# Función principal #
+def main(grabar=None, poblacion=100, mundo=None, motor="python"):
+    """Juego interactivo.
 
-        # Dibujar el fondo con baldosas
-        dibujar_baldosas(DISPLAY)
+    Parámetros
+    ----------
+    grabar : str, opcional
+        Archivo donde grabar cada paso de la simulación (ver grabacion)
+    poblacion, mundo, motor : opcional
+        Escenario del juego (ver crear_simulacion)
+    """
+    game_over = False # Variable para terminar el juego
 
-        # Contador estadísticas
-        contador(DISPLAY, sim, d)
+    # Configuración PyGame #
+    iniciar_pantalla()
+
+    # Objeto de simulación y parámetros de cada paso
+    sim, parametros, vel_vac = crear_simulacion(poblacion, mundo, motor)
+    # Vista del mundo, inicialmente centrada en la vacuna
+    camara = Camara(ANCHO, ALTO, sim.x_max, sim.y_max, XMIN, YMAX)
+    camara.centrar(sim.vacunas[0].x, sim.vacunas[0].y)
+    # 12 horas de simulacion
+    d = 0 
+    # Grabación de la partida
+    grabadora = None
+    if grabar is not None:
+        grabadora = Grabadora(grabar, sim)
+        atexit.register(grabadora.cerrar) # El juego termina con sys.exit
+        grabadora.grabar(sim)
+
+    # Velocidad de simulación (índice en VELOCIDADES)
+    velocidad = 0
+    # Curva epidémica del panel, dibujada de a un tick
+    grafico = Curva()
+    # Pasos de simulación pendientes
+    acumulado = 0.0
+    # Cuadros seguidos sin dibujar
+    saltados = 0
+    # Tiempo máximo de simulación por cuadro
+    presupuesto = 1 / FPS
+    # Panel de rendimiento (tecla F3). Sin panel no se mide nada
+    perfil = None
+    # Posición sugerida para la vacuna (tecla V) y tick hasta el que se muestra
+    sugerencia = None
+    fin_sugerencia = 0
+    ticks_s = 0.0 # Pasos por segundo, promedio móvil
+    cuadro = 0.0 # Segundos por cuadro, promedio móvil
+    dibujo = 0.0 # Segundos de dibujo por cuadro, promedio móvil
+    t_medido, d_medido = time.perf_counter(), 0 # Último cuadro dibujado
+
+    # Ciclo principal del juego. 
+    while not game_over:
 
         # Revisar si se cierra el juego #
         revisar_final()
 
         # Consultar eventos de pygame (clic o teclas) #
         for event in pygame.event.get():
+            # Zoom y desplazamiento de la cámara
+            if mover_camara(camara, event):
+                continue
             # Mover la vacuna utilizando el mouse
             if event.type == MOUSEBUTTONUP:
                 mousex, mousey = event.pos
                 # Validar que el clic se realice en el área de juego
                 if mousex >= XMIN and mousex <= XMAX and mousey >= YMIN and mousey <= YMAX:
-                    sim.vacunas[0].x = mousex - XMIN
-                    sim.vacunas[0].y = YMAX - mousey
+                    x, y = camara.a_mundo(mousex, mousey) # Posición en el mundo
+                    sim.vacunas[0].x = int(x)
+                    sim.vacunas[0].y = int(y)
             # Mover vacuna utilizando el teclado
             elif event.type == KEYDOWN:
                 if event.key == pygame.K_LEFT: # Tecla izquierda
@@ -290,25 +859,223 @@ def main():
                 elif event.key == pygame.K_DOWN: # Tecla abajo
                     sim.vacunas[0].y -= vel_vac # Mover vacuna abajo
                     sim.vacunas[0].y %= sim.y_max # Restringir la posición a los límites del mundo
+                elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS): # Tecla +
+                    velocidad = min(velocidad + 1, len(VELOCIDADES) - 1) # Simular más rápido
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS): # Tecla -
+                    velocidad = max(velocidad - 1, 0) # Simular más lento
+                elif event.key == pygame.K_c: # Tecla C
+                    camara.centrar(sim.vacunas[0].x, sim.vacunas[0].y) # Centrar la cámara en la vacuna
+                elif event.key == pygame.K_v: # Tecla V
+                    # Comparar ramas cortas con la vacuna en una grilla sobre la vista
+                    ancho, alto = camara.vista()
+                    candidatos = grilla(camara.x, camara.y, min(ancho, sim.x_max), min(alto, sim.y_max))
+                    x, y, _ = sugerir_vacuna(sim, parametros, candidatos, TICKS_SUGERENCIA, REPLICAS_SUGERENCIA)
+                    sugerencia = (x, y)
+                    fin_sugerencia = d + TICKS_SUGERENCIA
+                    FPSCLOCK.tick() # No contar la espera como tiempo de simulación
+                elif event.key == pygame.K_F3: # Tecla F3
+                    if perfil is None: # Mostrar el panel de rendimiento
+                        perfil = sim.perfilar()
+                    else: # Ocultarlo y dejar de medir
+                        perfil.desactivar()
+                        perfil = None
 
-        if d < sim.dias_simulacion: # Verificar dias de simulación
-            # Etapas de simulación #
-            sim.mover_personas(vel_per, umb_col) # Movimiento aleatorio de personas
-            sim.revisar_contagio(umb_con) # Simular el contagio
-            sim.revisar_vacunacion(umb_vac) # Simular el proceso de vacunación
-            sim.estadisticas() # Obtención de estadísticas
+        # Avance de la simulación con paso de tiempo fijo #
+        # Se acumula el tiempo transcurrido y se simulan los pasos que correspondan,
+        # sin ocupar más que el presupuesto de tiempo de un cuadro
+        inicio = time.perf_counter()
+        factor = VELOCIDADES[velocidad]
+        if factor is None: # Lo más rápido posible
+            acumulado = sim.dias_simulacion - d
+        else:
+            acumulado += FPSCLOCK.get_time() / 1000 * TPS * factor
+        while acumulado >= 1 and not terminada(sim, d) and time.perf_counter() - inicio < presupuesto:
+            sim.paso(**parametros) # Movimiento, contagio, vacunación y estadísticas
             d += 1 # Siguientes 12 horas de simulación
-        elif sim.sanos == 0 and sim.infectados == 0: # Detener simulación cuando no queden sanos ni infectados
-            final(DISPLAY, 1)
-        else: # Detener la simulación cuando se alcancen los días definidos
-            final(DISPLAY, 2)
+            if grabadora is not None:
+                grabadora.grabar(sim)
+            acumulado -= 1
+        if factor is None:
+            acumulado = 0.0
+
+        # Si la simulación va atrasada se salta el dibujo de algunos cuadros para alcanzarla.
+        # Después de MAX_SALTOS cuadros se descarta el atraso
+        if acumulado >= 1 and not terminada(sim, d):
+            if saltados < MAX_SALTOS:
+                saltados += 1
+                FPSCLOCK.tick()
+                continue
+            acumulado = min(acumulado, 1.0)
+        saltados = 0
+
+        # Promedios móviles del panel de rendimiento, entre cuadros dibujados
+        inicio_dibujo = time.perf_counter()
+        if perfil is not None:
+            segundos = inicio_dibujo - t_medido
+            ticks_s += 0.1 * ((d - d_medido) / segundos - ticks_s)
+            cuadro += 0.1 * (segundos - cuadro)
+        t_medido, d_medido = inicio_dibujo, d
+
+        # Fondo, contador, mensaje final y agentes
+        dibujar_juego(DISPLAY, sim, d, camara, factor or 0, grafico)
 
-        plot(DISPLAY, sim.personas, sim.vacunas) # Dibujar a los agentes
+        # Posición sugerida, hasta que se ubique ahí la vacuna o pase el horizonte de las ramas
+        if sugerencia == (sim.vacunas[0].x, sim.vacunas[0].y) or d >= fin_sugerencia:
+            sugerencia = None
+        if sugerencia is not None:
+            dibujar_sugerencia(DISPLAY, sugerencia, camara, parametros["umb_vac"])
+
+        # Panel de rendimiento
+        if perfil is not None:
+            rendimiento(DISPLAY, perfil, ticks_s, cuadro, dibujo)
 
         # Actualizacion de pantalla #
         pygame.display.update() 
+        if perfil is not None:
+            dibujo += 0.1 * (time.perf_counter() - inicio_dibujo - dibujo)
         FPSCLOCK.tick(FPS) 
 
+def main_proceso(poblacion=100, mundo=None, motor="python"):
+    """Juego interactivo con la simulación en un proceso aparte (ver proceso).
+
+    El proceso principal solo dibuja el último cuadro completo y envía los
+    movimientos de la vacuna y los cambios de velocidad, por lo que un paso
+    lento no congela el dibujo ni la entrada.
+
+    Parámetros
+    ----------
+    poblacion, mundo, motor : opcional
+        Escenario del juego (ver crear_simulacion)
+    """
+    iniciar_pantalla()
+    sim, parametros, vel_vac = crear_simulacion(poblacion, mundo, motor)
+    camara = Camara(ANCHO, ALTO, sim.x_max, sim.y_max, XMIN, YMAX)
+    camara.centrar(sim.vacunas[0].x, sim.vacunas[0].y)
+    remota = SimulacionRemota(sim, parametros, TPS)
+    atexit.register(remota.cerrar) # El juego termina con sys.exit
+    velocidad = 0 # Índice en VELOCIDADES
+    grafico = Curva() # Con solo el último cuadro, los ticks saltados repiten sus contadores
+    while True:
+        revisar_final()
+        for event in pygame.event.get():
+            if mover_camara(camara, event):
+                continue
+            if event.type == MOUSEBUTTONUP:
+                mousex, mousey = event.pos
+                if mousex >= XMIN and mousex <= XMAX and mousey >= YMIN and mousey <= YMAX:
+                    x, y = camara.a_mundo(mousex, mousey)
+                    remota.ubicar_vacuna(0, int(x), int(y))
+            elif event.type == KEYDOWN:
+                if event.key == pygame.K_LEFT:
+                    remota.mover_vacuna(0, -vel_vac, 0)
+                elif event.key == pygame.K_RIGHT:
+                    remota.mover_vacuna(0, vel_vac, 0)
+                elif event.key == pygame.K_UP:
+                    remota.mover_vacuna(0, 0, vel_vac)
+                elif event.key == pygame.K_DOWN:
+                    remota.mover_vacuna(0, 0, -vel_vac)
+                elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    velocidad = min(velocidad + 1, len(VELOCIDADES) - 1)
+                    remota.velocidad(VELOCIDADES[velocidad])
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    velocidad = max(velocidad - 1, 0)
+                    remota.velocidad(VELOCIDADES[velocidad])
+                elif event.key == pygame.K_c:
+                    vacuna = remota.cuadro()["vacunas"][0]
+                    camara.centrar(int(vacuna["x"]), int(vacuna["y"]))
+
+        cuadro = remota.cuadro()
+        DISPLAY.fill(BLANCO)
+        dibujar_baldosas(DISPLAY, camara)
+        contador(DISPLAY, remota, int(cuadro["tick"]), VELOCIDADES[velocidad] or 0)
+        panel_curva(DISPLAY, grafico, remota, int(cuadro["tick"]))
+        if remota.terminada():
+            final(DISPLAY, remota.motivo())
+        plot_cuadro(DISPLAY, cuadro, camara)
+        pygame.display.update()
+        FPSCLOCK.tick(FPS)
+
+def reproducir(ruta):
+    """Reproducir una grabación sin simular.
+
+    Teclas: espacio pausa, + y - cambian la velocidad, izquierda y derecha
+    retroceden o avanzan un 5% (un cuadro en pausa), inicio y fin saltan al
+    primer y al último cuadro. La cámara se maneja igual que en el juego.
+
+    Parámetros
+    ----------
+    ruta : str
+        Archivo de la grabación
+    """
+    iniciar_pantalla()
+    repro = Reproduccion(ruta)
+    camara = Camara(ANCHO, ALTO, repro.x_max, repro.y_max, XMIN, YMAX)
+    velocidad = 0 # Índice en VELOCIDADES
+    pausa = False
+    acumulado = 0.0 # Cuadros pendientes
+    grafico = Curva() # Una columna por cuadro de la grabación
+    while True:
+        revisar_final()
+        n = repro.actualizar() # La grabación puede seguir creciendo
+        salto = max(1, n // 20)
+        for event in pygame.event.get():
+            if mover_camara(camara, event):
+                continue
+            if event.type == KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    pausa = not pausa
+                elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    velocidad = min(velocidad + 1, len(VELOCIDADES) - 1)
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    velocidad = max(velocidad - 1, 0)
+                elif event.key == pygame.K_LEFT:
+                    repro.posicion -= 1 if pausa else salto
+                elif event.key == pygame.K_RIGHT:
+                    repro.posicion += 1 if pausa else salto
+                elif event.key == pygame.K_HOME:
+                    repro.posicion = 0
+                elif event.key == pygame.K_END:
+                    repro.posicion = n - 1
+        # Avanzar los cuadros que correspondan. A velocidad máxima se recorre la
+        # grabación completa en unos 10 segundos
+        factor = VELOCIDADES[velocidad]
+        if not pausa:
+            if factor is None:
+                acumulado += max(1, n / (10 * FPS))
+            else:
+                acumulado += FPSCLOCK.get_time() / 1000 * TPS * factor
+            repro.posicion += int(acumulado)
+            acumulado -= int(acumulado)
+        repro.posicion = min(max(repro.posicion, 0), max(n - 1, 0))
+
+        DISPLAY.fill(BLANCO)
+        dibujar_baldosas(DISPLAY, camara)
+        if n > 0:
+            cuadro = repro.cuadro()
+            contador(DISPLAY, repro, int(cuadro["tick"]), factor or 0)
+            panel_curva(DISPLAY, grafico, repro, repro.posicion + 1)
+            plot_cuadro(DISPLAY, cuadro, camara)
+        if pausa:
+            label = fuente("Arial", 11, True).render("PAUSA", 1, NEGRO)
+            DISPLAY.blit(label, (XMAX + 20, YMIN + 130))
+        pygame.display.update()
+        FPSCLOCK.tick(FPS)
+
 # Llamado a función principal #
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Videojuégatela por la Inmunidad")
+    parser.add_argument("--grabar", metavar="ARCHIVO", help="grabar la partida para reproducirla después")
+    parser.add_argument("--reproducir", metavar="ARCHIVO", help="reproducir una partida grabada")
+    parser.add_argument("--proceso", action="store_true", help="simular en un proceso aparte del dibujo")
+    parser.add_argument("--poblacion", type=int, default=100, help="personas en la simulación")
+    parser.add_argument("--mundo", type=int, nargs=2, metavar=("ANCHO", "ALTO"),
+        help="tamaño del mundo, por omisión el del área de juego")
+    parser.add_argument("--motor", choices=["python", "numpy"], default="python")
+    args = parser.parse_args()
+    escenario = {"poblacion": args.poblacion, "mundo": args.mundo, "motor": args.motor}
+    if args.reproducir:
+        reproducir(args.reproducir)
+    elif args.proceso:
+        main_proceso(**escenario)
+    else:
+        main(args.grabar, **escenario)
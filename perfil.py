@@ -0,0 +1,134 @@
+"""Medición del tiempo de cada etapa de una simulación.
+
+Perfil reemplaza los métodos de las etapas de una simulación (Simulacion,
+SimulacionNP o Ensamble) por versiones que miden su tiempo y llaman a las
+funciones registradas antes y después de cada etapa. Los métodos se reemplazan
+solo en la instancia y solo mientras el perfil está activo, por lo que una
+simulación sin perfil activo no tiene ningún costo adicional.
+
+Ejemplo::
+
+    perfil = Perfil(sim).activar()
+    for _ in range(100):
+        sim.paso()
+    print(perfil.mas_lenta())
+    perfil.desactivar()
+"""
+import time
+
+import numpy as np
+
+# Etapas medidas: nombre -> método de la simulación.
+# El tiempo de estadisticas incluye el del rebrote
+FASES = {
+    "movimiento": "mover_personas",
+    "contagio": "revisar_contagio",
+    "vacunacion": "revisar_vacunacion",
+    "estadisticas": "estadisticas",
+    "rebrote": "rebrote",
+}
+
+class Perfil:
+    """Clase para medir el tiempo de cada etapa de una simulación"""
+
+    def __init__(self, sim, historia=256):
+        """Constructor del perfil
+
+        Parámetros
+        ----------
+        sim : Simulacion, SimulacionNP o Ensamble
+            Simulación a medir
+        historia : int, opcional
+            Número de llamadas recientes que se guardan por etapa, por omisión 256
+        """
+        self.sim = sim
+        self.historia = historia
+        self.activo = False
+        self.llamadas = {fase: 0 for fase in FASES} # Llamadas a cada etapa
+        self.total = {fase: 0.0 for fase in FASES} # Segundos acumulados por etapa
+        self.tiempos = {fase: np.zeros(historia) for fase in FASES} # Buffer circular de segundos por llamada
+        self.antes = {fase: [] for fase in FASES} # Funciones llamadas antes de cada etapa
+        self.despues = {fase: [] for fase in FASES} # Funciones llamadas después de cada etapa
+
+    def _envolver(self, fase, metodo):
+        """Versión del método que mide su tiempo y llama a las funciones registradas"""
+        antes = self.antes[fase]
+        despues = self.despues[fase]
+        tiempos = self.tiempos[fase]
+        def envoltura(*args, **kwargs):
+            for funcion in antes:
+                funcion(self.sim, fase)
+            inicio = time.perf_counter()
+            resultado = metodo(*args, **kwargs)
+            segundos = time.perf_counter() - inicio
+            tiempos[self.llamadas[fase] % self.historia] = segundos
+            self.llamadas[fase] += 1
+            self.total[fase] += segundos
+            for funcion in despues:
+                funcion(self.sim, fase, segundos)
+            return resultado
+        return envoltura
+
+    def activar(self):
+        """Empezar a medir. Retorna el mismo perfil"""
+        if not self.activo:
+            for fase, nombre in FASES.items():
+                if hasattr(self.sim, nombre):
+                    setattr(self.sim, nombre, self._envolver(fase, getattr(self.sim, nombre)))
+            self.activo = True
+        return self
+
+    def desactivar(self):
+        """Dejar de medir y restaurar los métodos originales de la simulación"""
+        if self.activo:
+            for nombre in FASES.values():
+                self.sim.__dict__.pop(nombre, None)
+            self.activo = False
+
+    def agregar_antes(self, fase, funcion):
+        """Registrar una función funcion(sim, fase) que se llama antes de la etapa"""
+        self.antes[fase].append(funcion)
+
+    def agregar_despues(self, fase, funcion):
+        """Registrar una función funcion(sim, fase, segundos) que se llama después de la etapa"""
+        self.despues[fase].append(funcion)
+
+    def recientes(self, fase):
+        """Segundos de las últimas llamadas a la etapa, de la más antigua a la más reciente"""
+        n = self.llamadas[fase]
+        if n <= self.historia:
+            return self.tiempos[fase][:n].copy()
+        return np.roll(self.tiempos[fase], -(n % self.historia))
+
+    def resumen(self):
+        """Resumen de cada etapa.
+
+        Retorna
+        -------
+        dict
+            Etapa -> diccionario con llamadas, total, media y máximo recientes (en segundos)
+        """
+        resumen = {}
+        for fase in FASES:
+            recientes = self.recientes(fase)
+            resumen[fase] = {
+                "llamadas": self.llamadas[fase],
+                "total": self.total[fase],
+                "media": float(recientes.mean()) if len(recientes) else 0.0,
+                "maximo": float(recientes.max()) if len(recientes) else 0.0,
+            }
+        return resumen
+
+    def mas_lenta(self):
+        """Etapa con mayor tiempo medio reciente.
+
+        Retorna
+        -------
+        tuple
+            Nombre de la etapa y segundos por llamada, o (None, 0.0) si no hay mediciones
+        """
+        medias = {fase: datos["media"] for fase, datos in self.resumen().items() if datos["llamadas"] > 0}
+        if not medias:
+            return None, 0.0
+        fase = max(medias, key=medias.get)
+        return fase, medias[fase]
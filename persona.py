@@ -1,12 +1,9 @@
-from random import randint, seed
-
-# Semilla para la generacion de numeros aleatorios
-seed(12345)
+import random
 
 class Persona:
     """Clase para representar a una persona"""
 
-    def __init__(self, x, y, estado, vacuna):
+    def __init__(self, x, y, estado, vacuna, rng=random, dias_enfermo=None):
         """Constructor Persona
         
         Parámetros
@@ -22,12 +19,18 @@ class Persona:
             * 2: recuperado
         vacuna : boolean
             Estado de vacuna
+        rng : random.Random, opcional
+            Generador de números aleatorios, por omisión el del módulo random
+        dias_enfermo : int, opcional
+            Duración de la enfermedad. Si se omite, se elige al azar
         """
         self.x = x
         self.y = y
         self.estado = estado
         self.vacuna = vacuna
-        self.dias_enfermo = randint(28, 50) # Duracion enfemerdad entre 14 y 25 dias
+        if dias_enfermo is None:
+            dias_enfermo = rng.randint(28, 50) # Duracion enfemerdad entre 14 y 25 dias
+        self.dias_enfermo = dias_enfermo
         self.inoculacion = 0 # Porcentaje de inoculacion de persona
 
     def mostrar_persona(self):
@@ -0,0 +1,232 @@
+"""Simulación en un proceso aparte, con cuadros en memoria compartida.
+
+El proceso de trabajo avanza la simulación a la velocidad pedida y publica
+cada estado en un bloque de multiprocessing.shared_memory con dos cuadros
+(del tipo de grabacion.tipo_cuadro). El proceso principal lee el último cuadro
+completo sin copiarlo y envía los movimientos de la vacuna y los cambios de
+velocidad por una cola de comandos, de modo que un paso lento no congela el
+dibujo ni la entrada.
+
+Doble buffer: el lector marca el cuadro que está leyendo y el trabajador
+siempre escribe en el otro. Mientras lo escribe, el último cuadro completo
+pasa a ser el que se está leyendo, que no se modifica.
+
+Ejemplo::
+
+    remota = SimulacionRemota(sim, {"vel_per": 10, "umb_col": 11, "umb_con": 15, "umb_vac": 30})
+    cuadro = remota.cuadro()
+    remota.ubicar_vacuna(0, 100, 200)
+    remota.cerrar()
+"""
+import multiprocessing
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from grabacion import llenar_cuadro, tipo_cuadro
+
+# Bytes reservados al inicio del bloque para el control
+CONTROL = 64
+
+# Posiciones del arreglo de control
+LISTO = 0 # Último cuadro completo
+LEYENDO = 1 # Cuadro que está leyendo el proceso principal
+FIN = 2 # 0 simulando, 1 inmunidad alcanzada, 2 días cumplidos, 3 sin cambios posibles
+
+# Segundos máximos de simulación entre dos cuadros publicados
+PRESUPUESTO = 1 / 30
+
+def _vistas(memoria, dtype):
+    """Arreglo de control y los dos cuadros del bloque de memoria compartida"""
+    control = np.ndarray((3,), dtype=np.int64, buffer=memoria.buf)
+    cuadros = np.ndarray((2,), dtype=dtype, buffer=memoria.buf, offset=CONTROL)
+    return control, cuadros
+
+def _fin(sim):
+    """Motivo del fin de la simulación, el valor de FIN (ver main.motivo_fin)"""
+    if sim.inmunidad_alcanzada():
+        return 1
+    if sim.terminada():
+        return 3
+    if sim.tick >= sim.dias_simulacion:
+        return 2
+    return 0
+
+def _publicar(sim, control, cuadros, candado):
+    """Escribir el estado de la simulación en el cuadro que no se está leyendo"""
+    with candado:
+        b = 1 - control[LEYENDO]
+        if control[LISTO] == b: # El cuadro completo anterior se va a sobrescribir
+            control[LISTO] = control[LEYENDO]
+    llenar_cuadro(cuadros[b, ...], sim)
+    with candado:
+        control[LISTO] = b
+        control[FIN] = _fin(sim)
+
+def _trabajar(sim, parametros_paso, nombre, dtype, candado, comandos, tps):
+    """Ciclo del proceso de trabajo"""
+    memoria = shared_memory.SharedMemory(name=nombre)
+    control, cuadros = _vistas(memoria, dtype)
+    factor = 1 # Velocidad de simulación. None indica la máxima
+    acumulado = 0.0 # Pasos pendientes
+    anterior = time.perf_counter()
+    try:
+        while True:
+            cambios = False
+            # Comandos del proceso principal
+            while True:
+                try:
+                    comando = comandos.get_nowait()
+                except queue.Empty:
+                    break
+                if comando[0] == "terminar":
+                    return
+                elif comando[0] == "velocidad":
+                    factor = comando[1]
+                    acumulado = 0.0
+                elif comando[0] == "mover_vacuna":
+                    _, i, dx, dy = comando
+                    sim.vacunas[i].x = (sim.vacunas[i].x + dx) % sim.x_max
+                    sim.vacunas[i].y = (sim.vacunas[i].y + dy) % sim.y_max
+                elif comando[0] == "ubicar_vacuna":
+                    _, i, x, y = comando
+                    sim.vacunas[i].x = x
+                    sim.vacunas[i].y = y
+                cambios = True
+
+            # Avance con paso de tiempo fijo, sin ocupar más que el presupuesto entre cuadros
+            ahora = time.perf_counter()
+            if factor is not None:
+                acumulado += (ahora - anterior) * tps * factor
+            anterior = ahora
+            while (factor is None or acumulado >= 1) and not _fin(sim) and time.perf_counter() - ahora < PRESUPUESTO:
+                sim.paso(**parametros_paso)
+                acumulado = max(acumulado - 1, 0.0)
+                cambios = True
+            if _fin(sim):
+                acumulado = 0.0
+            elif factor is not None:
+                acumulado = min(acumulado, tps * factor) # Descartar el atraso de más de un segundo
+
+            if cambios:
+                _publicar(sim, control, cuadros, candado)
+            else:
+                time.sleep(0.002)
+    finally:
+        del control, cuadros
+        memoria.close()
+
+class SimulacionRemota:
+    """Clase para controlar una simulación que avanza en otro proceso.
+
+    Las propiedades sanos, infectados, recuperados e inoculados entregan los
+    contadores del último cuadro leído, por lo que se puede usar en lugar de la
+    simulación para dibujar el contador del juego.
+    """
+
+    def __init__(self, sim, parametros_paso, tps=5):
+        """Constructor de la simulación remota. Inicia el proceso de trabajo.
+
+        Parámetros
+        ----------
+        sim : Simulacion o SimulacionNP
+            Simulación a avanzar. El proceso de trabajo usa una copia
+        parametros_paso : dict
+            Parámetros de paso (vel_per, umb_col, umb_con, umb_vac)
+        tps : float, opcional
+            Pasos por segundo a velocidad 1x, por omisión 5
+        """
+        self.dias_simulacion = sim.dias_simulacion
+        self.x_max = sim.x_max
+        self.y_max = sim.y_max
+        self.dtype = tipo_cuadro(sim.poblacion, len(sim.vacunas), sim.x_max, sim.y_max)
+        self.memoria = shared_memory.SharedMemory(create=True, size=CONTROL + 2 * self.dtype.itemsize)
+        self.control, self.cuadros = _vistas(self.memoria, self.dtype)
+        self.control[:] = 0
+        llenar_cuadro(self.cuadros[0, ...], sim)
+        self.control[FIN] = _fin(sim)
+        self.actual = self.cuadros[0]
+        self.candado = multiprocessing.Lock()
+        self.comandos = multiprocessing.Queue()
+        self.proceso = multiprocessing.Process(target=_trabajar, args=(sim, parametros_paso, self.memoria.name,
+            self.dtype, self.candado, self.comandos, tps), daemon=True)
+        self.proceso.start()
+
+    def cuadro(self):
+        """Último cuadro completo, sin copiar. Queda reservado hasta la próxima llamada.
+
+        Retorna
+        -------
+        numpy.void
+            Registro con tick, contadores, personas y vacunas (ver grabacion.tipo_cuadro)
+        """
+        with self.candado:
+            b = self.control[LISTO]
+            self.control[LEYENDO] = b
+        self.actual = self.cuadros[b]
+        return self.actual
+
+    @property
+    def tick(self):
+        """Tick del último cuadro leído"""
+        return int(self.actual["tick"])
+
+    @property
+    def sanos(self):
+        """Número de sanos del último cuadro leído"""
+        return self.actual["contadores"][0:1]
+
+    @property
+    def infectados(self):
+        """Número de infectados del último cuadro leído"""
+        return self.actual["contadores"][1:2]
+
+    @property
+    def recuperados(self):
+        """Número de recuperados del último cuadro leído"""
+        return self.actual["contadores"][2:3]
+
+    @property
+    def inoculados(self):
+        """Número de vacunados del último cuadro leído"""
+        return self.actual["contadores"][3:4]
+
+    def terminada(self):
+        """Indica si la simulación terminó (inmunidad alcanzada, sin cambios posibles o días cumplidos)"""
+        return bool(self.control[FIN])
+
+    def motivo(self):
+        """Motivo del fin de la simulación (ver FIN)"""
+        return int(self.control[FIN])
+
+    def inmunidad_alcanzada(self):
+        """Indica si la simulación terminó porque no quedan sanos ni infectados"""
+        return self.control[FIN] == 1
+
+    def mover_vacuna(self, i, dx, dy):
+        """Mover la vacuna i en (dx, dy), con condiciones periódicas"""
+        self.comandos.put(("mover_vacuna", i, dx, dy))
+
+    def ubicar_vacuna(self, i, x, y):
+        """Ubicar la vacuna i en (x, y)"""
+        self.comandos.put(("ubicar_vacuna", i, x, y))
+
+    def velocidad(self, factor):
+        """Cambiar la velocidad de simulación. None indica la máxima"""
+        self.comandos.put(("velocidad", factor))
+
+    def cerrar(self):
+        """Terminar el proceso de trabajo y liberar la memoria compartida"""
+        if self.proceso is None:
+            return
+        self.comandos.put(("terminar",))
+        self.proceso.join(timeout=5)
+        if self.proceso.is_alive():
+            self.proceso.terminate()
+        self.proceso = None
+        self.actual = None
+        del self.control, self.cuadros
+        self.memoria.close()
+        self.memoria.unlink()
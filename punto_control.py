@@ -0,0 +1,153 @@
+"""Puntos de control binarios de una simulación.
+
+Un punto de control es un único archivo con:
+
+* 8 bytes con la firma MAGIA
+* 8 bytes con el largo de la cabecera (entero sin signo, little endian)
+* la cabecera en JSON: metadatos de la simulación (parámetros, tick, contadores,
+  estado del generador aleatorio) y la ubicación de cada arreglo
+* los arreglos (personas, vacunas, series, calendario de recuperaciones), cada
+  uno alineado a ALINEACION bytes
+
+Los arreglos se pueden leer con numpy.memmap en modo copia al escribir, de modo
+que una población grande se carga en forma perezosa, sin copiar el archivo.
+"""
+import json
+import os
+import struct
+
+import numpy as np
+
+# Firma de los archivos de punto de control
+MAGIA = b"SIMPC001"
+
+# Alineación de los arreglos dentro del archivo
+ALINEACION = 64
+
+def _alinear(n):
+    return -(-n // ALINEACION) * ALINEACION
+
+def escribir(ruta, meta, arreglos):
+    """Escribir un punto de control.
+
+    El archivo se escribe primero en ruta + ".tmp" y luego se reemplaza, para no
+    perder el punto de control anterior si el proceso termina a mitad de camino.
+
+    Parámetros
+    ----------
+    ruta : str
+        Ruta del archivo
+    meta : dict
+        Metadatos serializables en JSON
+    arreglos : dict
+        Diccionario nombre -> numpy.ndarray
+    """
+    ubicacion = {}
+    offset = 0
+    contiguos = {}
+    for nombre, arreglo in arreglos.items():
+        arreglo = np.ascontiguousarray(arreglo)
+        contiguos[nombre] = arreglo
+        ubicacion[nombre] = {"dtype": arreglo.dtype.str, "forma": list(arreglo.shape), "offset": offset}
+        offset += _alinear(arreglo.nbytes)
+    cabecera = json.dumps({"meta": meta, "arreglos": ubicacion}).encode()
+    inicio = _alinear(16 + len(cabecera))
+
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as archivo:
+        archivo.write(MAGIA)
+        archivo.write(struct.pack("<Q", len(cabecera)))
+        archivo.write(cabecera)
+        for nombre, arreglo in contiguos.items():
+            archivo.seek(inicio + ubicacion[nombre]["offset"])
+            archivo.write(arreglo.tobytes())
+        archivo.truncate(inicio + offset)
+    os.replace(temporal, ruta)
+
+def leer(ruta, mmap=True):
+    """Leer un punto de control.
+
+    Parámetros
+    ----------
+    ruta : str
+        Ruta del archivo
+    mmap : bool, opcional
+        Mapear los arreglos en memoria (copia al escribir) en vez de leerlos, por omisión verdadero
+
+    Retorna
+    -------
+    tuple
+        Metadatos y diccionario nombre -> numpy.ndarray
+    """
+    with open(ruta, "rb") as archivo:
+        if archivo.read(8) != MAGIA:
+            raise ValueError("%s no es un punto de control" % ruta)
+        largo, = struct.unpack("<Q", archivo.read(8))
+        cabecera = json.loads(archivo.read(largo).decode())
+        inicio = _alinear(16 + largo)
+        arreglos = {}
+        for nombre, info in cabecera["arreglos"].items():
+            dtype = np.dtype(info["dtype"])
+            forma = tuple(info["forma"])
+            cantidad = int(np.prod(forma))
+            if cantidad == 0:
+                arreglos[nombre] = np.empty(forma, dtype=dtype)
+            elif mmap:
+                arreglos[nombre] = np.memmap(ruta, dtype=dtype, mode="c", offset=inicio + info["offset"], shape=forma)
+            else:
+                archivo.seek(inicio + info["offset"])
+                arreglos[nombre] = np.fromfile(archivo, dtype=dtype, count=cantidad).reshape(forma)
+    return cabecera["meta"], arreglos
+
+def cargar(ruta, mmap=True):
+    """Cargar una simulación desde un punto de control, con el motor con que se guardó.
+
+    Parámetros
+    ----------
+    ruta : str
+        Ruta del archivo
+    mmap : bool, opcional
+        Mapear los arreglos en memoria, por omisión verdadero
+
+    Retorna
+    -------
+    Simulacion o SimulacionNP
+        Simulación restaurada
+    """
+    meta, arreglos = leer(ruta, mmap)
+    if meta["motor"] == "numpy":
+        from simulacion_np import SimulacionNP as clase
+    else:
+        from simulacion import Simulacion as clase
+    return clase.desde_estado(meta, arreglos)
+
+def parametros(sim):
+    """Parámetros del constructor de una simulación"""
+    return {nombre: getattr(sim, nombre) for nombre in ("poblacion", "dias_simulacion", "x_min", "x_max",
+        "y_min", "y_max", "porc_infectados", "prob_vacuna", "prob_reb")}
+
+def calendario_a_arreglos(calendario):
+    """Convertir un calendario de recuperaciones (tick -> índices) en arreglos.
+
+    Retorna
+    -------
+    dict
+        Ticks ordenados, posición de inicio de cada tick e índices concatenados
+    """
+    ticks = sorted(calendario)
+    # Cada tick tiene una lista de índices (Simulacion) o de arreglos de índices (SimulacionNP)
+    grupos = [np.hstack(calendario[t]).astype(np.int64) if len(calendario[t]) else np.empty(0, dtype=np.int64)
+        for t in ticks]
+    largos = np.array([len(g) for g in grupos], dtype=np.int64)
+    return {
+        "recuperacion_ticks": np.array(ticks, dtype=np.int64),
+        "recuperacion_inicio": np.concatenate(([0], np.cumsum(largos))),
+        "recuperacion_indices": np.concatenate(grupos) if grupos else np.empty(0, dtype=np.int64),
+    }
+
+def arreglos_a_calendario(arreglos):
+    """Reconstruir el calendario de recuperaciones, con un arreglo de índices por tick"""
+    ticks = arreglos["recuperacion_ticks"]
+    inicio = arreglos["recuperacion_inicio"]
+    indices = arreglos["recuperacion_indices"]
+    return {int(t): [indices[inicio[k]:inicio[k + 1]]] for k, t in enumerate(ticks)}
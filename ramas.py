@@ -0,0 +1,151 @@
+"""Ramas cortas desde el estado actual de una simulación, para comparar alternativas.
+
+Cada rama es una función que modifica una copia de la simulación (ver
+Simulacion.clonar), por ejemplo moviendo la vacuna, y luego avanza unos pocos
+ticks. Cada rama se repite con varias réplicas; la réplica r usa el mismo flujo
+aleatorio en todas las ramas (números aleatorios comunes), por lo que las
+diferencias entre ramas se deben a la modificación y no al azar.
+
+Con varios núcleos, las ramas se reparten en procesos creados con os.fork: los
+procesos heredan la simulación y las funciones de las ramas sin copiarlas ni
+serializarlas (la memoria se copia solo al escribirse). Sin fork o con un solo
+proceso, se ejecutan en el proceso actual.
+
+Ejemplo::
+
+    x, y, resumen = sugerir_vacuna(sim, {"vel_per": 10, "umb_col": 11, "umb_con": 15, "umb_vac": 30})
+    sim.vacunas[0].x, sim.vacunas[0].y = x, y
+"""
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from aleatorio import generador, generador_py
+
+# Resumen de cada réplica de cada rama
+RESUMEN = ["sanos", "infectados", "recuperados", "inoculados", "pico", "area"]
+
+# Simulación y ramas heredadas por los procesos (ver ramificar)
+_RAIZ = None
+_RAMAS = None
+
+def _generador(sim, semilla, replica):
+    """Generador de la réplica, del mismo tipo que el de la simulación"""
+    if isinstance(sim.rng, random.Random):
+        return generador_py(semilla, replica)
+    return generador(semilla, replica)
+
+def _ejecutar(sim, rama, parametros, ticks, semilla, replicas):
+    """Resumen de las réplicas de una rama, en un arreglo de (replicas, len(RESUMEN))"""
+    resultado = np.zeros((replicas, len(RESUMEN)))
+    for r in range(replicas):
+        copia = sim.clonar(_generador(sim, semilla, r))
+        rama(copia)
+        fin = min(copia.tick + ticks, copia.dias_simulacion)
+        pico = area = copia.n_infectados
+        while copia.tick < fin and not copia.inmunidad_alcanzada():
+            copia.paso(**parametros)
+            pico = max(pico, copia.n_infectados)
+            area += copia.n_infectados
+        resultado[r] = (copia.n_sanos, copia.n_infectados, copia.n_recuperados, copia.n_inoculados, pico, area)
+    return resultado
+
+def _ejecutar_heredada(tarea):
+    """Función auxiliar para los procesos creados con fork"""
+    i, parametros, ticks, semilla, replicas = tarea
+    return _ejecutar(_RAIZ, _RAMAS[i], parametros, ticks, semilla, replicas)
+
+def ramificar(sim, ramas, parametros, ticks=20, replicas=2, semilla=None, procesos=None):
+    """Avanzar varias ramas desde el estado actual, sin modificar la simulación.
+
+    Parámetros
+    ----------
+    sim : Simulacion o SimulacionNP
+        Simulación de partida
+    ramas : list
+        Funciones f(sim) que modifican una copia de la simulación antes de avanzarla
+    parametros : dict
+        Parámetros de paso (vel_per, umb_col, umb_con, umb_vac)
+    ticks : int, opcional
+        Ticks que avanza cada rama, por omisión 20
+    replicas : int, opcional
+        Réplicas de cada rama, por omisión 2
+    semilla : int, opcional
+        Semilla de las réplicas, por omisión el tick actual
+    procesos : int, opcional
+        Número de procesos, por omisión uno por núcleo. Con 1, o si el sistema no
+        tiene fork, las ramas se ejecutan en el proceso actual
+
+    Retorna
+    -------
+    dict
+        Nombre (ver RESUMEN) -> arreglo de (ramas, replicas). Los contadores son
+        los del último tick, pico es el máximo de infectados y area la suma de
+        infectados en cada tick
+    """
+    global _RAIZ, _RAMAS
+    semilla = sim.tick if semilla is None else semilla
+    procesos = min(procesos or os.cpu_count() or 1, len(ramas))
+    if procesos > 1 and "fork" in multiprocessing.get_all_start_methods():
+        _RAIZ, _RAMAS = sim, ramas
+        try:
+            tareas = [(i, parametros, ticks, semilla, replicas) for i in range(len(ramas))]
+            with ProcessPoolExecutor(procesos, mp_context=multiprocessing.get_context("fork")) as grupo:
+                resultados = list(grupo.map(_ejecutar_heredada, tareas))
+        finally:
+            _RAIZ = _RAMAS = None
+    else:
+        resultados = [_ejecutar(sim, rama, parametros, ticks, semilla, replicas) for rama in ramas]
+    resultados = np.array(resultados).reshape(len(ramas), replicas, len(RESUMEN))
+    return {nombre: resultados[:, :, k] for k, nombre in enumerate(RESUMEN)}
+
+def ubicar_vacuna(sim, x, y, i=0):
+    """Rama que ubica la vacuna i en (x, y)"""
+    sim.vacunas[i].x = x
+    sim.vacunas[i].y = y
+
+def grilla(x0, y0, ancho, alto, lado=3):
+    """Posiciones enteras de una grilla de lado x lado, centradas en celdas del rectángulo dado"""
+    xs = x0 + (np.arange(lado) + 0.5) * ancho / lado
+    ys = y0 + (np.arange(lado) + 0.5) * alto / lado
+    return [(int(x), int(y)) for y in ys for x in xs]
+
+def sugerir_vacuna(sim, parametros, candidatos=None, ticks=20, replicas=2, procesos=None, i=0):
+    """Posición de la vacuna i que menos infectados deja en las ramas.
+
+    Cada candidato es una rama con la vacuna en esa posición (ver ramificar). Se
+    elige la de menor suma de infectados, con la posición actual entre los
+    candidatos para no sugerir moverla si no mejora.
+
+    Parámetros
+    ----------
+    sim : Simulacion o SimulacionNP
+        Simulación de partida
+    parametros : dict
+        Parámetros de paso (vel_per, umb_col, umb_con, umb_vac)
+    candidatos : list, opcional
+        Posiciones (x, y) a comparar, por omisión una grilla de 3 x 3 sobre el mundo
+    ticks, replicas, procesos : opcional
+        Ver ramificar
+    i : int, opcional
+        Vacuna a ubicar, por omisión 0
+
+    Retorna
+    -------
+    tuple
+        Posición x e y sugerida, y resumen de las ramas (ver ramificar). La rama
+        0 es la posición actual y la rama k la del candidato k - 1
+    """
+    if candidatos is None:
+        candidatos = grilla(0, 0, sim.x_max, sim.y_max)
+    posiciones = [(sim.vacunas[i].x, sim.vacunas[i].y)] + list(candidatos)
+    ramas = [partial(ubicar_vacuna, x=x, y=y, i=i) for x, y in posiciones]
+    resumen = ramificar(sim, ramas, parametros, ticks, replicas, procesos=procesos)
+    # argmin entrega la primera de las mejores, la posición actual si empata
+    mejor = int(np.argmin(resumen["area"].mean(axis=1)))
+    x, y = posiciones[mejor]
+    return x, y, resumen
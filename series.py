@@ -0,0 +1,153 @@
+import numpy as np
+
+# Nombres de las series, en el orden en que se guardan
+NOMBRES = ("sanos", "infectados", "recuperados", "inoculados")
+
+class Series:
+    """Clase para guardar las estadísticas diarias en arreglos preasignados"""
+
+    def __init__(self, capacidad, dtype=np.int32):
+        """Constructor de las series
+
+        Parámetros
+        ----------
+        capacidad : int
+            Número de días a reservar (por ejemplo, dias_simulacion). Si se
+            supera, la capacidad se duplica
+        dtype : numpy.dtype, opcional
+            Tipo de los contadores, por omisión np.int32
+        """
+        self.datos = np.zeros((len(NOMBRES), max(1, capacidad)), dtype=dtype) # Una fila por serie
+        self.n = 0 # Días guardados en memoria
+        self.inicio = 0 # Día del primer dato en memoria (los anteriores ya se descartaron)
+        self.volcados = 0 # Días ya escritos con volcar
+
+    @classmethod
+    def desde_arreglo(cls, datos, capacidad=0, inicio=0, volcados=0):
+        """Crear las series a partir de un arreglo de (4, días), por ejemplo de un punto de control.
+
+        Parámetros
+        ----------
+        datos : numpy.ndarray
+            Arreglo con una fila por serie
+        capacidad : int, opcional
+            Días a reservar, como mínimo los de datos
+        inicio : int, opcional
+            Día del primer dato
+        volcados : int, opcional
+            Días ya escritos con volcar
+
+        Retorna
+        -------
+        Series
+            Series con una copia de los datos
+        """
+        series = cls(max(capacidad, datos.shape[1]), datos.dtype)
+        series.datos[:, :datos.shape[1]] = datos
+        series.n = datos.shape[1]
+        series.inicio = inicio
+        series.volcados = volcados
+        return series
+
+    def __len__(self):
+        return self.n
+
+    def agregar(self, sanos, infectados, recuperados, inoculados, veces=1):
+        """Agregar las estadísticas de un día, o de varios días iguales.
+
+        Parámetros
+        ----------
+        sanos : int
+            Número de sanos
+        infectados : int
+            Número de infectados
+        recuperados : int
+            Número de recuperados
+        inoculados : int
+            Número de inoculados
+        veces : int, opcional
+            Número de días con las mismas estadísticas, por omisión 1
+        """
+        if self.n + veces > self.datos.shape[1]:
+            datos = np.zeros((len(NOMBRES), max(2 * self.n, self.n + veces)), dtype=self.datos.dtype)
+            datos[:, :self.n] = self.datos[:, :self.n]
+            self.datos = datos
+        if veces == 1:
+            self.datos[:, self.n] = (sanos, infectados, recuperados, inoculados)
+        else:
+            self.datos[:, self.n:self.n + veces] = np.array((sanos, infectados, recuperados, inoculados))[:, None]
+        self.n += veces
+
+    def serie(self, nombre):
+        """Serie guardada en memoria, sin copiar.
+
+        Parámetros
+        ----------
+        nombre : str
+            "sanos", "infectados", "recuperados" o "inoculados"
+
+        Retorna
+        -------
+        numpy.ndarray
+            Vista de la serie
+        """
+        return self.datos[NOMBRES.index(nombre), :self.n]
+
+    def arreglo(self):
+        """Arreglo de (4, días) con las series guardadas en memoria, sin copiar"""
+        return self.datos[:, :self.n]
+
+    def volcar(self, archivo, descartar=False):
+        """Escribir en formato CSV los días que aún no se han escrito.
+
+        Permite exportar una simulación larga por partes. Con descartar, después
+        de escribir solo se mantiene en memoria el último día, por lo que la
+        memoria no crece con la duración de la simulación.
+
+        Parámetros
+        ----------
+        archivo : archivo de texto
+            Archivo abierto para escribir. Si está vacío se escribe el encabezado
+        descartar : bool, opcional
+            Descartar de la memoria los días escritos, por omisión falso
+
+        Retorna
+        -------
+        int
+            Número de días escritos
+        """
+        if self.volcados == 0 and archivo.tell() == 0:
+            archivo.write("dia," + ",".join(NOMBRES) + "\n")
+        desde = self.volcados - self.inicio
+        filas = self.datos[:, desde:self.n].T
+        dias = np.arange(self.volcados, self.volcados + len(filas))
+        np.savetxt(archivo, np.column_stack((dias, filas)), fmt="%d", delimiter=",")
+        self.volcados += len(filas)
+        if descartar and self.n > 1:
+            # Mantener solo el último día para seguir consultando sim.sanos[-1], etc.
+            self.datos[:, 0] = self.datos[:, self.n - 1]
+            self.inicio += self.n - 1
+            self.n = 1
+        return len(filas)
+
+    def exportar_csv(self, ruta):
+        """Guardar las series en memoria en un archivo CSV.
+
+        Parámetros
+        ----------
+        ruta : str
+            Ruta del archivo
+        """
+        dias = np.arange(self.inicio, self.inicio + self.n)
+        np.savetxt(ruta, np.column_stack((dias, self.arreglo().T)), fmt="%d", delimiter=",",
+            header="dia," + ",".join(NOMBRES), comments="")
+
+    def exportar_npz(self, ruta):
+        """Guardar las series en memoria en un archivo .npz comprimido.
+
+        Parámetros
+        ----------
+        ruta : str
+            Ruta del archivo
+        """
+        np.savez_compressed(ruta, inicio=self.inicio, **{nombre: self.serie(nombre) for nombre in NOMBRES})
@@ -1,19 +1,31 @@
+import math
 from persona import Persona
 from vacuna import Vacuna
-from random import randint, uniform, seed
-
-# Semilla para la generacion de numeros aleatorios
-seed(12345)
+from grilla import Grilla
+from simulacion_np import mover_lote
+from series import Series
+from aleatorio import SEMILLA, generador_py
+import punto_control
+from perfil import Perfil
+import numpy as np
 
 # Funcion de distancia
 def distancia(x1, y1, x2, y2):
     return ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
 
+# Funcion de distancia con condiciones periodicas
+def distancia_periodica(x1, y1, x2, y2, x_max, y_max):
+    dx = abs(x2 - x1) % x_max
+    dy = abs(y2 - y1) % y_max
+    dx = min(dx, x_max - dx)
+    dy = min(dy, y_max - dy)
+    return (dx ** 2 + dy ** 2) ** 0.5
+
 class Simulacion:
     """Clase para controlar la simulación"""
 
     def __init__(self, poblacion, vacunas, dias_simulacion, x_min, x_max, y_min, y_max, 
-        porc_infectados=0.1, prob_vacuna=0.5, prob_reb=0.5):
+        porc_infectados=0.1, prob_vacuna=0.5, prob_reb=0.5, semilla=SEMILLA, replica=None, rng=None):
         """Constructor de la simulación
 
         Parámetros
@@ -38,6 +50,12 @@ class Simulacion:
             Probabilidad de que una persona se vacune, por omisión 50%
         prob_reb : float, opcional
             Probabilidad de rebrote, por omisión 50%
+        semilla : int, opcional
+            Semilla del generador de números aleatorios, por omisión 12345
+        replica : int, opcional
+            Identificador de la réplica. Cada par (semilla, replica) tiene su propio flujo
+        rng : random.Random, opcional
+            Generador de números aleatorios. Si se entrega, se ignoran semilla y replica
         """
         self.poblacion = poblacion
         self.dias_simulacion = dias_simulacion
@@ -48,39 +66,48 @@ class Simulacion:
         self.porc_infectados = porc_infectados
         self.prob_vacuna = prob_vacuna # Probabilidad que una persona se vacune 
         self.prob_reb = prob_reb # Probabilidad de rebrote
+        self.rng = rng if rng is not None else generador_py(semilla, replica) # Generador de números aleatorios
         self.personas = [] # Lista para guardar a las personas 
         self.vacunas = [] # Lista para guardar a las vacunas
-        self.infectados = [] # Lista para guardar número de infectados por dia
-        self.sanos = [] # Lista para guardar número de sanos por dia
-        self.recuperados = [] # Lista para guardar número de recuperados diarios
-        self.inoculados = [] # Lista para guardar el número de vacunados
+        self.series = Series(dias_simulacion) # Número de sanos, infectados, recuperados y vacunados por dia
+        # Contadores de personas por estado, actualizados en cada cambio de estado
+        self.n_sanos = 0
+        self.n_infectados = 0
+        self.n_recuperados = 0
+        self.n_inoculados = 0
+        self.tick = 0 # Pasos de 12 horas simulados (llamadas a estadisticas)
+        self.recuperaciones = {} # Calendario: tick -> índices de las personas que se recuperan ese tick
+        self.sin_vacuna = list(range(poblacion)) # Índices de las personas sin inoculacion, en orden
 
         # Crear personas #
         for i in range(poblacion):
             # Posicion inicial aleatoria
-            pos_x = randint(x_min, x_max)
-            pos_y = randint(y_min, y_max)
+            pos_x = self.rng.randint(x_min, x_max)
+            pos_y = self.rng.randint(y_min, y_max)
 
             # Probabilidad de iniciar infectado
-            if uniform(0, 1) < porc_infectados:
+            if self.rng.uniform(0, 1) < porc_infectados:
                 estado = 1
             else:
                 estado = 0
 
             # Creacion de persona. Inicia sin vacuna
-            per = Persona(pos_x, pos_y, estado, False)
+            per = Persona(pos_x, pos_y, estado, False, self.rng)
 
             # Agregamos a la lista
             self.personas.append(per)
+            if estado == 1:
+                self.n_infectados += 1
+                self.programar_recuperacion(i, per.dias_enfermo - 1)
 
         # Crear vacunas #
         for i in range(vacunas):
             # Posicion inicial aleatoria
-            pos_x = randint(x_min, x_max)
-            pos_y = randint(y_min, y_max)
+            pos_x = self.rng.randint(x_min, x_max)
+            pos_y = self.rng.randint(y_min, y_max)
 
             # Eficacia aleatoria entre 60% y 95%
-            efect = uniform(0.6, 0.95) 
+            efect = self.rng.uniform(0.6, 0.95) 
 
             # Creacion vacuna
             vac = Vacuna(pos_x, pos_y, efect)
@@ -88,6 +115,40 @@ class Simulacion:
             # Agregamos a la lista
             self.vacunas.append(vac)
 
+        self.n_sanos = poblacion - self.n_infectados
+
+    def programar_recuperacion(self, i, tick):
+        """Agendar la recuperación de la persona i.
+
+        Parámetros
+        ----------
+        i : int
+            Índice de la persona
+        tick : int
+            Tick en que la persona pasa a recuperada (en estadisticas)
+        """
+        self.recuperaciones.setdefault(tick, []).append(i)
+
+    @property
+    def sanos(self):
+        """Número de sanos por dia"""
+        return self.series.serie("sanos")
+
+    @property
+    def infectados(self):
+        """Número de infectados por dia"""
+        return self.series.serie("infectados")
+
+    @property
+    def recuperados(self):
+        """Número de recuperados por dia"""
+        return self.series.serie("recuperados")
+
+    @property
+    def inoculados(self):
+        """Número de vacunados por dia"""
+        return self.series.serie("inoculados")
+
     def mostrar_personas(self):
         """Mostrar informacion de personas"""
         for persona in self.personas:
@@ -115,14 +176,32 @@ class Simulacion:
                 return True
         return False
 
-    def mover_personas(self, vel=5, umbral=5):
+    def mover_personas(self, vel=5, umbral=5, modo="original", max_intentos=10):
         """Simulación de movimiento de las personas
 
         Parámetros
         ----------
-        mov : int, optional
+        vel : int, opcional
             Distancia de movimiento, por omisión 5
+        umbral : float, opcional
+            Umbral de colisión, por omisión 5
+        modo : str, opcional
+            Forma de resolver las colisiones, por omisión "original":
+            * "original": revisa toda la población y reintenta hasta encontrar una posición libre
+            * "indexado": revisa solo las personas de las celdas vecinas, sin contar a la
+              propia persona, con un máximo de intentos
+            * "lote": resuelve los movimientos de todas las personas a la vez, con un máximo de intentos
+        max_intentos : int, opcional
+            Intentos por persona en los modos "indexado" y "lote". Si no se encuentra
+            una posición libre, la persona se queda en su lugar. Por omisión 10
         """
+        if modo == "indexado":
+            self.mover_personas_indexado(vel, umbral, max_intentos)
+            return
+        elif modo == "lote":
+            self.mover_personas_lote(vel, umbral, max_intentos)
+            return
+
         # Movimiento aleatorio de cada persona
         # Este while permite que el programa principal espere que la función se termine de ejecutar
         while True:
@@ -132,8 +211,8 @@ class Simulacion:
                 # Se genera un movimiento aleatorio siempre y cuando no exista colisión
                 while flag: 
                     # Movimiento aleatorio 
-                    tmp_x = persona.x + randint(-vel, vel)
-                    tmp_y = persona.y + randint(-vel, vel)
+                    tmp_x = persona.x + self.rng.randint(-vel, vel)
+                    tmp_y = persona.y + self.rng.randint(-vel, vel)
 
                     # Condiciones periodicas
                     tmp_x %= self.x_max
@@ -149,6 +228,64 @@ class Simulacion:
             # Se cierra el ciclo para seguir la ejecución del programa principal
             break 
 
+    def mover_personas_indexado(self, vel=5, umbral=5, max_intentos=10):
+        """Movimiento de las personas revisando colisiones con una grilla de vecinos.
+
+        Parámetros
+        ----------
+        vel : int, opcional
+            Distancia de movimiento, por omisión 5
+        umbral : float, opcional
+            Umbral de colisión, por omisión 5
+        max_intentos : int, opcional
+            Intentos por persona antes de quedarse en su lugar, por omisión 10
+        """
+        # Indexar a todas las personas en una grilla con celdas de tamaño umbral
+        grilla = Grilla(self.x_max, self.y_max, umbral)
+        for i, persona in enumerate(self.personas):
+            grilla.agregar(i, persona.x, persona.y)
+
+        for i, persona in enumerate(self.personas):
+            # La persona no choca consigo misma
+            grilla.quitar(i, persona.x, persona.y)
+            for _ in range(max_intentos):
+                # Movimiento aleatorio con condiciones periodicas
+                tmp_x = (persona.x + self.rng.randint(-vel, vel)) % self.x_max
+                tmp_y = (persona.y + self.rng.randint(-vel, vel)) % self.y_max
+                # Solo se revisan las personas de las celdas vecinas
+                colision = False
+                for j in grilla.vecinos(tmp_x, tmp_y):
+                    if distancia(tmp_x, tmp_y, self.personas[j].x, self.personas[j].y) <= umbral:
+                        colision = True
+                        break
+                if not colision:
+                    persona.x = tmp_x
+                    persona.y = tmp_y
+                    break
+            # Si no encontró una posición libre se queda en su lugar
+            grilla.agregar(i, persona.x, persona.y)
+
+    def mover_personas_lote(self, vel=5, umbral=5, max_intentos=10):
+        """Movimiento de todas las personas a la vez (ver simulacion_np.mover_lote).
+
+        Parámetros
+        ----------
+        vel : int, opcional
+            Distancia de movimiento, por omisión 5
+        umbral : float, opcional
+            Umbral de colisión, por omisión 5
+        max_intentos : int, opcional
+            Intentos por persona antes de quedarse en su lugar, por omisión 10
+        """
+        x = np.array([persona.x for persona in self.personas], dtype=np.int64)
+        y = np.array([persona.y for persona in self.personas], dtype=np.int64)
+        # Generador de NumPy obtenido del generador de la simulación
+        rng = np.random.default_rng(self.rng.randint(0, 2 ** 32 - 1))
+        mover_lote(x, y, vel, umbral, self.x_max, self.y_max, rng, max_intentos)
+        for persona, pos_x, pos_y in zip(self.personas, x.tolist(), y.tolist()):
+            persona.x = pos_x
+            persona.y = pos_y
+
     def mover_vacunas(self, vel=5):
         """Simulación de movimiento de las vacunas
 
@@ -160,8 +297,8 @@ class Simulacion:
         # Movimiento de cada vacuna
         for vacuna in self.vacunas:
             # Movimiento aleatorio 
-            vacuna.x += randint(-vel, vel)
-            vacuna.y += randint(-vel, vel)
+            vacuna.x += self.rng.randint(-vel, vel)
+            vacuna.y += self.rng.randint(-vel, vel)
 
             # Condiciones periodicas
             vacuna.x %= self.x_max
@@ -175,24 +312,37 @@ class Simulacion:
         umbral : double, opcional
             Distancia umbral para contagio, por omisión 10.0
         """
-        for i in range(self.poblacion):
-            for j in range(self.poblacion):
-                if i != j:
-                    # Obtener informacion de las personas
-                    x1 = self.personas[i].x
-                    y1 = self.personas[i].y
-                    x2 = self.personas[j].x
-                    y2 = self.personas[j].y
-                    estado1 = self.personas[i].estado
-                    estado2 = self.personas[j].estado
-                    # Para revisar el contagio se verifica:
-                    # Si es que la persona está sana y hay una infectada cerca según el umbral
-                    if distancia(x1, y1, x2, y2) <= umbral and estado1 == 0 and estado2 == 1:
-                        # Efecto vacuna. Revisamos el % de inoculacion de la persona
-                        # En el caso que no esté vacunado, la variable aleatoria será siempre <= 1, dado que inoculacion es 0
-                        # En el caso que esté vacunado, la variable aletoria entra en juego y depende del % de inoculacion
-                        if uniform(0, 1) <= 1 - self.personas[i].inoculacion:
-                            self.personas[i].estado = 1 # Cambio a estado infectado
+        # Sin infectados no hay contagios
+        if self.n_infectados == 0:
+            return
+        # Indexar a los infectados en una grilla con celdas de tamaño umbral
+        grilla = Grilla(self.x_max, self.y_max, umbral)
+        for j, persona in enumerate(self.personas):
+            if persona.estado == 1:
+                grilla.agregar(j, persona.x, persona.y)
+
+        for i, persona in enumerate(self.personas):
+            # Solo las personas sanas pueden contagiarse
+            if persona.estado != 0:
+                continue
+            # Para revisar el contagio solo se consideran los infectados de las celdas vecinas
+            for j in grilla.vecinos(persona.x, persona.y):
+                infectado = self.personas[j]
+                # Se verifica si hay una persona infectada cerca según el umbral,
+                # con las mismas condiciones periódicas del movimiento
+                if distancia_periodica(persona.x, persona.y, infectado.x, infectado.y, self.x_max, self.y_max) <= umbral:
+                    # Efecto vacuna. Revisamos el % de inoculacion de la persona
+                    # En el caso que no esté vacunado, la variable aleatoria será siempre <= 1, dado que inoculacion es 0
+                    # En el caso que esté vacunado, la variable aletoria entra en juego y depende del % de inoculacion
+                    if self.rng.uniform(0, 1) <= 1 - persona.inoculacion:
+                        persona.estado = 1 # Cambio a estado infectado
+                        # Se recupera después de dias_enfermo ticks, contando el actual
+                        self.programar_recuperacion(i, self.tick + persona.dias_enfermo - 1)
+                        self.n_sanos -= 1
+                        self.n_infectados += 1
+                        # La persona recién infectada puede contagiar a las siguientes
+                        grilla.agregar(i, persona.x, persona.y)
+                        break
 
     def revisar_vacunacion(self, umbral=10.0):
         """Simular el proceso de vacunación.
@@ -202,16 +352,30 @@ class Simulacion:
         umbral : double, optional
             Distancia umbral para vacunación, por omisión 10.0
         """
-        for persona in self.personas:
-            for vacuna in self.vacunas:
-                x1 = persona.x
-                y1 = persona.y
-                x2 = vacuna.x
-                y2 = vacuna.y
+        # Indexar las vacunas en una grilla con celdas de tamaño umbral. Se reconstruye en
+        # cada llamada porque las vacunas se mueven (mover_vacunas o el jugador)
+        grilla = Grilla(self.x_max, self.y_max, umbral)
+        for j, vacuna in enumerate(self.vacunas):
+            grilla.agregar(j, vacuna.x, vacuna.y)
+
+        # Solo se revisan las personas que aún no tienen inoculacion
+        sin_vacuna = []
+        for i in self.sin_vacuna:
+            persona = self.personas[i]
+            if persona.inoculacion != 0:
+                continue
+            # Vacunas de las celdas vecinas, en el mismo orden de la lista de vacunas
+            for j in sorted(grilla.vecinos(persona.x, persona.y)):
+                vacuna = self.vacunas[j]
                 # El supuesto es que cada persona cerca del umbral de una vacuna será inoculada 
                 # con probabilidad prob_vacuna, siempre y cuando su % de inoculacion sea nulo
-                if distancia(x1, y1, x2, y2) <= umbral and persona.inoculacion == 0 and uniform(0, 1) <= self.prob_vacuna:
+                if distancia(persona.x, persona.y, vacuna.x, vacuna.y) <= umbral and self.rng.uniform(0, 1) <= self.prob_vacuna:
                     persona.inoculacion += vacuna.efectividad
+                    self.n_inoculados += 1
+                    break
+            else:
+                sin_vacuna.append(i)
+        self.sin_vacuna = sin_vacuna
 
     def rebrote(self, porc=0.02):
         """Simular rebrote de virus
@@ -222,40 +386,269 @@ class Simulacion:
             Porcentaje de rebrote, por omisión 5%
         """
         k = 0
-        for persona in self.personas:
+        for i, persona in enumerate(self.personas):
             if persona.estado == 0 and persona.inoculacion == 0 and k < self.poblacion * porc:
                 persona.estado = 1 # Infectado
-                persona.dias_enfermo = randint(28, 50) # Nuevos días enfermo
+                persona.dias_enfermo = self.rng.randint(28, 50) # Nuevos días enfermo
+                self.programar_recuperacion(i, self.tick + persona.dias_enfermo)
                 k += 1
+        self.n_sanos -= k
+        self.n_infectados += k
     
     def estadisticas(self):
         """Obtención de estadísticas y actualización de estados"""
-        # Contadores
-        sanos = 0
-        infectados = 0
-        recuperados = 0
-        inoculados = 0
-        for persona in self.personas:
-            # Revisar estado de personas
-            if persona.estado == 0: # Sano
-                sanos += 1
-            elif persona.estado == 1: # Infectado
-                infectados += 1
-                if persona.dias_enfermo > 0:
-                    persona.dias_enfermo -= 1
-                    if persona.dias_enfermo == 0: # Si ya terminó los días enfermos
-                        persona.estado = 2 # Recuperado
-            elif persona.estado == 2: # Recuperado
-                recuperados += 1
-            # Si la persona tiene vacuna
-            if persona.inoculacion > 0:
-                inoculados += 1
-        # Agregar estadisticas
-        self.infectados.append(infectados)
-        self.sanos.append(sanos)
-        self.recuperados.append(recuperados)
-        self.inoculados.append(inoculados)
+        # Agregar estadisticas. Los contadores se actualizan en cada cambio de estado
+        infectados = self.n_infectados
+        self.series.agregar(self.n_sanos, self.n_infectados, self.n_recuperados, self.n_inoculados)
+        # Recuperar a los infectados que terminan sus días enfermos en este tick
+        recuperados = self.recuperaciones.pop(self.tick, [])
+        for i in recuperados:
+            persona = self.personas[i]
+            persona.estado = 2 # Recuperado
+            persona.dias_enfermo = 0
+        self.n_infectados -= len(recuperados)
+        self.n_recuperados += len(recuperados)
         # Rebrote
-        if infectados == 0 and uniform(0, 1) <= self.prob_reb:
+        if infectados == 0 and self.rng.uniform(0, 1) <= self.prob_reb:
             self.rebrote()
+        self.tick += 1
+
+    def inmunidad_alcanzada(self):
+        """Indica si no quedan sanos ni infectados, por lo que ya no puede haber contagios ni rebrotes"""
+        return self.n_sanos == 0 and self.n_infectados == 0
+
+    def puede_rebrotar(self):
+        """Indica si hay personas sanas sin inoculacion, las únicas que pueden infectarse en un rebrote"""
+        return self.n_sanos > 0 and any(persona.estado == 0 and persona.inoculacion == 0 for persona in self.personas)
 
+    def puede_vacunar(self):
+        """Indica si la vacunación todavía puede cambiar a alguna persona"""
+        return len(self.vacunas) > 0 and self.prob_vacuna > 0 and any(self.personas[i].inoculacion == 0 for i in self.sin_vacuna)
+
+    def quieta(self):
+        """Indica si hasta el próximo rebrote solo pueden cambiar las posiciones.
+
+        No hay infectados (por lo que no hay contagios ni recuperaciones) y la
+        vacunación no puede cambiar a nadie.
+        """
+        return self.n_infectados == 0 and not self.puede_vacunar()
+
+    def terminada(self):
+        """Indica si las estadísticas ya no pueden cambiar: está quieta y no puede haber rebrotes"""
+        return self.quieta() and not (self.prob_reb > 0 and self.puede_rebrotar())
+
+    def saltar(self, hasta):
+        """Avanzar de una vez una simulación quieta (ver quieta) hasta el próximo rebrote.
+
+        En cada tick sin infectados hay un rebrote con probabilidad prob_reb, por lo
+        que el tick del próximo rebrote se sortea con una distribución geométrica. Los
+        ticks intermedios repiten las estadísticas y el rebrote se aplica igual que en
+        estadisticas. Las posiciones no se actualizan durante el salto: después de
+        muchos ticks de movimiento aleatorio quedan distribuidas en forma
+        aproximadamente uniforme, igual que antes del salto.
+
+        Parámetros
+        ----------
+        hasta : int
+            Tick máximo. Si el rebrote ocurre después, se avanza solo hasta este tick
+        """
+        restantes = hasta - self.tick
+        if restantes <= 0:
+            return
+        if self.prob_reb > 0 and self.puede_rebrotar():
+            u = self.rng.uniform(0, 1)
+            espera = 1 if self.prob_reb >= 1 else 1 + int(math.log(1 - u) / math.log(1 - self.prob_reb))
+        else:
+            espera = restantes + 1 # Sin rebrotes posibles
+        contadores = (self.n_sanos, self.n_infectados, self.n_recuperados, self.n_inoculados)
+        if espera > restantes:
+            self.series.agregar(*contadores, veces=restantes)
+            self.tick = hasta
+            return
+        # Ticks sin cambios hasta el tick del rebrote, que se agrega antes del rebrote igual que en estadisticas
+        self.series.agregar(*contadores, veces=espera)
+        self.tick += espera - 1
+        self.rebrote()
+        self.tick += 1
+
+    def paso(self, vel_per=10, umb_col=11, umb_con=15, umb_vac=30, modo="indexado"):
+        """Avanzar la simulación en 12 horas, con las mismas etapas del juego.
+
+        Parámetros
+        ----------
+        vel_per : int, opcional
+            Velocidad de movimiento de las personas (pixeles / tick), por omisión 10
+        umb_col : float, opcional
+            Umbral de colisión, por omisión 11
+        umb_con : float, opcional
+            Umbral de contagio, por omisión 15
+        umb_vac : float, opcional
+            Umbral de vacunación, por omisión 30
+        modo : str, opcional
+            Modo de resolver las colisiones (ver mover_personas), por omisión "indexado"
+        """
+        self.mover_personas(vel_per, umb_col, modo=modo) # Movimiento aleatorio de personas
+        self.revisar_contagio(umb_con) # Simular el contagio
+        self.revisar_vacunacion(umb_vac) # Simular el proceso de vacunación
+        self.estadisticas() # Obtención de estadísticas
+
+    def perfilar(self, historia=256):
+        """Empezar a medir el tiempo de cada etapa (ver perfil.Perfil).
+
+        Parámetros
+        ----------
+        historia : int, opcional
+            Número de llamadas recientes que se guardan por etapa, por omisión 256
+
+        Retorna
+        -------
+        Perfil
+            Perfil activo. Con perfil.desactivar() se deja de medir
+        """
+        return Perfil(self, historia).activar()
+
+    def exportar_estado(self):
+        """Estado completo de la simulación, para guardar un punto de control.
+
+        Retorna
+        -------
+        tuple
+            Metadatos serializables en JSON y diccionario nombre -> numpy.ndarray
+        """
+        version, estado_rng, gauss = self.rng.getstate()
+        meta = {
+            "motor": "python",
+            "parametros": punto_control.parametros(self),
+            "tick": self.tick,
+            "contadores": [self.n_sanos, self.n_infectados, self.n_recuperados, self.n_inoculados],
+            "series": {"inicio": self.series.inicio, "volcados": self.series.volcados},
+            "rng": [version, list(estado_rng), gauss],
+        }
+        arreglos = {
+            "x": np.array([persona.x for persona in self.personas], dtype=np.int32),
+            "y": np.array([persona.y for persona in self.personas], dtype=np.int32),
+            "estado": np.array([persona.estado for persona in self.personas], dtype=np.int8),
+            "dias_enfermo": np.array([persona.dias_enfermo for persona in self.personas], dtype=np.int16),
+            "inoculacion": np.array([persona.inoculacion for persona in self.personas], dtype=np.float64),
+            "vac_x": np.array([vacuna.x for vacuna in self.vacunas], dtype=np.int32),
+            "vac_y": np.array([vacuna.y for vacuna in self.vacunas], dtype=np.int32),
+            "vac_efectividad": np.array([vacuna.efectividad for vacuna in self.vacunas], dtype=np.float64),
+            "series": self.series.arreglo(),
+            "sin_vacuna": np.array(self.sin_vacuna, dtype=np.int64),
+        }
+        arreglos.update(punto_control.calendario_a_arreglos(self.recuperaciones))
+        return meta, arreglos
+
+    @classmethod
+    def desde_estado(cls, meta, arreglos):
+        """Reconstruir una simulación a partir de exportar_estado.
+
+        Parámetros
+        ----------
+        meta : dict
+            Metadatos
+        arreglos : dict
+            Diccionario nombre -> numpy.ndarray
+
+        Retorna
+        -------
+        Simulacion
+            Simulación en el mismo estado que la exportada
+        """
+        sim = cls.__new__(cls)
+        for nombre, valor in meta["parametros"].items():
+            setattr(sim, nombre, valor)
+        version, estado_rng, gauss = meta["rng"]
+        sim.rng = generador_py()
+        sim.rng.setstate((version, tuple(estado_rng), gauss))
+        sim.personas = [Persona(x, y, estado, False, dias_enfermo=dias) for x, y, estado, dias in zip(
+            arreglos["x"].tolist(), arreglos["y"].tolist(), arreglos["estado"].tolist(), arreglos["dias_enfermo"].tolist())]
+        for persona, inoculacion in zip(sim.personas, arreglos["inoculacion"].tolist()):
+            persona.inoculacion = inoculacion
+        sim.vacunas = [Vacuna(x, y, efect) for x, y, efect in zip(
+            arreglos["vac_x"].tolist(), arreglos["vac_y"].tolist(), arreglos["vac_efectividad"].tolist())]
+        sim.series = Series.desde_arreglo(arreglos["series"], sim.dias_simulacion, **meta["series"])
+        sim.n_sanos, sim.n_infectados, sim.n_recuperados, sim.n_inoculados = meta["contadores"]
+        sim.tick = meta["tick"]
+        sim.recuperaciones = {tick: np.concatenate(grupos).tolist()
+            for tick, grupos in punto_control.arreglos_a_calendario(arreglos).items()}
+        sim.sin_vacuna = arreglos["sin_vacuna"].tolist()
+        return sim
+
+    def clonar(self, rng=None):
+        """Copia independiente de la simulación, para explorar alternativas desde el estado actual.
+
+        Pasa por los arreglos de exportar_estado, que es mucho más rápido que
+        copy.deepcopy de cada Persona y Vacuna.
+
+        Parámetros
+        ----------
+        rng : random.Random, opcional
+            Generador de la copia. Por omisión, una copia del estado del generador
+            actual, por lo que la copia repite el futuro de la original
+
+        Retorna
+        -------
+        Simulacion
+            Simulación en el mismo estado, que no comparte objetos con esta
+        """
+        sim = type(self).desde_estado(*self.exportar_estado())
+        if rng is not None:
+            sim.rng = rng
+        return sim
+
+    def guardar(self, ruta):
+        """Guardar un punto de control binario (ver punto_control).
+
+        Parámetros
+        ----------
+        ruta : str
+            Ruta del archivo
+        """
+        punto_control.escribir(ruta, *self.exportar_estado())
+
+    @classmethod
+    def cargar(cls, ruta, mmap=True):
+        """Cargar una simulación desde un punto de control.
+
+        Parámetros
+        ----------
+        ruta : str
+            Ruta del archivo
+        mmap : bool, opcional
+            Mapear los arreglos en memoria en vez de leerlos, por omisión verdadero
+
+        Retorna
+        -------
+        Simulacion
+            Simulación restaurada, lista para continuar
+        """
+        return cls.desde_estado(*punto_control.leer(ruta, mmap))
+
+    def simular(self, hasta=None, punto_control=None, cada=100, saltar=False, **parametros_paso):
+        """Avanzar la simulación sin interfaz gráfica, guardando puntos de control.
+
+        Parámetros
+        ----------
+        hasta : int, opcional
+            Tick hasta el que se simula, por omisión dias_simulacion
+        punto_control : str, opcional
+            Archivo donde guardar los puntos de control. Se reemplaza cada vez
+        cada : int, opcional
+            Ticks entre puntos de control, por omisión 100
+        saltar : bool, opcional
+            Avanzar de una vez los periodos sin infectados en que nada más puede
+            cambiar (ver saltar), por omisión falso
+        parametros_paso : dict
+            Parámetros de paso (vel_per, umb_col, umb_con, umb_vac, modo)
+        """
+        if hasta is None:
+            hasta = self.dias_simulacion
+        while self.tick < hasta:
+            anterior = self.tick
+            if saltar and self.quieta():
+                self.saltar(hasta)
+            else:
+                self.paso(**parametros_paso)
+            if punto_control is not None and (self.tick // cada > anterior // cada or self.tick == hasta):
+                self.guardar(punto_control)
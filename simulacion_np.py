@@ -0,0 +1,885 @@
+import math
+from collections import OrderedDict
+import numpy as np
+from persona import Persona
+from aleatorio import SEMILLA, generador
+from series import Series
+import punto_control
+from perfil import Perfil
+
+# Funcion de distancia vectorizada
+def distancia_np(x1, y1, x2, y2, x_max=None, y_max=None):
+    """Distancia entre arreglos de puntos. Si se entregan x_max e y_max,
+    se utilizan las condiciones periódicas del dominio."""
+    dx = np.abs(x2 - x1).astype(np.float64)
+    dy = np.abs(y2 - y1).astype(np.float64)
+    if x_max is not None:
+        dx %= x_max
+        dy %= y_max
+        dx = np.minimum(dx, x_max - dx)
+        dy = np.minimum(dy, y_max - dy)
+    return np.sqrt(dx ** 2 + dy ** 2)
+
+def pares_cercanos(xa, ya, xb, yb, umbral, x_max, y_max, periodico=True, mismo=False, grupo_a=None, grupo_b=None,
+    grupos=1):
+    """Buscar los pares de puntos (a, b) a distancia menor o igual al umbral.
+
+    Los puntos b se ordenan en una grilla de celdas de tamaño al menos umbral
+    y cada punto a solo se compara con los puntos b de sus 9 celdas vecinas.
+    Con grupo_a y grupo_b solo se buscan pares del mismo grupo (por ejemplo,
+    de la misma réplica), usando una grilla distinta para cada grupo.
+
+    Parámetros
+    ----------
+    xa, ya : numpy.ndarray
+        Coordenadas de los puntos a
+    xb, yb : numpy.ndarray
+        Coordenadas de los puntos b
+    umbral : float
+        Distancia umbral
+    x_max : int
+        Ancho del dominio periódico
+    y_max : int
+        Alto del dominio periódico
+    periodico : bool, opcional
+        Medir la distancia con condiciones periódicas, por omisión verdadero
+    mismo : bool, opcional
+        Indica si a y b son el mismo conjunto, para excluir los pares (i, i)
+    grupo_a, grupo_b : numpy.ndarray, opcional
+        Grupo de cada punto a y de cada punto b, entre 0 y grupos - 1
+    grupos : int, opcional
+        Número de grupos, por omisión 1
+
+    Retorna
+    -------
+    tuple
+        Arreglos (ia, ib) con los índices de cada par
+    """
+    vacio = np.empty(0, dtype=np.int64)
+    if len(xa) == 0 or len(xb) == 0:
+        return vacio, vacio
+    # Celdas de la grilla
+    nx = max(1, int(x_max // umbral)) if umbral > 0 else 1
+    ny = max(1, int(y_max // umbral)) if umbral > 0 else 1
+    ancho = x_max / nx
+    alto = y_max / ny
+    # Celdas vecinas de cada punto a (sin repetir cuando hay menos de 3 celdas por eje)
+    cx = (xa // ancho).astype(np.int64)
+    cy = (ya // alto).astype(np.int64)
+    desp = np.array([-1, 0, 1])
+    vx = (cx[:, None, None] + desp[None, :, None]) % nx
+    vy = (cy[:, None, None] + desp[None, None, :]) % ny
+    vecinas = np.sort((vx + nx * vy).reshape(len(xa), 9), axis=1)
+    if grupo_a is not None:
+        vecinas += (nx * ny * grupo_a.astype(np.int64))[:, None]
+    repetida = np.zeros_like(vecinas, dtype=bool)
+    repetida[:, 1:] = vecinas[:, 1:] == vecinas[:, :-1]
+    # Celda de cada punto b. Si hay pocos puntos a, se descartan antes los puntos b
+    # que no están en ninguna celda vecina
+    cb = (xb // ancho).astype(np.int64) % nx + nx * ((yb // alto).astype(np.int64) % ny)
+    if grupo_b is not None:
+        cb += nx * ny * grupo_b.astype(np.int64)
+    celdas = nx * ny * grupos
+    if 64 * len(xa) < len(xb):
+        seleccion = np.flatnonzero(np.isin(cb, vecinas))
+        cb = cb[seleccion]
+    else:
+        seleccion = None
+    # Ordenar los puntos b según su celda
+    orden = np.argsort(cb, kind="stable")
+    cb = cb[orden]
+    if seleccion is not None:
+        orden = seleccion[orden]
+    # Rango de puntos b en cada celda vecina. Si la grilla no es mucho más grande que
+    # el número de puntos se usa una tabla por celda, si no búsqueda binaria
+    if celdas <= 16 * (len(xa) + len(cb)) + 1024:
+        conteo = np.bincount(cb, minlength=celdas)
+        inicio = (np.cumsum(conteo) - conteo)[vecinas]
+        cantidad = conteo[vecinas]
+    else:
+        inicio = np.searchsorted(cb, vecinas, side="left")
+        cantidad = np.searchsorted(cb, vecinas, side="right") - inicio
+    cantidad = np.where(repetida, 0, cantidad).ravel()
+    total = int(cantidad.sum())
+    if total == 0:
+        return vacio, vacio
+    # Expandir cada rango en la lista de pares candidatos
+    ia = np.repeat(np.repeat(np.arange(len(xa)), 9), cantidad)
+    desplazamiento = np.arange(total) - np.repeat(np.cumsum(cantidad) - cantidad, cantidad)
+    ib = orden[np.repeat(inicio.ravel(), cantidad) + desplazamiento]
+    # Filtrar por distancia
+    if periodico:
+        dist = distancia_np(xa[ia], ya[ia], xb[ib], yb[ib], x_max, y_max)
+    else:
+        dist = distancia_np(xa[ia], ya[ia], xb[ib], yb[ib])
+    cerca = dist <= umbral
+    if mismo:
+        cerca &= ia != ib
+    return ia[cerca], ib[cerca]
+
+# Memoria de los núcleos de contagio y sus transformadas, con desalojo de los usados hace más
+# tiempo cuando superan MEMORIA_NUCLEOS bytes (cada uno ocupa unos nx * ny * 8 bytes):
+# ("nucleo", umbral, separacion, nx, ny, ancho, alto) -> numpy.ndarray y
+# ("transformada", umbral, separacion, nx, ny, ancho, alto, inoculacion) -> numpy.ndarray
+MEMORIA_NUCLEOS = 256 * 2 ** 20
+_NUCLEOS = OrderedDict()
+_bytes_nucleos = 0
+
+def _memorizar(llave, calcular):
+    """Arreglo guardado con llave en _NUCLEOS, o calculado con calcular() y guardado"""
+    global _bytes_nucleos
+    if llave in _NUCLEOS:
+        _NUCLEOS.move_to_end(llave)
+        return _NUCLEOS[llave]
+    valor = _NUCLEOS[llave] = calcular()
+    _bytes_nucleos += valor.nbytes
+    while _bytes_nucleos > MEMORIA_NUCLEOS and len(_NUCLEOS) > 1: # Siempre se conserva el último
+        _, viejo = _NUCLEOS.popitem(last=False)
+        _bytes_nucleos -= viejo.nbytes
+    return valor
+
+def _nucleo(umbral, separacion, nx, ny, ancho, alto, puntos=8):
+    """Núcleo de contagio en una grilla periódica de nx x ny celdas de ancho x alto.
+
+    El valor en el desplazamiento (i, j) es la probabilidad de que dos puntos
+    uniformes en celdas separadas por (i, j) estén a distancia mayor que
+    separacion y menor o igual a umbral, calculada con puntos x puntos
+    posiciones por celda. Los desplazamientos llegan hasta la mitad de la
+    grilla, por lo que cada celda se cuenta una sola vez. Se guarda en _NUCLEOS.
+    """
+    def calcular():
+        # Diferencias entre posiciones dentro de dos celdas (en celdas) y su peso
+        dif = np.arange(1 - puntos, puntos) / puntos
+        peso = (puntos - np.abs(np.arange(1 - puntos, puntos))) / puntos ** 2
+        mx = min(math.ceil(umbral / ancho) + 1, (nx - 1) // 2)
+        my = min(math.ceil(umbral / alto) + 1, (ny - 1) // 2)
+        i = np.arange(-mx, mx + 1)
+        j = np.arange(-my, my + 1)
+        dx = (i[:, None] + dif[None, :]) * ancho # (desplazamiento, diferencia)
+        dy = (j[:, None] + dif[None, :]) * alto
+        d2 = dx[:, None, :, None] ** 2 + dy[None, :, None, :] ** 2
+        cerca = (d2 > separacion ** 2) & (d2 <= umbral ** 2)
+        nucleo = np.zeros((nx, ny))
+        nucleo[np.ix_(i % nx, j % ny)] = np.einsum("ijab,a,b->ij", cerca, peso, peso)
+        return nucleo
+    return _memorizar(("nucleo", umbral, separacion, nx, ny, ancho, alto), calcular)
+
+def prob_contagio(xa, ya, inoculacion, xb, yb, umbral, x_max, y_max, separacion=0, celda=None):
+    """Probabilidad aproximada de que cada punto a se contagie de algún punto b, en un dominio periódico.
+
+    Aproxima el contagio de pares_cercanos con un campo de densidad: los puntos
+    b se cuentan en una grilla periódica de celdas de lado cercano a celda, como
+    si estuvieran en posiciones uniformes dentro de sus celdas, pero nunca a
+    menos de separacion de un punto a (las personas no se acercan a menos del
+    umbral de colisión; sin esto el contagio se sobreestima). Un punto a en la
+    celda c escapa de cada punto b en la celda c' con probabilidad
+    1 - w(c' - c) * (1 - inoculacion), donde w es el núcleo de contagio (ver
+    _nucleo), por lo que el logaritmo de la probabilidad de escapar de todos es
+    la convolución (con FFT) de los conteos con log(1 - w * (1 - inoculacion)).
+    Si w es 1 (contacto seguro) queda 1 - inoculacion ** k, igual que en el
+    contagio exacto. Se calcula una convolución por cada valor distinto de
+    inoculacion, que son pocos (0 y la efectividad de cada vacuna).
+
+    Parámetros
+    ----------
+    xa, ya : numpy.ndarray
+        Coordenadas de los puntos a
+    inoculacion : numpy.ndarray
+        Inoculación de cada punto a
+    xb, yb : numpy.ndarray
+        Coordenadas de los puntos b
+    umbral : float
+        Distancia umbral
+    x_max, y_max : int
+        Ancho y alto del dominio periódico
+    separacion : float, opcional
+        Distancia mínima entre puntos a y b, por omisión 0
+    celda : float, opcional
+        Lado aproximado de las celdas, por omisión umbral / 2. Celdas más chicas
+        reducen el error a cambio de una grilla más grande
+
+    Retorna
+    -------
+    numpy.ndarray
+        Probabilidad de contagio de cada punto a
+    """
+    prob = np.zeros(len(xa))
+    if len(xa) == 0 or len(xb) == 0:
+        return prob
+    celda = celda or umbral / 2
+    nx = max(1, round(x_max / celda))
+    ny = max(1, round(y_max / celda))
+    ancho = x_max / nx
+    alto = y_max / ny
+    cb = ((xb % x_max) // ancho).astype(np.int64) % nx * ny + ((yb % y_max) // alto).astype(np.int64) % ny
+    densidad = np.fft.rfft2(np.bincount(cb, minlength=nx * ny).reshape(nx, ny).astype(float))
+    ca = ((xa % x_max) // ancho).astype(np.int64) % nx * ny + ((ya % y_max) // alto).astype(np.int64) % ny
+    valores, grupo = np.unique(inoculacion, return_inverse=True)
+    for g, inoc in enumerate(valores):
+        def calcular():
+            escape = 1 - _nucleo(umbral, separacion, nx, ny, ancho, alto) * (1 - inoc)
+            return np.fft.rfft2(np.log(np.maximum(escape, 1e-12)))
+        transformada = _memorizar(("transformada", umbral, separacion, nx, ny, ancho, alto, inoc), calcular)
+        campo = np.fft.irfft2(densidad * transformada, s=(nx, ny)).ravel()
+        miembros = grupo == g
+        prob[miembros] = -np.expm1(np.minimum(campo[ca[miembros]], 0)) # Sin el ruido positivo de la FFT
+    return prob
+
+def sortear(rng, sorteo, n, grupo=None):
+    """Sortear n números aleatorios, opcionalmente con un generador por grupo.
+
+    Con grupo, los elementos deben estar ordenados por grupo y cada grupo usa su
+    propio generador, de modo que los números de un grupo no dependen de los demás.
+
+    Parámetros
+    ----------
+    rng : numpy.random.Generator o list
+        Generador, o lista con un generador por grupo
+    sorteo : función
+        Función (generador, cantidad) -> numpy.ndarray
+    n : int
+        Cantidad de números
+    grupo : numpy.ndarray, opcional
+        Grupo de cada elemento, en orden creciente
+
+    Retorna
+    -------
+    numpy.ndarray
+        Un número por elemento
+    """
+    if grupo is None:
+        return sorteo(rng, n)
+    if n == 0:
+        return sorteo(rng[0], 0)
+    # Solo se llama a los generadores de los grupos con elementos
+    conteo = np.bincount(grupo, minlength=len(rng))
+    return np.concatenate([sorteo(rng[g], int(conteo[g])) for g in np.flatnonzero(conteo)])
+
+def mover_lote(x, y, vel, umbral, x_max, y_max, rng, max_intentos=10, grupo=None):
+    """Mover a todas las personas a la vez evitando colisiones.
+
+    Todas las personas proponen un movimiento aleatorio. Se aceptan los que no
+    chocan con otra persona (sin contarse a sí misma) ni con otro movimiento
+    aceptado, y el resto vuelve a intentarlo. Después de max_intentos la
+    persona se queda en su lugar. Los arreglos x e y se modifican en el lugar.
+
+    Parámetros
+    ----------
+    x, y : numpy.ndarray
+        Coordenadas de las personas
+    vel : int
+        Distancia de movimiento
+    umbral : float
+        Umbral de colisión
+    x_max : int
+        Ancho del dominio periódico
+    y_max : int
+        Alto del dominio periódico
+    rng : numpy.random.Generator o list
+        Generador de números aleatorios, o uno por grupo si se entrega grupo
+    max_intentos : int, opcional
+        Número máximo de intentos por persona, por omisión 10
+    grupo : numpy.ndarray, opcional
+        Grupo (réplica) de cada persona, en orden creciente. Las personas solo
+        chocan con las de su mismo grupo
+    """
+    grupos = 1 if grupo is None else len(rng)
+    pendientes = np.arange(len(x))
+    for _ in range(max_intentos):
+        if len(pendientes) == 0:
+            break
+        # Movimiento aleatorio con condiciones periodicas
+        grupo_p = None if grupo is None else grupo[pendientes]
+        paso = lambda generador, n: generador.integers(-vel, vel, size=n, endpoint=True)
+        tmp_x = (x[pendientes] + sortear(rng, paso, len(pendientes), grupo_p)) % x_max
+        tmp_y = (y[pendientes] + sortear(rng, paso, len(pendientes), grupo_p)) % y_max
+        # Colisiones con las posiciones actuales de las demás personas
+        ia, ib = pares_cercanos(tmp_x, tmp_y, x, y, umbral, x_max, y_max, periodico=False,
+            grupo_a=grupo_p, grupo_b=grupo, grupos=grupos)
+        choque = np.zeros(len(pendientes), dtype=bool)
+        choque[ia[pendientes[ia] != ib]] = True
+        # Colisiones entre los movimientos propuestos. Se acepta el de menor índice
+        libres = np.flatnonzero(~choque)
+        grupo_l = None if grupo is None else grupo_p[libres]
+        ia, ib = pares_cercanos(tmp_x[libres], tmp_y[libres], tmp_x[libres], tmp_y[libres],
+            umbral, x_max, y_max, periodico=False, mismo=True, grupo_a=grupo_l, grupo_b=grupo_l, grupos=grupos)
+        choque[libres[ia[ia > ib]]] = True
+        # Actualizar posiciones aceptadas
+        ok = ~choque
+        x[pendientes[ok]] = tmp_x[ok]
+        y[pendientes[ok]] = tmp_y[ok]
+        pendientes = pendientes[choque]
+
+
+def _propiedad(arreglo):
+    """Propiedad que lee y escribe el elemento i del arreglo de la simulación"""
+    def leer(self):
+        return getattr(self._sim, arreglo)[self._i].item()
+    def escribir(self, valor):
+        getattr(self._sim, arreglo)[self._i] = valor
+    return property(leer, escribir)
+
+class PersonaVista:
+    """Vista de una persona almacenada en los arreglos de SimulacionNP"""
+    x = _propiedad("x")
+    y = _propiedad("y")
+    estado = _propiedad("estado")
+    inoculacion = _propiedad("inoculacion")
+    dias_enfermo = _propiedad("dias_enfermo")
+    vacuna = False
+    mostrar_persona = Persona.mostrar_persona
+
+    def __init__(self, sim, i):
+        self._sim = sim
+        self._i = i
+
+class VacunaVista:
+    """Vista de una vacuna almacenada en los arreglos de SimulacionNP"""
+    x = _propiedad("vac_x")
+    y = _propiedad("vac_y")
+    efectividad = _propiedad("vac_efectividad")
+
+    def __init__(self, sim, i):
+        self._sim = sim
+        self._i = i
+
+class Vista:
+    """Secuencia de vistas de agentes, compatible con las listas de Simulacion"""
+
+    def __init__(self, sim, clase, largo):
+        self._sim = sim
+        self._clase = clase
+        self._largo = largo
+
+    def __len__(self):
+        return self._largo
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._largo
+        if not 0 <= i < self._largo:
+            raise IndexError(i)
+        return self._clase(self._sim, i)
+
+    def __iter__(self):
+        for i in range(self._largo):
+            yield self._clase(self._sim, i)
+
+class SimulacionNP:
+    """Clase para controlar la simulación usando arreglos de NumPy.
+
+    Tiene la misma interfaz que Simulacion, pero guarda a la población en arreglos
+    contiguos (x, y, estado, inoculacion, dias_enfermo) y ejecuta cada etapa de forma
+    vectorizada. Las etapas se aplican a toda la población a la vez, por lo que los
+    resultados no son idénticos a los de Simulacion. Tampoco tienen exactamente la
+    misma distribución: el contagio no se propaga dentro de un mismo tick (ver
+    revisar_contagio), aunque en el mundo del juego la diferencia es menor que el
+    error de muestreo.
+    """
+
+    def __init__(self, poblacion, vacunas, dias_simulacion, x_min, x_max, y_min, y_max,
+        porc_infectados=0.1, prob_vacuna=0.5, prob_reb=0.5, semilla=SEMILLA, replica=None, rng=None):
+        """Constructor de la simulación
+
+        Parámetros
+        ----------
+        poblacion : int
+            Número de personas en la simulación
+        vacunas : int
+            Número de vacunas en la simulación
+        dias_simulacion : int
+            Días de duración de simulación
+        x_min : int
+            Frontera izquierda del dominio
+        x_max : int
+            Frontera derecha del dominio
+        y_min : int
+            Frontera inferior del dominio
+        y_max : int
+            Frontera superior del dominio
+        porc_infectados : float, opcional
+            Porcentaje inicial de infectads, por omisión 10%
+        prob_vacuna : float, opcional
+            Probabilidad de que una persona se vacune, por omisión 50%
+        prob_reb : float, opcional
+            Probabilidad de rebrote, por omisión 50%
+        semilla : int, opcional
+            Semilla del generador de números aleatorios, por omisión 12345
+        replica : int, opcional
+            Identificador de la réplica. Cada par (semilla, replica) tiene su propio flujo
+        rng : numpy.random.Generator, opcional
+            Generador de números aleatorios. Si se entrega, se ignoran semilla y replica
+        """
+        self.poblacion = poblacion
+        self.dias_simulacion = dias_simulacion
+        self.x_min = x_min
+        self.x_max = x_max
+        self.y_min = y_min
+        self.y_max = y_max
+        self.porc_infectados = porc_infectados
+        self.prob_vacuna = prob_vacuna # Probabilidad que una persona se vacune
+        self.prob_reb = prob_reb # Probabilidad de rebrote
+        self.rng = rng if rng is not None else generador(semilla, replica) # Generador de números aleatorios
+        self.series = Series(dias_simulacion) # Número de sanos, infectados, recuperados y vacunados por dia
+
+        # Crear personas #
+        self.x = self.rng.integers(x_min, x_max, size=poblacion, endpoint=True, dtype=np.int32)
+        self.y = self.rng.integers(y_min, y_max, size=poblacion, endpoint=True, dtype=np.int32)
+        self.estado = (self.rng.random(poblacion) < porc_infectados).astype(np.int8)
+        self.dias_enfermo = self.rng.integers(28, 50, size=poblacion, endpoint=True, dtype=np.int16)
+        self.inoculacion = np.zeros(poblacion)
+
+        # Crear vacunas. Eficacia aleatoria entre 60% y 95% #
+        self.vac_x = self.rng.integers(x_min, x_max, size=vacunas, endpoint=True, dtype=np.int32)
+        self.vac_y = self.rng.integers(y_min, y_max, size=vacunas, endpoint=True, dtype=np.int32)
+        self.vac_efectividad = self.rng.uniform(0.6, 0.95, size=vacunas)
+
+        # Contadores de personas por estado, actualizados en cada cambio de estado
+        self.n_infectados = int(np.count_nonzero(self.estado == 1))
+        self.n_sanos = poblacion - self.n_infectados
+        self.n_recuperados = 0
+        self.n_inoculados = 0
+
+        # Calendario de recuperaciones: tick -> lista de arreglos de índices
+        self.tick = 0 # Pasos de 12 horas simulados (llamadas a estadisticas)
+        self.recuperaciones = {}
+        infectados = np.flatnonzero(self.estado == 1)
+        self.programar_recuperacion(infectados, self.dias_enfermo[infectados].astype(np.int64) - 1)
+
+        # Índices de las personas sin inoculacion. Se reduce a medida que avanza la vacunación
+        self.sin_vacuna = np.arange(poblacion)
+
+        # Vistas para mantener la interfaz de listas de Simulacion
+        self.personas = Vista(self, PersonaVista, poblacion)
+        self.vacunas = Vista(self, VacunaVista, vacunas)
+
+    def programar_recuperacion(self, indices, ticks):
+        """Agendar la recuperación de varias personas.
+
+        Parámetros
+        ----------
+        indices : numpy.ndarray
+            Índices de las personas
+        ticks : numpy.ndarray
+            Tick en que cada persona pasa a recuperada (en estadisticas)
+        """
+        for tick in np.unique(ticks):
+            self.recuperaciones.setdefault(int(tick), []).append(indices[ticks == tick])
+
+    @property
+    def sanos(self):
+        """Número de sanos por dia"""
+        return self.series.serie("sanos")
+
+    @property
+    def infectados(self):
+        """Número de infectados por dia"""
+        return self.series.serie("infectados")
+
+    @property
+    def recuperados(self):
+        """Número de recuperados por dia"""
+        return self.series.serie("recuperados")
+
+    @property
+    def inoculados(self):
+        """Número de vacunados por dia"""
+        return self.series.serie("inoculados")
+
+    def mostrar_personas(self):
+        """Mostrar informacion de personas"""
+        for persona in self.personas:
+            persona.mostrar_persona()
+
+    def revisar_colision(self, x, y, umbral):
+        """Revisar si existen colisiones entre las personas y la posición (x, y).
+
+        Parámetros
+        ----------
+        x : int
+            Coordenada x
+        y : int
+            Coordenada y
+        umbral : float
+            Umbral para revisar la colisión
+
+        Retorna
+        -------
+        boolean
+            Devuelve verdadero si existen colisiones y falso en caso contrario
+        """
+        return bool(np.any(distancia_np(x, y, self.x, self.y) <= umbral))
+
+    def mover_personas(self, vel=5, umbral=5, modo="lote", max_intentos=10):
+        """Simulación de movimiento de las personas
+
+        Parámetros
+        ----------
+        vel : int, opcional
+            Distancia de movimiento, por omisión 5
+        umbral : float, opcional
+            Umbral de colisión, por omisión 5
+        modo : str, opcional
+            Se acepta por compatibilidad con Simulacion. Siempre se resuelven
+            todos los movimientos a la vez (ver mover_lote)
+        max_intentos : int, opcional
+            Número máximo de intentos por persona, por omisión 10
+        """
+        mover_lote(self.x, self.y, vel, umbral, self.x_max, self.y_max, self.rng, max_intentos)
+
+    def mover_vacunas(self, vel=5):
+        """Simulación de movimiento de las vacunas
+
+        Parámetros
+        ----------
+        vel : int, opcional
+            Distancia de movimiento, por omisión 5
+        """
+        n = len(self.vac_x)
+        self.vac_x = (self.vac_x + self.rng.integers(-vel, vel, size=n, endpoint=True)).astype(np.int32) % self.x_max
+        self.vac_y = (self.vac_y + self.rng.integers(-vel, vel, size=n, endpoint=True)).astype(np.int32) % self.y_max
+
+    def revisar_contagio(self, umbral=10.0, contagio="exacto", separacion=0):
+        """Simular el contagio de personas.
+
+        Cada persona sana con k infectados a distancia umbral se contagia con
+        probabilidad 1 - inoculacion ** k. Solo cuentan los infectados al inicio
+        del tick: a diferencia de Simulacion, donde una persona contagiada en el
+        tick puede contagiar a las siguientes en el mismo tick, aquí el contagio
+        dentro de un tick no se propaga hasta el tick siguiente.
+
+        Con contagio "densidad" la probabilidad se aproxima con un campo de
+        densidad de los infectados (ver prob_contagio). Es aproximado, pero su
+        costo no depende del número de pares cercanos (ver README para el error).
+
+        Parámetros
+        ----------
+        umbral : double, opcional
+            Distancia umbral para contagio, por omisión 10.0
+        contagio : str, opcional
+            "exacto" (pares cercanos) o "densidad" (campo de densidad), por omisión "exacto"
+        separacion : float, opcional
+            Distancia mínima entre personas con contagio "densidad" (el umbral
+            de colisión), por omisión 0
+        """
+        # Sin infectados no hay contagios
+        if self.n_infectados == 0:
+            return
+        sanos = np.flatnonzero(self.estado == 0)
+        infectados = np.flatnonzero(self.estado == 1)
+        if contagio == "densidad":
+            prob = prob_contagio(self.x[sanos], self.y[sanos], self.inoculacion[sanos], self.x[infectados],
+                self.y[infectados], umbral, self.x_max, self.y_max, separacion)
+            expuestos = sanos[prob > 1e-12]
+            prob = prob[prob > 1e-12]
+        elif contagio == "exacto":
+            ia, _ = pares_cercanos(self.x[sanos], self.y[sanos], self.x[infectados], self.y[infectados],
+                umbral, self.x_max, self.y_max)
+            # Número de infectados cerca de cada persona sana
+            k = np.bincount(ia, minlength=len(sanos))
+            expuestos = sanos[k > 0]
+            prob = 1 - self.inoculacion[expuestos] ** k[k > 0]
+        else:
+            raise ValueError("contagio desconocido: %r" % contagio)
+        contagiados = expuestos[self.rng.random(len(expuestos)) <= prob]
+        self.estado[contagiados] = 1 # Cambio a estado infectado
+        # Se recuperan después de dias_enfermo ticks, contando el actual
+        self.programar_recuperacion(contagiados, self.tick + self.dias_enfermo[contagiados].astype(np.int64) - 1)
+        self.n_sanos -= len(contagiados)
+        self.n_infectados += len(contagiados)
+
+    def revisar_vacunacion(self, umbral=10.0):
+        """Simular el proceso de vacunación.
+
+        Parámetros
+        ----------
+        umbral : double, optional
+            Distancia umbral para vacunación, por omisión 10.0
+        """
+        # Solo las personas sin inoculacion pueden vacunarse
+        candidatos = self.sin_vacuna = self.sin_vacuna[self.inoculacion[self.sin_vacuna] == 0]
+        ia, ib = pares_cercanos(self.x[candidatos], self.y[candidatos], self.vac_x, self.vac_y,
+            umbral, self.x_max, self.y_max, periodico=False)
+        # Cada par se vacuna con probabilidad prob_vacuna y vale la primera vacuna de cada persona
+        orden = np.lexsort((ib, ia))
+        ia = ia[orden]
+        ib = ib[orden]
+        exito = self.rng.random(len(ia)) <= self.prob_vacuna
+        ia = ia[exito]
+        ib = ib[exito]
+        ia, primera = np.unique(ia, return_index=True)
+        self.inoculacion[candidatos[ia]] += self.vac_efectividad[ib[primera]]
+        self.n_inoculados += len(ia)
+        self.sin_vacuna = np.delete(candidatos, ia)
+
+    def rebrote(self, porc=0.02):
+        """Simular rebrote de virus
+
+        Parametros
+        ----------
+        porc : double, opcional
+            Porcentaje de rebrote, por omisión 5%
+        """
+        n = math.ceil(self.poblacion * porc)
+        candidatos = np.flatnonzero((self.estado == 0) & (self.inoculacion == 0))[:n]
+        self.estado[candidatos] = 1 # Infectado
+        self.dias_enfermo[candidatos] = self.rng.integers(28, 50, size=len(candidatos), endpoint=True) # Nuevos días enfermo
+        self.programar_recuperacion(candidatos, self.tick + self.dias_enfermo[candidatos].astype(np.int64))
+        self.n_sanos -= len(candidatos)
+        self.n_infectados += len(candidatos)
+
+    def estadisticas(self):
+        """Obtención de estadísticas y actualización de estados"""
+        # Agregar estadisticas. Los contadores se actualizan en cada cambio de estado
+        infectados = self.n_infectados
+        self.series.agregar(self.n_sanos, self.n_infectados, self.n_recuperados, self.n_inoculados)
+        # Recuperar a los infectados que terminan sus días enfermos en este tick
+        grupos = self.recuperaciones.pop(self.tick, None)
+        if grupos:
+            recuperados = np.concatenate(grupos)
+            self.estado[recuperados] = 2 # Recuperado
+            self.dias_enfermo[recuperados] = 0
+            self.n_infectados -= len(recuperados)
+            self.n_recuperados += len(recuperados)
+        # Rebrote
+        if infectados == 0 and self.rng.random() <= self.prob_reb:
+            self.rebrote()
+        self.tick += 1
+
+    def inmunidad_alcanzada(self):
+        """Indica si no quedan sanos ni infectados, por lo que ya no puede haber contagios ni rebrotes"""
+        return self.n_sanos == 0 and self.n_infectados == 0
+
+    def puede_rebrotar(self):
+        """Indica si hay personas sanas sin inoculacion, las únicas que pueden infectarse en un rebrote"""
+        return self.n_sanos > 0 and bool(np.any((self.estado == 0) & (self.inoculacion == 0)))
+
+    def puede_vacunar(self):
+        """Indica si la vacunación todavía puede cambiar a alguna persona"""
+        return len(self.vacunas) > 0 and self.prob_vacuna > 0 and bool(np.any(self.inoculacion[self.sin_vacuna] == 0))
+
+    def quieta(self):
+        """Indica si hasta el próximo rebrote solo pueden cambiar las posiciones.
+
+        No hay infectados (por lo que no hay contagios ni recuperaciones) y la
+        vacunación no puede cambiar a nadie.
+        """
+        return self.n_infectados == 0 and not self.puede_vacunar()
+
+    def terminada(self):
+        """Indica si las estadísticas ya no pueden cambiar: está quieta y no puede haber rebrotes"""
+        return self.quieta() and not (self.prob_reb > 0 and self.puede_rebrotar())
+
+    def saltar(self, hasta):
+        """Avanzar de una vez una simulación quieta (ver quieta) hasta el próximo rebrote.
+
+        En cada tick sin infectados hay un rebrote con probabilidad prob_reb, por lo
+        que el tick del próximo rebrote se sortea con una distribución geométrica. Los
+        ticks intermedios repiten las estadísticas y el rebrote se aplica igual que en
+        estadisticas. Las posiciones no se actualizan durante el salto: después de
+        muchos ticks de movimiento aleatorio quedan distribuidas en forma
+        aproximadamente uniforme, igual que antes del salto.
+
+        Parámetros
+        ----------
+        hasta : int
+            Tick máximo. Si el rebrote ocurre después, se avanza solo hasta este tick
+        """
+        restantes = hasta - self.tick
+        if restantes <= 0:
+            return
+        if self.prob_reb > 0 and self.puede_rebrotar():
+            espera = int(self.rng.geometric(self.prob_reb))
+        else:
+            espera = restantes + 1 # Sin rebrotes posibles
+        contadores = (self.n_sanos, self.n_infectados, self.n_recuperados, self.n_inoculados)
+        if espera > restantes:
+            self.series.agregar(*contadores, veces=restantes)
+            self.tick = hasta
+            return
+        # Ticks sin cambios hasta el tick del rebrote, que se agrega antes del rebrote igual que en estadisticas
+        self.series.agregar(*contadores, veces=espera)
+        self.tick += espera - 1
+        self.rebrote()
+        self.tick += 1
+
+    def paso(self, vel_per=10, umb_col=11, umb_con=15, umb_vac=30, modo="indexado", contagio="exacto"):
+        """Avanzar la simulación en 12 horas, con las mismas etapas del juego.
+
+        Parámetros
+        ----------
+        vel_per : int, opcional
+            Velocidad de movimiento de las personas (pixeles / tick), por omisión 10
+        umb_col : float, opcional
+            Umbral de colisión, por omisión 11
+        umb_con : float, opcional
+            Umbral de contagio, por omisión 15
+        umb_vac : float, opcional
+            Umbral de vacunación, por omisión 30
+        modo : str, opcional
+            Modo de resolver las colisiones (ver mover_personas), por omisión "indexado"
+        contagio : str, opcional
+            "exacto" o "densidad" (ver revisar_contagio), por omisión "exacto"
+        """
+        self.mover_personas(vel_per, umb_col, modo=modo) # Movimiento aleatorio de personas
+        self.revisar_contagio(umb_con, contagio, umb_col) # Simular el contagio
+        self.revisar_vacunacion(umb_vac) # Simular el proceso de vacunación
+        self.estadisticas() # Obtención de estadísticas
+
+    def perfilar(self, historia=256):
+        """Empezar a medir el tiempo de cada etapa (ver perfil.Perfil).
+
+        Parámetros
+        ----------
+        historia : int, opcional
+            Número de llamadas recientes que se guardan por etapa, por omisión 256
+
+        Retorna
+        -------
+        Perfil
+            Perfil activo. Con perfil.desactivar() se deja de medir
+        """
+        return Perfil(self, historia).activar()
+
+    def exportar_estado(self):
+        """Estado completo de la simulación, para guardar un punto de control.
+
+        Retorna
+        -------
+        tuple
+            Metadatos serializables en JSON y diccionario nombre -> numpy.ndarray
+        """
+        meta = {
+            "motor": "numpy",
+            "parametros": punto_control.parametros(self),
+            "tick": self.tick,
+            "contadores": [self.n_sanos, self.n_infectados, self.n_recuperados, self.n_inoculados],
+            "series": {"inicio": self.series.inicio, "volcados": self.series.volcados},
+            "rng": self.rng.bit_generator.state,
+        }
+        arreglos = {
+            "x": self.x,
+            "y": self.y,
+            "estado": self.estado,
+            "dias_enfermo": self.dias_enfermo,
+            "inoculacion": self.inoculacion,
+            "vac_x": self.vac_x,
+            "vac_y": self.vac_y,
+            "vac_efectividad": self.vac_efectividad,
+            "series": self.series.arreglo(),
+            "sin_vacuna": self.sin_vacuna,
+        }
+        arreglos.update(punto_control.calendario_a_arreglos(self.recuperaciones))
+        return meta, arreglos
+
+    @classmethod
+    def desde_estado(cls, meta, arreglos):
+        """Reconstruir una simulación a partir de exportar_estado.
+
+        Los arreglos se usan directamente, sin copiar. Si vienen de un archivo
+        mapeado en memoria, las personas se leen del disco solo al usarse.
+
+        Parámetros
+        ----------
+        meta : dict
+            Metadatos
+        arreglos : dict
+            Diccionario nombre -> numpy.ndarray
+
+        Retorna
+        -------
+        SimulacionNP
+            Simulación en el mismo estado que la exportada
+        """
+        sim = cls.__new__(cls)
+        for nombre, valor in meta["parametros"].items():
+            setattr(sim, nombre, valor)
+        sim.rng = np.random.Generator(getattr(np.random, meta["rng"]["bit_generator"])())
+        sim.rng.bit_generator.state = meta["rng"]
+        for nombre in ("x", "y", "estado", "dias_enfermo", "inoculacion", "vac_x", "vac_y", "vac_efectividad", "sin_vacuna"):
+            setattr(sim, nombre, arreglos[nombre])
+        sim.series = Series.desde_arreglo(arreglos["series"], sim.dias_simulacion, **meta["series"])
+        sim.n_sanos, sim.n_infectados, sim.n_recuperados, sim.n_inoculados = meta["contadores"]
+        sim.tick = meta["tick"]
+        sim.recuperaciones = punto_control.arreglos_a_calendario(arreglos)
+        sim.personas = Vista(sim, PersonaVista, sim.poblacion)
+        sim.vacunas = Vista(sim, VacunaVista, len(sim.vac_x))
+        return sim
+
+    def clonar(self, rng=None):
+        """Copia independiente de la simulación, para explorar alternativas desde el estado actual.
+
+        Copia los arreglos de exportar_estado, sin crear objetos por persona.
+
+        Parámetros
+        ----------
+        rng : numpy.random.Generator, opcional
+            Generador de la copia. Por omisión, una copia del estado del generador
+            actual, por lo que la copia repite el futuro de la original
+
+        Retorna
+        -------
+        SimulacionNP
+            Simulación en el mismo estado, que no comparte memoria con esta
+        """
+        meta, arreglos = self.exportar_estado()
+        sim = type(self).desde_estado(meta, {nombre: arreglo.copy() for nombre, arreglo in arreglos.items()})
+        if rng is not None:
+            sim.rng = rng
+        return sim
+
+    def guardar(self, ruta):
+        """Guardar un punto de control binario (ver punto_control).
+
+        Parámetros
+        ----------
+        ruta : str
+            Ruta del archivo
+        """
+        punto_control.escribir(ruta, *self.exportar_estado())
+
+    @classmethod
+    def cargar(cls, ruta, mmap=True):
+        """Cargar una simulación desde un punto de control.
+
+        Parámetros
+        ----------
+        ruta : str
+            Ruta del archivo
+        mmap : bool, opcional
+            Mapear los arreglos en memoria (copia al escribir) en vez de leerlos, por omisión verdadero
+
+        Retorna
+        -------
+        SimulacionNP
+            Simulación restaurada, lista para continuar
+        """
+        return cls.desde_estado(*punto_control.leer(ruta, mmap))
+
+    def simular(self, hasta=None, punto_control=None, cada=100, saltar=False, **parametros_paso):
+        """Avanzar la simulación sin interfaz gráfica, guardando puntos de control.
+
+        Parámetros
+        ----------
+        hasta : int, opcional
+            Tick hasta el que se simula, por omisión dias_simulacion
+        punto_control : str, opcional
+            Archivo donde guardar los puntos de control. Se reemplaza cada vez
+        cada : int, opcional
+            Ticks entre puntos de control, por omisión 100
+        saltar : bool, opcional
+            Avanzar de una vez los periodos sin infectados en que nada más puede
+            cambiar (ver saltar), por omisión falso
+        parametros_paso : dict
+            Parámetros de paso (vel_per, umb_col, umb_con, umb_vac, modo)
+        """
+        if hasta is None:
+            hasta = self.dias_simulacion
+        while self.tick < hasta:
+            anterior = self.tick
+            if saltar and self.quieta():
+                self.saltar(hasta)
+            else:
+                self.paso(**parametros_paso)
+            if punto_control is not None and (self.tick // cada > anterior // cada or self.tick == hasta):
+                self.guardar(punto_control)
@@ -0,0 +1,516 @@
+"""Simulación con el dominio dividido en franjas, una por proceso.
+
+SimulacionParalela reparte a las personas entre procesos de trabajo según su
+coordenada x: el proceso k es dueño de la franja
+k * x_max / procesos <= x < (k + 1) * x_max / procesos del dominio periódico.
+En cada paso cada proceso solo intercambia datos con sus dos vecinos:
+
+* el halo, es decir, las personas a menos del alcance de una etapa de su borde
+  (2 * vel_per + umb_col en cada intento de movimiento, umb_con en el contagio), y
+* las personas que al moverse cruzan el borde, que pasan al vecino con todos sus datos.
+
+Cada proceso mueve, contagia y vacuna a sus personas con su propio generador.
+El proceso principal suma los contadores de estadisticas, sortea los rebrotes y
+guarda las series. Las etapas siguen las reglas de SimulacionNP (en el
+movimiento, el choque entre dos propuestas lo gana la persona de menor índice),
+por lo que los resultados son equivalentes en distribución a los de
+SimulacionNP, pero no idénticos, y dependen del número de procesos. Como en
+SimulacionNP, el contagio solo considera a los infectados al inicio de cada
+tick, a diferencia de Simulacion (ver SimulacionNP.revisar_contagio).
+
+Ejemplo::
+
+    with SimulacionParalela(1000000, 1, 2000, 0, 50000, 0, 30000, procesos=8) as sim:
+        sim.simular(vel_per=10, umb_col=11, umb_con=15, umb_vac=30)
+        print(sim.infectados.max())
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from aleatorio import SEMILLA
+from simulacion_np import SimulacionNP, VacunaVista, Vista, pares_cercanos
+
+# Datos de cada persona que viajan con ella al cambiar de franja.
+# recupera es el tick de su recuperación (-1 si no está infectada)
+CAMPOS = ("id", "x", "y", "estado", "inoculacion", "dias_enfermo", "recupera")
+
+def dueno(x, x_max, procesos):
+    """Franja (proceso) dueña de cada coordenada x, con condiciones periódicas"""
+    return (np.asarray(x, dtype=np.int64) * procesos // x_max) % procesos
+
+class Franja:
+    """Personas de una franja del dominio, en un proceso de trabajo"""
+
+    def __init__(self, k, procesos, x_max, y_max, prob_vacuna, vac_efectividad, rng, datos,
+        entradas, suma, barrera):
+        """Constructor de la franja
+
+        Parámetros
+        ----------
+        k : int
+            Índice de la franja
+        procesos : int
+            Número de franjas
+        x_max, y_max : int
+            Tamaño del dominio periódico
+        prob_vacuna : float
+            Probabilidad de que una persona se vacune
+        vac_efectividad : numpy.ndarray
+            Efectividad de cada vacuna
+        rng : numpy.random.Generator
+            Generador de números aleatorios de la franja
+        datos : dict
+            Arreglos de CAMPOS con las personas de la franja
+        entradas : list
+            Por franja, las colas de mensajes de su vecino izquierdo y derecho
+        suma : multiprocessing.RawArray
+            Arreglo compartido de 2 * procesos enteros para las sumas globales
+        barrera : multiprocessing.Barrier
+            Barrera de todos los procesos de trabajo
+        """
+        self.k = k
+        self.procesos = procesos
+        self.x_max = x_max
+        self.y_max = y_max
+        self.prob_vacuna = prob_vacuna
+        self.vac_efectividad = vac_efectividad
+        self.rng = rng
+        for campo in CAMPOS:
+            setattr(self, campo, datos[campo])
+        self.borde_izq = k * x_max / procesos
+        self.borde_der = (k + 1) * x_max / procesos
+        # Mensajes que llegan de cada vecino y colas donde se envían
+        self.entrada_izq, self.entrada_der = entradas[k]
+        self.salida_izq = entradas[(k - 1) % procesos][1]
+        self.salida_der = entradas[(k + 1) % procesos][0]
+        self.suma = np.frombuffer(suma, dtype=np.int64)
+        self.barrera = barrera
+        self.ronda = 0 # Sumas globales realizadas
+
+    def __len__(self):
+        return len(self.id)
+
+    def sumar(self, valor):
+        """Suma de un valor entre todas las franjas.
+
+        Cada suma usa una mitad distinta del arreglo compartido que la anterior,
+        por lo que basta una barrera: ninguna franja puede escribir la suma
+        siguiente en la misma mitad antes de que todas hayan leído esta.
+        """
+        if self.procesos == 1:
+            return valor
+        mitad = self.ronda % 2 * self.procesos
+        self.ronda += 1
+        self.suma[mitad + self.k] = valor
+        self.barrera.wait()
+        return int(self.suma[mitad:mitad + self.procesos].sum())
+
+    def intercambiar(self, a_izq, a_der):
+        """Enviar un mensaje a cada vecino y recibir el de cada uno.
+
+        Retorna
+        -------
+        tuple
+            Mensajes del vecino izquierdo y del derecho
+        """
+        self.salida_izq.put(a_izq)
+        self.salida_der.put(a_der)
+        return self.entrada_izq.get(), self.entrada_der.get()
+
+    def halo(self, indices, alcance, *arreglos):
+        """Intercambiar con los vecinos los datos de las personas cerca de los bordes.
+
+        Parámetros
+        ----------
+        indices : numpy.ndarray
+            Índices (locales) de las personas que se pueden enviar
+        alcance : float
+            Distancia máxima al borde
+        arreglos : numpy.ndarray
+            Arreglos a enviar, uno por cada índice
+
+        Retorna
+        -------
+        list
+            Por cada arreglo, la concatenación de los recibidos de ambos vecinos
+        """
+        if self.procesos == 1:
+            return [arreglo[:0] for arreglo in arreglos]
+        # Posición relativa al centro de la franja, con condiciones periódicas, ya que
+        # durante el movimiento las personas pueden estar fuera de su franja
+        ancho = self.borde_der - self.borde_izq
+        relativa = (self.x[indices] - self.borde_izq - ancho / 2 + self.x_max / 2) % self.x_max - self.x_max / 2
+        izq = relativa + ancho / 2 <= alcance
+        der = ancho / 2 - relativa <= alcance
+        de_izq, de_der = self.intercambiar([a[izq] for a in arreglos], [a[der] for a in arreglos])
+        return [np.concatenate(par) for par in zip(de_izq, de_der)]
+
+    def mover(self, vel, umbral, max_intentos=10):
+        """Mover a las personas de la franja evitando colisiones (ver simulacion_np.mover_lote).
+
+        En cada intento los choques con personas de las franjas vecinas se
+        revisan con el halo de sus posiciones actuales y de sus propuestas libres.
+        """
+        alcance = 2 * vel + umbral
+        pendientes = np.arange(len(self))
+        for _ in range(max_intentos):
+            if self.sumar(len(pendientes)) == 0:
+                break
+            tmp_x = (self.x[pendientes] + self.rng.integers(-vel, vel, size=len(pendientes), endpoint=True)) % self.x_max
+            tmp_y = (self.y[pendientes] + self.rng.integers(-vel, vel, size=len(pendientes), endpoint=True)) % self.y_max
+            # Colisiones con las posiciones actuales de las demás personas, propias y del halo
+            todos = np.arange(len(self))
+            hx, hy = self.halo(todos, alcance, self.x, self.y)
+            ia, ib = pares_cercanos(tmp_x, tmp_y, np.concatenate([self.x, hx]), np.concatenate([self.y, hy]),
+                umbral, self.x_max, self.y_max, periodico=False)
+            choque = np.zeros(len(pendientes), dtype=bool)
+            choque[ia[pendientes[ia] != ib]] = True
+            # Colisiones entre los movimientos propuestos libres. Se acepta el de menor índice global
+            libres = np.flatnonzero(~choque)
+            hid, htx, hty = self.halo(pendientes[libres], alcance, self.id[pendientes[libres]], tmp_x[libres],
+                tmp_y[libres])
+            ids = np.concatenate([self.id[pendientes[libres]], hid])
+            ia, ib = pares_cercanos(tmp_x[libres], tmp_y[libres], np.concatenate([tmp_x[libres], htx]),
+                np.concatenate([tmp_y[libres], hty]), umbral, self.x_max, self.y_max, periodico=False)
+            choque[libres[ia[ids[ia] > ids[ib]]]] = True
+            # Actualizar posiciones aceptadas
+            ok = ~choque
+            self.x[pendientes[ok]] = tmp_x[ok]
+            self.y[pendientes[ok]] = tmp_y[ok]
+            pendientes = pendientes[choque]
+
+    def migrar(self):
+        """Enviar a los vecinos las personas que cruzaron un borde y recibir las suyas"""
+        if self.procesos == 1:
+            return
+        destino = dueno(self.x, self.x_max, self.procesos)
+        der = destino == (self.k + 1) % self.procesos
+        izq = (destino != self.k) & ~der
+        de_izq, de_der = self.intercambiar([getattr(self, c)[izq] for c in CAMPOS],
+            [getattr(self, c)[der] for c in CAMPOS])
+        quedan = destino == self.k
+        for campo, a, b in zip(CAMPOS, de_izq, de_der):
+            setattr(self, campo, np.concatenate([getattr(self, campo)[quedan], a, b]))
+
+    def contagiar(self, umbral, tick):
+        """Simular el contagio (ver SimulacionNP.revisar_contagio), con los infectados del halo"""
+        infectados = np.flatnonzero(self.estado == 1)
+        hx, hy = self.halo(infectados, umbral, self.x[infectados], self.y[infectados])
+        sanos = np.flatnonzero(self.estado == 0)
+        ia, _ = pares_cercanos(self.x[sanos], self.y[sanos], np.concatenate([self.x[infectados], hx]),
+            np.concatenate([self.y[infectados], hy]), umbral, self.x_max, self.y_max)
+        k = np.bincount(ia, minlength=len(sanos))
+        expuestos = sanos[k > 0]
+        prob = 1 - self.inoculacion[expuestos] ** k[k > 0]
+        contagiados = expuestos[self.rng.random(len(expuestos)) <= prob]
+        self.estado[contagiados] = 1
+        self.recupera[contagiados] = tick + self.dias_enfermo[contagiados].astype(np.int64) - 1
+
+    def vacunar(self, umbral, vac_x, vac_y):
+        """Simular la vacunación (ver SimulacionNP.revisar_vacunacion). Cada franja conoce todas las vacunas"""
+        candidatos = np.flatnonzero(self.inoculacion == 0)
+        ia, ib = pares_cercanos(self.x[candidatos], self.y[candidatos], vac_x, vac_y,
+            umbral, self.x_max, self.y_max, periodico=False)
+        orden = np.lexsort((ib, ia))
+        ia = ia[orden]
+        ib = ib[orden]
+        exito = self.rng.random(len(ia)) <= self.prob_vacuna
+        ia, primera = np.unique(ia[exito], return_index=True)
+        self.inoculacion[candidatos[ia]] += self.vac_efectividad[ib[exito][primera]]
+
+    def paso(self, vel_per, umb_col, umb_con, umb_vac, contagio, tick, vac_x, vac_y):
+        """Movimiento, contagio, vacunación y recuperaciones del tick.
+
+        Retorna
+        -------
+        tuple
+            Sanos, infectados, recuperados y vacunados antes de las recuperaciones,
+            y personas recuperadas en el tick
+        """
+        self.mover(vel_per, umb_col)
+        self.migrar()
+        if contagio: # Sin infectados en ninguna franja no hay contagios
+            self.contagiar(umb_con, tick)
+        self.vacunar(umb_vac, vac_x, vac_y)
+        contadores = (int(np.count_nonzero(self.estado == 0)), int(np.count_nonzero(self.estado == 1)),
+            int(np.count_nonzero(self.estado == 2)), int(np.count_nonzero(self.inoculacion > 0)))
+        recuperados = np.flatnonzero((self.estado == 1) & (self.recupera == tick))
+        self.estado[recuperados] = 2
+        self.dias_enfermo[recuperados] = 0
+        self.recupera[recuperados] = -1
+        return contadores + (len(recuperados),)
+
+    def candidatos(self, n):
+        """Índices globales de las primeras n personas sanas sin inoculacion de la franja"""
+        return np.sort(self.id[(self.estado == 0) & (self.inoculacion == 0)])[:n]
+
+    def rebrote(self, ids, dias, tick):
+        """Infectar a las personas de ids que están en la franja, con sus días enfermo"""
+        locales = np.flatnonzero(np.isin(self.id, ids))
+        dias = dias[np.searchsorted(ids, self.id[locales])]
+        self.estado[locales] = 1
+        self.dias_enfermo[locales] = dias
+        self.recupera[locales] = tick + dias.astype(np.int64)
+
+    def datos(self):
+        """Arreglos de CAMPOS de la franja"""
+        return {campo: getattr(self, campo) for campo in CAMPOS}
+
+def _trabajar(k, procesos, x_max, y_max, prob_vacuna, vac_efectividad, rng, datos, entradas, suma, barrera,
+    comandos, resultados):
+    """Ciclo de un proceso de trabajo"""
+    franja = Franja(k, procesos, x_max, y_max, prob_vacuna, vac_efectividad, rng, datos, entradas, suma, barrera)
+    while True:
+        comando = comandos.get()
+        try:
+            if comando[0] == "terminar":
+                return
+            elif comando[0] == "paso":
+                resultados.put((k, franja.paso(*comando[1:])))
+            elif comando[0] == "candidatos":
+                resultados.put((k, franja.candidatos(comando[1])))
+            elif comando[0] == "rebrote":
+                franja.rebrote(*comando[1:])
+            elif comando[0] == "datos":
+                resultados.put((k, franja.datos()))
+        except Exception as error:
+            resultados.put((k, error))
+            raise
+
+class SimulacionParalela:
+    """Clase para controlar una simulación repartida en franjas, cada una en un proceso.
+
+    Tiene la interfaz de SimulacionNP para avanzar y leer las series (paso,
+    simular, sanos, infectados, recuperados, inoculados, vacunas), y parte del
+    mismo estado inicial que SimulacionNP con la misma semilla y réplica. Las
+    personas se leen con datos. Los procesos terminan con cerrar.
+    """
+
+    def __init__(self, poblacion, vacunas, dias_simulacion, x_min, x_max, y_min, y_max,
+        porc_infectados=0.1, prob_vacuna=0.5, prob_reb=0.5, semilla=SEMILLA, replica=None, rng=None, procesos=None):
+        """Constructor de la simulación. Inicia los procesos de trabajo.
+
+        Parámetros
+        ----------
+        poblacion, vacunas, dias_simulacion, x_min, x_max, y_min, y_max : int
+            Escenario (ver SimulacionNP)
+        porc_infectados, prob_vacuna, prob_reb : float, opcional
+            Probabilidades (ver SimulacionNP)
+        semilla, replica, rng : opcional
+            Flujo de números aleatorios (ver SimulacionNP). Cada franja usa un hijo del generador
+        procesos : int, opcional
+            Número de franjas y de procesos de trabajo, por omisión el número de núcleos
+        """
+        inicial = SimulacionNP(poblacion, vacunas, dias_simulacion, x_min, x_max, y_min, y_max,
+            porc_infectados=porc_infectados, prob_vacuna=prob_vacuna, prob_reb=prob_reb, semilla=semilla,
+            replica=replica, rng=rng)
+        self.poblacion = poblacion
+        self.dias_simulacion = dias_simulacion
+        self.x_min = x_min
+        self.x_max = x_max
+        self.y_min = y_min
+        self.y_max = y_max
+        self.porc_infectados = porc_infectados
+        self.prob_vacuna = prob_vacuna
+        self.prob_reb = prob_reb
+        self.procesos = procesos or os.cpu_count()
+        self.rng = inicial.rng
+        self.series = inicial.series
+        self.tick = 0
+        self.n_sanos = inicial.n_sanos
+        self.n_infectados = inicial.n_infectados
+        self.n_recuperados = 0
+        self.n_inoculados = 0
+        self.vac_x = inicial.vac_x
+        self.vac_y = inicial.vac_y
+        self.vac_efectividad = inicial.vac_efectividad
+        self.vacunas = Vista(self, VacunaVista, vacunas)
+
+        # Personas de cada franja. x = x_max equivale a x = 0 y pertenece a la primera franja
+        datos = {
+            "id": np.arange(poblacion),
+            "x": inicial.x % x_max,
+            "y": inicial.y,
+            "estado": inicial.estado,
+            "inoculacion": inicial.inoculacion,
+            "dias_enfermo": inicial.dias_enfermo,
+            "recupera": np.where(inicial.estado == 1, inicial.dias_enfermo.astype(np.int64) - 1, -1),
+        }
+        franja = dueno(datos["x"], x_max, self.procesos)
+
+        # Colas de mensajes entre vecinos, sumas globales y comandos
+        contexto = multiprocessing.get_context()
+        entradas = [(contexto.Queue(), contexto.Queue()) for _ in range(self.procesos)]
+        suma = contexto.RawArray("q", 2 * self.procesos)
+        barrera = contexto.Barrier(self.procesos)
+        self.comandos = [contexto.Queue() for _ in range(self.procesos)]
+        self.resultados = contexto.Queue()
+        self.trabajadores = []
+        for k, rng_franja in enumerate(self.rng.spawn(self.procesos)):
+            propios = {campo: arreglo[franja == k] for campo, arreglo in datos.items()}
+            trabajador = contexto.Process(target=_trabajar, args=(k, self.procesos, x_max, y_max, prob_vacuna,
+                self.vac_efectividad, rng_franja, propios, entradas, suma, barrera, self.comandos[k],
+                self.resultados), daemon=True)
+            trabajador.start()
+            self.trabajadores.append(trabajador)
+
+    @property
+    def sanos(self):
+        """Número de sanos por dia"""
+        return self.series.serie("sanos")
+
+    @property
+    def infectados(self):
+        """Número de infectados por dia"""
+        return self.series.serie("infectados")
+
+    @property
+    def recuperados(self):
+        """Número de recuperados por dia"""
+        return self.series.serie("recuperados")
+
+    @property
+    def inoculados(self):
+        """Número de vacunados por dia"""
+        return self.series.serie("inoculados")
+
+    def _enviar(self, comando):
+        """Enviar un comando a todas las franjas"""
+        if not self.trabajadores:
+            raise RuntimeError("la simulación está cerrada")
+        for cola in self.comandos:
+            cola.put(comando)
+
+    def _recibir(self):
+        """Resultado de cada franja, en orden. Si una franja falló, se cierra la simulación"""
+        resultados = [None] * self.procesos
+        for _ in range(self.procesos):
+            k, resultado = self.resultados.get()
+            if isinstance(resultado, Exception):
+                self.cerrar()
+                raise RuntimeError("falló la franja %d" % k) from resultado
+            resultados[k] = resultado
+        return resultados
+
+    def rebrote(self, porc=0.02):
+        """Simular rebrote de virus en las primeras personas sanas sin inoculacion (ver SimulacionNP.rebrote)
+
+        Parametros
+        ----------
+        porc : double, opcional
+            Porcentaje de rebrote, por omisión 2%
+        """
+        n = math.ceil(self.poblacion * porc)
+        self._enviar(("candidatos", n))
+        candidatos = np.sort(np.concatenate(self._recibir()))[:n]
+        dias = self.rng.integers(28, 50, size=len(candidatos), endpoint=True)
+        self._enviar(("rebrote", candidatos, dias, self.tick))
+        self.n_sanos -= len(candidatos)
+        self.n_infectados += len(candidatos)
+
+    def paso(self, vel_per=10, umb_col=11, umb_con=15, umb_vac=30, modo="indexado"):
+        """Avanzar la simulación en 12 horas, con las mismas etapas del juego.
+
+        Cada franja mueve, contagia y vacuna a sus personas y recupera a las que
+        terminan sus días enfermos. Después se suman los contadores y se agregan
+        a las series, igual que en SimulacionNP.estadisticas.
+
+        Parámetros
+        ----------
+        vel_per, umb_col, umb_con, umb_vac : opcional
+            Parámetros de paso (ver SimulacionNP.paso)
+        modo : str, opcional
+            Se acepta por compatibilidad con Simulacion. Siempre se resuelven
+            todos los movimientos a la vez
+        """
+        alcance = max(2 * vel_per + umb_col, umb_con)
+        if self.procesos > 1 and self.x_max / self.procesos < alcance:
+            raise ValueError("cada franja debe medir al menos %g (2 * vel_per + umb_col y umb_con)" % alcance)
+        self._enviar(("paso", vel_per, umb_col, umb_con, umb_vac, self.n_infectados > 0, self.tick,
+            self.vac_x, self.vac_y))
+        totales = np.sum(self._recibir(), axis=0)
+        self.n_sanos, self.n_infectados, self.n_recuperados, self.n_inoculados, recuperados = (int(t) for t in totales)
+        # Estadísticas antes de las recuperaciones del tick
+        infectados = self.n_infectados
+        self.series.agregar(self.n_sanos, self.n_infectados, self.n_recuperados, self.n_inoculados)
+        self.n_infectados -= recuperados
+        self.n_recuperados += recuperados
+        # Rebrote
+        if infectados == 0 and self.rng.random() <= self.prob_reb:
+            self.rebrote()
+        self.tick += 1
+
+    def simular(self, hasta=None, **parametros_paso):
+        """Avanzar la simulación sin interfaz gráfica.
+
+        Parámetros
+        ----------
+        hasta : int, opcional
+            Tick hasta el que se simula, por omisión dias_simulacion
+        parametros_paso : dict
+            Parámetros de paso (vel_per, umb_col, umb_con, umb_vac)
+        """
+        if hasta is None:
+            hasta = self.dias_simulacion
+        while self.tick < hasta:
+            self.paso(**parametros_paso)
+
+    def inmunidad_alcanzada(self):
+        """Indica si no quedan sanos ni infectados, por lo que ya no puede haber contagios ni rebrotes"""
+        return self.n_sanos == 0 and self.n_infectados == 0
+
+    def datos(self):
+        """Personas de todas las franjas, ordenadas por índice.
+
+        Retorna
+        -------
+        dict
+            Arreglos id, x, y, estado, inoculacion, dias_enfermo y recupera
+        """
+        self._enviar(("datos",))
+        franjas = self._recibir()
+        datos = {campo: np.concatenate([f[campo] for f in franjas]) for campo in CAMPOS}
+        orden = np.argsort(datos["id"])
+        return {campo: arreglo[orden] for campo, arreglo in datos.items()}
+
+    def cerrar(self):
+        """Terminar los procesos de trabajo"""
+        for cola, trabajador in zip(self.comandos, self.trabajadores):
+            if trabajador.is_alive():
+                cola.put(("terminar",))
+        for trabajador in self.trabajadores:
+            trabajador.join(timeout=5)
+            if trabajador.is_alive():
+                trabajador.terminate()
+        self.trabajadores = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.cerrar()
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulación repartida en procesos, sin interfaz gráfica")
+    parser.add_argument("--poblacion", type=int, default=100000)
+    parser.add_argument("--mundo", type=int, nargs=2, default=[20000, 12000], metavar=("ANCHO", "ALTO"))
+    parser.add_argument("--dias", type=int, default=200, help="ticks a simular")
+    parser.add_argument("--procesos", type=int, default=None, help="por omisión el número de núcleos")
+    parser.add_argument("--semilla", type=int, default=SEMILLA)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    with SimulacionParalela(args.poblacion, 1, args.dias, 0, args.mundo[0], 0, args.mundo[1],
+        porc_infectados=0.05, prob_vacuna=1, semilla=args.semilla, procesos=args.procesos) as sim:
+        sim.simular()
+        print("%d procesos, %d ticks en %.1f s" % (sim.procesos, sim.tick, time.perf_counter() - inicio))
+        print("sanos %d, infectados %d, recuperados %d, vacunados %d" % (sim.n_sanos, sim.n_infectados,
+            sim.n_recuperados, sim.n_inoculados))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+"""Pruebas de los agregados de réplicas (Agregador)."""
+import numpy as np
+
+from agregador import SERIES, Agregador
+
+def test_agregador_momentos_y_cuantiles():
+    poblacion, dias = 50, 30 # Menos valores que intervalos: cuantiles exactos
+    rng = np.random.default_rng(1)
+    lote = rng.integers(0, poblacion, size=(40, len(SERIES), dias), endpoint=True)
+    agregador = Agregador(dias, poblacion)
+    agregador.agregar_lote(lote[:15])
+    for series_replica in lote[15:25]:
+        agregador.agregar(series_replica)
+    otro = Agregador(dias, poblacion)
+    otro.agregar_lote(lote[25:])
+    agregador.combinar(otro)
+    cuantiles = (0.05, 0.25, 0.5, 0.75, 0.95)
+    for k, nombre in enumerate(SERIES):
+        np.testing.assert_allclose(agregador.media(nombre), lote[:, k].mean(axis=0))
+        np.testing.assert_allclose(agregador.varianza(nombre), lote[:, k].var(axis=0, ddof=1))
+        np.testing.assert_array_equal(agregador.cuantiles(nombre, cuantiles),
+            np.quantile(lote[:, k], cuantiles, axis=0, method="inverted_cdf"))
+    infectados = lote[:, SERIES.index("infectados")]
+    np.testing.assert_array_equal(agregador.distribucion("pico"),
+        np.bincount(infectados.max(axis=1), minlength=poblacion + 1))
+    np.testing.assert_array_equal(agregador.distribucion("dia_pico"),
+        np.bincount(infectados.argmax(axis=1), minlength=dias))
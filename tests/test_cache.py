@@ -0,0 +1,56 @@
+"""Pruebas del cache de resultados en disco (cache)."""
+import itertools
+
+import numpy as np
+import pytest
+
+import cache
+import lote
+from cache import Cache, clave
+
+@pytest.fixture
+def reloj(monkeypatch):
+    """Reloj que avanza un segundo por llamada, para que el último uso no empate"""
+    segundos = itertools.count(1000)
+    monkeypatch.setattr(cache.time, "time", lambda: float(next(segundos)))
+
+def test_cache_acierto_y_persistencia(tmp_path):
+    directorio = str(tmp_path / "cache")
+    resultado = np.arange(12, dtype=np.int32).reshape(3, 4)
+    c = Cache(directorio)
+    k = clave({"poblacion": 10}, 1, 0, "numpy")
+    assert c.obtener(k) is None
+    c.agregar(k, resultado, {"poblacion": 10})
+    assert k in c and len(c) == 1
+    np.testing.assert_array_equal(c.obtener(k), resultado)
+    # Otro cache sobre el mismo directorio lee el índice guardado
+    otro = Cache(directorio)
+    np.testing.assert_array_equal(otro.obtener(k), resultado)
+    assert clave({"poblacion": 10}, 1, 1, "numpy") not in otro
+
+def test_cache_desaloja_el_menos_usado(tmp_path, reloj):
+    resultado = np.zeros(1000, dtype=np.int32)
+    c = Cache(str(tmp_path), max_bytes=10 ** 9)
+    for k in "abc":
+        c.agregar(k, resultado)
+    c.max_bytes = 3 * c.indice["a"]["bytes"]
+    c.obtener("a") # "b" pasa a ser la menos usada
+    c.agregar("d", resultado)
+    assert sorted(c.indice) == ["a", "c", "d"]
+    assert not (tmp_path / "b.npy").exists()
+    assert c.bytes() <= c.max_bytes
+    assert c.podar(0) == 3 and len(c) == 0
+
+def test_barrido_no_simula_lo_que_esta_en_el_cache(tmp_path, monkeypatch):
+    c = Cache(str(tmp_path))
+    fijos = {"dias_simulacion": 30, "prob_reb": 0.0}
+    grilla = {"poblacion": [20, 30]}
+    lista, series = lote.barrido(grilla, 2, 5, 1, motor="numpy", fijos=fijos, cache=c)
+    assert len(c) == 4
+
+    def sin_procesos(*args, **kwargs):
+        raise AssertionError("se simuló una réplica que estaba en el cache")
+
+    monkeypatch.setattr(lote, "ProcessPoolExecutor", sin_procesos)
+    _, desde_cache = lote.barrido(grilla, 2, 5, 1, motor="ensamble", fijos=fijos, cache=c)
+    np.testing.assert_array_equal(desde_cache, series)
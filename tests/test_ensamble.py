@@ -0,0 +1,32 @@
+"""Pruebas de los ensambles de réplicas (Ensamble)."""
+import numpy as np
+
+from agregador import SERIES
+from ensamble import Ensamble
+from simulacion_np import SimulacionNP
+
+# Mundo pequeño y denso para que haya contagios, vacunaciones y recuperaciones
+ARGUMENTOS = (60, 2, 80, 0, 300, 0, 200)
+PARAMETROS = {"vel_per": 10, "umb_col": 11, "umb_con": 15, "umb_vac": 30}
+
+def series(sim):
+    """Series de una simulación, en un arreglo de (4, días)"""
+    return np.array([sim.series.serie(nombre) for nombre in SERIES])
+
+def test_ensamble_igual_replicas_separadas():
+    ens = Ensamble(*ARGUMENTOS, porc_infectados=0.1, replicas=3, semilla=7)
+    ens.simular(**PARAMETROS)
+    for r in range(ens.replicas):
+        sim = SimulacionNP(*ARGUMENTOS, porc_infectados=0.1, semilla=7, replica=r)
+        sim.simular(modo="lote", **PARAMETROS)
+        for k, nombre in enumerate(SERIES):
+            np.testing.assert_array_equal(ens.serie(nombre)[r], series(sim)[k])
+
+def test_recuperaciones_sin_desborde_de_tick():
+    # dias_enfermo es int16: sumarle el tick sin convertirlo desborda después de 32767
+    tick = np.iinfo(np.int16).max - 7
+    ens = Ensamble(*ARGUMENTOS, porc_infectados=0, replicas=2)
+    ens.tick = tick
+    ens.rebrote(1, 0.1)
+    ens.revisar_contagio(15)
+    assert ens.recuperaciones and min(ens.recuperaciones) > tick
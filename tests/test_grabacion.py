@@ -0,0 +1,67 @@
+"""Pruebas de la grabación y reproducción de partidas (grabacion)."""
+import numpy as np
+import pytest
+
+from grabacion import INICIO, Grabadora, Reproduccion, arreglos
+from simulacion import Simulacion
+from simulacion_np import SimulacionNP
+
+# Mundo pequeño y denso para que haya contagios, vacunaciones y recuperaciones
+ARGUMENTOS = (60, 2, 80, 0, 300, 0, 200)
+PARAMETROS = {"vel_per": 10, "umb_col": 11, "umb_con": 15, "umb_vac": 30}
+
+def comparar(cuadro, estado, tick, contadores):
+    """Verificar que un cuadro guarda el estado de una simulación"""
+    x, y, est, inoculacion, vac_x, vac_y = estado
+    assert cuadro["tick"] == tick
+    np.testing.assert_array_equal(cuadro["contadores"], contadores)
+    np.testing.assert_array_equal(cuadro["personas"]["x"], x)
+    np.testing.assert_array_equal(cuadro["personas"]["y"], y)
+    np.testing.assert_array_equal(cuadro["personas"]["estado"], est)
+    # La inoculacion se guarda en media precisión
+    np.testing.assert_allclose(cuadro["personas"]["inoculacion"], inoculacion, rtol=1e-3, atol=1e-3)
+    np.testing.assert_array_equal(cuadro["vacunas"]["x"], vac_x)
+    np.testing.assert_array_equal(cuadro["vacunas"]["y"], vac_y)
+
+@pytest.mark.parametrize("clase", [Simulacion, SimulacionNP])
+def test_grabacion_ida_y_vuelta(clase, tmp_path):
+    ruta = str(tmp_path / "partida.grab")
+    sim = clase(*ARGUMENTOS, semilla=2)
+    estados = []
+    with Grabadora(ruta, sim) as grabadora:
+        for _ in range(40):
+            sim.paso(**PARAMETROS)
+            grabadora.grabar(sim)
+            estados.append([np.array(a, copy=True) for a in arreglos(sim)])
+    repro = Reproduccion(ruta)
+    assert len(repro) == 40 and (repro.poblacion, repro.x_max, repro.y_max) == (sim.poblacion, sim.x_max, sim.y_max)
+    contadores = sim.series.arreglo().T
+    for i, estado in enumerate(estados):
+        comparar(repro.cuadro(i), estado, i + 1, contadores[i])
+    repro.posicion = len(repro) - 1
+    np.testing.assert_array_equal(repro.infectados, sim.series.serie("infectados"))
+    assert repro.buscar_tick(10) == 9
+
+def test_grabacion_continua_y_descarta_cuadro_incompleto(tmp_path):
+    ruta = str(tmp_path / "partida.grab")
+    sim = SimulacionNP(*ARGUMENTOS, semilla=2)
+    with Grabadora(ruta, sim) as grabadora:
+        for _ in range(5):
+            sim.paso(**PARAMETROS)
+            grabadora.grabar(sim)
+    repro = Reproduccion(ruta)
+    # Medio cuadro al final, como si el proceso se hubiera interrumpido al escribir
+    with open(ruta, "ab") as archivo:
+        archivo.write(bytes(repro.dtype.itemsize // 2))
+    assert repro.actualizar() == 5
+    with Grabadora(ruta, sim) as grabadora:
+        sim.paso(**PARAMETROS)
+        grabadora.grabar(sim)
+        grabadora.archivo.flush()
+        # La reproducción ve los cuadros que se agregan mientras se graba
+        assert repro.actualizar() == 6
+    assert repro.cuadro(5)["tick"] == 6
+    with open(ruta, "rb") as archivo:
+        assert len(archivo.read()) == INICIO + 6 * repro.dtype.itemsize
+    with pytest.raises(ValueError):
+        Grabadora(ruta, SimulacionNP(30, 2, 80, 0, 300, 0, 200))
@@ -0,0 +1,50 @@
+"""Pruebas de los puntos de control binarios (punto_control)."""
+import numpy as np
+import pytest
+
+import punto_control
+from simulacion import Simulacion
+from simulacion_np import SimulacionNP
+
+# Mundo pequeño y denso para que haya contagios, vacunaciones y recuperaciones
+ARGUMENTOS = (60, 2, 80, 0, 300, 0, 200)
+PARAMETROS = {"vel_per": 10, "umb_col": 11, "umb_con": 15, "umb_vac": 30}
+SERIES = ("sanos", "infectados", "recuperados", "inoculados")
+
+def series(sim):
+    """Series de una simulación, en un arreglo de (4, días)"""
+    return np.array([sim.series.serie(nombre) for nombre in SERIES])
+
+@pytest.mark.parametrize("mmap", [True, False])
+@pytest.mark.parametrize("clase", [Simulacion, SimulacionNP])
+def test_punto_control_reanuda_igual(clase, mmap, tmp_path):
+    ruta = str(tmp_path / "sim.pc")
+    sim = clase(*ARGUMENTOS, semilla=3)
+    sim.simular(hasta=30, **PARAMETROS)
+    sim.guardar(ruta)
+    sim.simular(**PARAMETROS)
+    reanudada = clase.cargar(ruta, mmap=mmap)
+    assert reanudada.tick == 30
+    reanudada.simular(**PARAMETROS)
+    np.testing.assert_array_equal(series(reanudada), series(sim))
+
+@pytest.mark.parametrize("clase", [Simulacion, SimulacionNP])
+def test_simular_con_puntos_de_control_igual_sin_interrumpir(clase, tmp_path):
+    ruta = str(tmp_path / "sim.pc")
+    continua = clase(*ARGUMENTOS, semilla=4)
+    continua.simular(**PARAMETROS)
+    interrumpida = clase(*ARGUMENTOS, semilla=4)
+    interrumpida.simular(hasta=45, punto_control=ruta, cada=20, **PARAMETROS)
+    reanudada = punto_control.cargar(ruta)
+    assert type(reanudada) is clase and reanudada.tick == 45
+    reanudada.simular(punto_control=ruta, cada=20, **PARAMETROS)
+    np.testing.assert_array_equal(series(reanudada), series(continua))
+    assert punto_control.cargar(ruta).tick == ARGUMENTOS[2]
+
+def test_calendario_ida_y_vuelta():
+    calendario = {3: [np.array([4, 1])], 7: [np.array([0]), np.array([9, 2])], 8: []}
+    vuelta = punto_control.arreglos_a_calendario(punto_control.calendario_a_arreglos(calendario))
+    assert sorted(vuelta) == [3, 7, 8]
+    for tick, grupos in calendario.items():
+        esperado = np.hstack(grupos) if grupos else np.empty(0)
+        np.testing.assert_array_equal(np.hstack(vuelta[tick]), esperado)
@@ -0,0 +1,51 @@
+"""Pruebas de los clones de simulaciones y de las ramas (ramas)."""
+from functools import partial
+
+import numpy as np
+import pytest
+
+from agregador import SERIES
+from ramas import RESUMEN, ramificar, ubicar_vacuna
+from simulacion import Simulacion
+from simulacion_np import SimulacionNP
+
+# Mundo pequeño y denso para que haya contagios, vacunaciones y recuperaciones
+ARGUMENTOS = (60, 2, 80, 0, 300, 0, 200)
+PARAMETROS = {"vel_per": 10, "umb_col": 11, "umb_con": 15, "umb_vac": 30}
+
+def series(sim):
+    """Series de una simulación, en un arreglo de (4, días)"""
+    return np.array([sim.series.serie(nombre) for nombre in SERIES])
+
+@pytest.mark.parametrize("clase", [Simulacion, SimulacionNP])
+def test_clon_repite_el_futuro_sin_compartir_estado(clase):
+    sim = clase(*ARGUMENTOS, semilla=5)
+    sim.simular(hasta=20, **PARAMETROS)
+    clon = sim.clonar()
+    clon.vacunas[0].x = (sim.vacunas[0].x + 50) % sim.x_max
+    assert clon.vacunas[0].x != sim.vacunas[0].x
+    clon.vacunas[0].x = sim.vacunas[0].x
+    sim.simular(**PARAMETROS)
+    clon.simular(**PARAMETROS)
+    np.testing.assert_array_equal(series(clon), series(sim))
+
+def no_cambiar(sim):
+    """Rama que no modifica la simulación"""
+
+@pytest.mark.parametrize("clase", [Simulacion, SimulacionNP])
+def test_ramas_con_numeros_aleatorios_comunes(clase):
+    sim = clase(*ARGUMENTOS, semilla=5)
+    sim.simular(hasta=10, **PARAMETROS)
+    antes = series(sim)
+    ramas = [no_cambiar, partial(ubicar_vacuna, x=10, y=10), no_cambiar]
+    resumen = ramificar(sim, ramas, PARAMETROS, ticks=15, replicas=3, procesos=1)
+    assert sim.tick == 10
+    np.testing.assert_array_equal(series(sim), antes)
+    for nombre in RESUMEN:
+        assert resumen[nombre].shape == (3, 3)
+        # Ramas iguales con el mismo flujo por réplica dan el mismo resultado
+        np.testing.assert_array_equal(resumen[nombre][0], resumen[nombre][2])
+    # Réplicas distintas usan flujos distintos
+    assert len(np.unique(resumen["area"][0])) > 1
+    np.testing.assert_array_equal(ramificar(sim, ramas, PARAMETROS, ticks=15, replicas=3, procesos=2)["area"],
+        resumen["area"])
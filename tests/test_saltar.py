@@ -0,0 +1,63 @@
+"""Salto de los periodos quietos (Simulacion.saltar) comparado con avanzar tick a tick."""
+import numpy as np
+import pytest
+
+import main
+import proceso
+from simulacion import Simulacion
+from simulacion_np import SimulacionNP
+
+# Mundo sin vacunas ni infectados: la simulación parte quieta
+ARGUMENTOS = (30, 0, 60, 0, 300, 0, 200)
+PARAMETROS = {"vel_per": 10, "umb_col": 11, "umb_con": 15, "umb_vac": 30}
+SERIES = ("sanos", "infectados", "recuperados", "inoculados")
+
+def series(sim):
+    """Series de una simulación, en un arreglo de (4, días)"""
+    return np.array([sim.series.serie(nombre) for nombre in SERIES])
+
+@pytest.mark.parametrize("clase", [Simulacion, SimulacionNP])
+def test_saltar_sin_rebrotes_igual_que_avanzar(clase):
+    saltada = clase(*ARGUMENTOS, porc_infectados=0, prob_reb=0)
+    avanzada = saltada.clonar()
+    assert saltada.terminada()
+    saltada.simular(saltar=True, **PARAMETROS)
+    avanzada.simular(**PARAMETROS)
+    assert saltada.tick == avanzada.tick == ARGUMENTOS[2]
+    np.testing.assert_array_equal(series(saltada), series(avanzada))
+
+@pytest.mark.parametrize("clase", [Simulacion, SimulacionNP])
+def test_saltar_aplica_el_rebrote_igual_que_avanzar(clase):
+    # Con prob_reb = 1 el rebrote es seguro en el primer tick, con y sin salto
+    saltada = clase(*ARGUMENTOS, porc_infectados=0, prob_reb=1)
+    avanzada = saltada.clonar()
+    saltada.saltar(10)
+    avanzada.paso(**PARAMETROS)
+    assert saltada.tick == avanzada.tick == 1
+    np.testing.assert_array_equal(series(saltada), series(avanzada))
+    assert [p.estado for p in saltada.personas] == [p.estado for p in avanzada.personas]
+
+def test_saltar_sortea_la_espera_del_rebrote():
+    # La espera hasta el rebrote tiene la misma distribución con y sin salto
+    esperas = {True: [], False: []}
+    for replica in range(200):
+        for saltar in esperas:
+            sim = SimulacionNP(*ARGUMENTOS, porc_infectados=0, prob_reb=0.3, replica=replica)
+            while sim.n_infectados == 0 and sim.tick < sim.dias_simulacion:
+                if saltar:
+                    sim.saltar(sim.dias_simulacion)
+                else:
+                    sim.paso(**PARAMETROS)
+            assert sim.n_infectados > 0
+            esperas[saltar].append(sim.tick)
+    error = np.hypot(*[np.std(valores) / np.sqrt(len(valores)) for valores in esperas.values()])
+    assert abs(np.mean(esperas[True]) - np.mean(esperas[False])) < 4 * error
+
+@pytest.mark.parametrize("clase", [Simulacion, SimulacionNP])
+def test_juego_termina_sin_cambios_posibles(clase):
+    sim = clase(*ARGUMENTOS, porc_infectados=0, prob_reb=0)
+    assert main.terminada(sim, 0)
+    assert main.motivo_fin(sim, 0) == proceso._fin(sim) == 3
+    sim = clase(*ARGUMENTOS, porc_infectados=0.2, prob_reb=0)
+    assert not main.terminada(sim, 0)
+    assert main.motivo_fin(sim, 0) == proceso._fin(sim) == 0
@@ -0,0 +1,54 @@
+"""Pruebas del motor en Python puro (Simulacion)."""
+import numpy as np
+import pytest
+
+from simulacion import Simulacion, distancia_periodica
+
+# Mundo pequeño y denso para que haya contagios
+ARGUMENTOS = (60, 2, 80, 0, 300, 0, 200)
+PARAMETROS = {"vel_per": 10, "umb_col": 11, "umb_con": 15, "umb_vac": 30}
+
+def contagio_fuerza_bruta(sim, umbral):
+    """Contagio de Simulacion comparando cada sano con todos los infectados, en orden"""
+    for i, persona in enumerate(sim.personas):
+        if persona.estado != 0:
+            continue
+        for infectado in sim.personas:
+            if infectado.estado != 1:
+                continue
+            if distancia_periodica(persona.x, persona.y, infectado.x, infectado.y, sim.x_max, sim.y_max) <= umbral:
+                if sim.rng.uniform(0, 1) <= 1 - persona.inoculacion:
+                    persona.estado = 1
+                    sim.programar_recuperacion(i, sim.tick + persona.dias_enfermo - 1)
+                    sim.n_sanos -= 1
+                    sim.n_infectados += 1
+                    break
+
+@pytest.mark.parametrize("semilla", [1, 2, 3])
+def test_contagio_grilla_igual_fuerza_bruta(semilla):
+    sim = Simulacion(*ARGUMENTOS, porc_infectados=0.2, semilla=semilla)
+    for _ in range(5):
+        sim.mover_personas(PARAMETROS["vel_per"], PARAMETROS["umb_col"], modo="indexado")
+        referencia = sim.clonar()
+        sim.revisar_contagio(PARAMETROS["umb_con"])
+        contagio_fuerza_bruta(referencia, PARAMETROS["umb_con"])
+        assert [p.estado for p in sim.personas] == [p.estado for p in referencia.personas]
+        assert sim.recuperaciones == referencia.recuperaciones
+        assert sim.rng.getstate() == referencia.rng.getstate()
+
+@pytest.mark.parametrize("modo", ["indexado", "lote"])
+def test_mover_personas_sin_colisiones(modo):
+    # Partiendo de personas separadas por más del umbral, ningún movimiento las
+    # deja a distancia umbral o menor, aunque todas se muevan
+    sim = Simulacion(*ARGUMENTOS, semilla=1)
+    posiciones = [(x, y) for x in range(5, 300, 20) for y in range(5, 200, 20)][::2]
+    for persona, (x, y) in zip(sim.personas, posiciones):
+        persona.x, persona.y = x, y
+    for _ in range(30):
+        sim.mover_personas(PARAMETROS["vel_per"], PARAMETROS["umb_col"], modo=modo)
+        x = np.array([persona.x for persona in sim.personas])
+        y = np.array([persona.y for persona in sim.personas])
+        distancias = np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :])
+        np.fill_diagonal(distancias, np.inf)
+        assert distancias.min() > PARAMETROS["umb_col"]
+    assert all((persona.x, persona.y) != inicio for persona, inicio in zip(sim.personas, posiciones))
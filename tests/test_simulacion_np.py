@@ -0,0 +1,72 @@
+"""Pruebas del motor vectorizado (SimulacionNP y sus funciones auxiliares)."""
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+import simulacion_np
+from simulacion_np import SimulacionNP, distancia_np, pares_cercanos, prob_contagio
+
+# Mundo pequeño y denso para que haya contagios
+ARGUMENTOS = (60, 2, 80, 0, 300, 0, 200)
+
+@pytest.mark.parametrize("periodico", [True, False])
+def test_pares_cercanos_igual_fuerza_bruta(periodico):
+    rng = np.random.default_rng(0)
+    xa, ya = rng.integers(0, 300, 200), rng.integers(0, 200, 200)
+    xb, yb = rng.integers(0, 300, 150), rng.integers(0, 200, 150)
+    ia, ib = pares_cercanos(xa, ya, xb, yb, 15, 300, 200, periodico=periodico)
+    limites = (300, 200) if periodico else (None, None)
+    dist = distancia_np(xa[:, None], ya[:, None], xb[None, :], yb[None, :], *limites)
+    esperados = set(zip(*np.nonzero(dist <= 15)))
+    assert set(zip(ia.tolist(), ib.tolist())) == esperados
+    assert len(ia) == len(esperados)
+
+def test_prob_contagio_igual_exacto_con_contacto_seguro():
+    # Grupos de sanos en la celda (3i, 3j) e infectados en la celda vecina (3i + 1, 3j):
+    # con celdas de 10 y umbral 30 todo par de puntos de celdas vecinas está a
+    # distancia entre 0 y 30, por lo que el contacto es seguro, y los grupos están
+    # demasiado lejos entre sí para contagiarse
+    rng = np.random.default_rng(0)
+    celda, umbral, x_max, y_max = 10, 30, 600, 600
+    xa, ya, inoculacion, xb, yb = [], [], [], [], []
+    for g, (i, j) in enumerate([(1, 1), (7, 1), (1, 7), (7, 7), (13, 13)]):
+        n_a, n_b = 4, g + 1
+        xa.append(rng.uniform(0, celda, n_a) + 3 * i * celda)
+        ya.append(rng.uniform(0, celda, n_a) + 3 * j * celda)
+        inoculacion.append(rng.choice([0.0, 0.6, 0.9], n_a))
+        xb.append(rng.uniform(0, celda, n_b) + (3 * i + 1) * celda)
+        yb.append(rng.uniform(0, celda, n_b) + 3 * j * celda)
+    xa, ya, inoculacion, xb, yb = map(np.concatenate, (xa, ya, inoculacion, xb, yb))
+    ia, _ = pares_cercanos(xa, ya, xb, yb, umbral, x_max, y_max)
+    k = np.bincount(ia, minlength=len(xa))
+    prob = prob_contagio(xa, ya, inoculacion, xb, yb, umbral, x_max, y_max, celda=celda)
+    np.testing.assert_allclose(prob, 1 - inoculacion ** k, atol=1e-9)
+
+def test_memoria_de_nucleos_acotada(monkeypatch):
+    monkeypatch.setattr(simulacion_np, "MEMORIA_NUCLEOS", 4 * 2 ** 20)
+    monkeypatch.setattr(simulacion_np, "_NUCLEOS", OrderedDict())
+    monkeypatch.setattr(simulacion_np, "_bytes_nucleos", 0)
+    rng = np.random.default_rng(1)
+    x, y = rng.uniform(0, 1000, 50), rng.uniform(0, 1000, 50)
+    inoculacion = rng.choice([0.0, 0.7], 50)
+    desalojos = 0
+    for umbral in range(10, 40):
+        prob_contagio(x, y, inoculacion, x, y, umbral, 1000, 1000)
+        total = sum(valor.nbytes for valor in simulacion_np._NUCLEOS.values())
+        assert total == simulacion_np._bytes_nucleos <= simulacion_np.MEMORIA_NUCLEOS
+        desalojos += ("nucleo", 10, 0, 200, 200, 5.0, 5.0) not in simulacion_np._NUCLEOS
+    assert desalojos > 0
+    # El último núcleo usado sigue en memoria
+    antes = len(simulacion_np._NUCLEOS)
+    prob_contagio(x, y, inoculacion, x, y, 39, 1000, 1000)
+    assert len(simulacion_np._NUCLEOS) == antes
+
+def test_recuperaciones_sin_desborde_de_tick():
+    # dias_enfermo es int16: sumarle el tick sin convertirlo desborda después de 32767
+    tick = np.iinfo(np.int16).max - 7
+    sim = SimulacionNP(*ARGUMENTOS, porc_infectados=0)
+    sim.tick = tick
+    sim.rebrote(0.1)
+    sim.revisar_contagio(15)
+    assert sim.recuperaciones and min(sim.recuperaciones) > tick
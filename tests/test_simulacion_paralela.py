@@ -0,0 +1,44 @@
+"""Pruebas de la simulación repartida en franjas (SimulacionParalela)."""
+import numpy as np
+
+import simulacion_paralela
+from simulacion_np import SimulacionNP
+from simulacion_paralela import SimulacionParalela, dueno
+
+PARAMETROS = {"vel_per": 10, "umb_col": 11, "umb_con": 15, "umb_vac": 30}
+PROCESOS = 3
+X_MAX, Y_MAX = 300, 200
+
+# Columnas a ambos lados de cada borde entre franjas (x = 0, 100 y 200), separadas
+# por más de umb_col, y filas separadas igual
+COLUMNAS = [(borde + d) % X_MAX for borde in range(0, X_MAX, X_MAX // PROCESOS) for d in (-12, 0, 12)]
+POSICIONES = [(x, y) for x in COLUMNAS for y in range(0, Y_MAX, 12)]
+
+class EnBordes(SimulacionNP):
+    """SimulacionNP con las personas en columnas junto a los bordes de las franjas"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.x[:], self.y[:] = np.array(POSICIONES, dtype=self.x.dtype).T
+
+def test_franjas_sin_colisiones_en_los_bordes(monkeypatch):
+    monkeypatch.setattr(simulacion_paralela, "SimulacionNP", EnBordes)
+    with SimulacionParalela(len(POSICIONES), 1, 20, 0, X_MAX, 0, Y_MAX, porc_infectados=0.1, prob_reb=0,
+            semilla=3, procesos=PROCESOS) as sim:
+        datos = sim.datos()
+        np.testing.assert_array_equal(np.column_stack([datos["x"], datos["y"]]), POSICIONES)
+        cruzaron = np.zeros(len(POSICIONES), dtype=bool)
+        inicial = dueno(datos["x"], X_MAX, PROCESOS)
+        for _ in range(10):
+            sim.paso(**PARAMETROS)
+            datos = sim.datos()
+            x = datos["x"].astype(float)
+            y = datos["y"].astype(float)
+            # Como en SimulacionNP, las colisiones se miden sin condiciones periódicas
+            distancias = np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :])
+            np.fill_diagonal(distancias, np.inf)
+            assert distancias.min() > PARAMETROS["umb_col"]
+            cruzaron |= dueno(datos["x"], X_MAX, PROCESOS) != inicial
+        # Las personas cambian de franja, por lo que se probaron los halos y las migraciones
+        assert cruzaron.sum() > len(POSICIONES) // 4
+        assert len(np.unique(datos["id"])) == len(POSICIONES)
@@ -0,0 +1,239 @@
+"""Exportación de videos de simulaciones sin pantalla.
+
+Dibuja los cuadros con las mismas funciones del juego (main.dibujar_juego, que
+usa dibujar_baldosas, contador, panel_curva y plot_sim) sobre una
+pygame.Surface, con el driver de video "dummy" de SDL, por lo que no necesita
+una pantalla y avanza tan rápido como permite el procesador. Se dibuja un cuadro cada `cada` ticks,
+además del primero y del último. Los cuadros se guardan como una secuencia de
+imágenes numeradas o se envían como RGB sin comprimir a un proceso codificador
+(por omisión ffmpeg). Varios videos se exportan en paralelo, uno por proceso.
+
+Ejemplo::
+
+    python video.py --replicas 8 --salida "videos/replica_{replica}.mp4" --cada 2 --procesos 4
+    python video.py --grabacion partida.grab --salida cuadros/
+"""
+import argparse
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # Sin pantalla, antes de importar pygame
+
+import pygame
+
+import main
+from aleatorio import SEMILLA
+from camara import Camara
+from grabacion import Reproduccion
+from lote import ESCENARIO, PARAMETROS, crear
+
+# Tamaño de los cuadros: área de juego y contador. Par, como exigen los codificadores de video
+ANCHO = main.XMAX + 160
+ALTO = main.YMAX + 40
+
+# Extensiones que se envían al codificador. Cualquier otra salida es un directorio de imágenes
+EXTENSIONES = (".mp4", ".mkv", ".webm", ".avi", ".mov")
+
+# Comando del codificador. Recibe cuadros RGB por la entrada estándar
+CODIFICADOR = ["ffmpeg", "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24",
+    "-s", "{ancho}x{alto}", "-r", "{fps}", "-i", "-", "-pix_fmt", "yuv420p", "{salida}"]
+
+def superficie():
+    """Superficie donde se dibujan los cuadros, con pygame iniciado sin pantalla"""
+    pygame.init()
+    return pygame.Surface((ANCHO, ALTO))
+
+class Video:
+    """Clase para escribir cuadros en una secuencia de imágenes o en un codificador"""
+
+    def __init__(self, salida, ancho=ANCHO, alto=ALTO, fps=30, codificador=None):
+        """Constructor del video
+
+        Parámetros
+        ----------
+        salida : str
+            Archivo de video (ver EXTENSIONES), o directorio para las imágenes cuadro_000000.png, ...
+        ancho, alto : int, opcional
+            Tamaño de los cuadros
+        fps : int, opcional
+            Cuadros por segundo del video, por omisión 30
+        codificador : list, opcional
+            Comando del codificador, con {ancho}, {alto}, {fps} y {salida}. Por omisión CODIFICADOR
+        """
+        self.salida = salida
+        self.cuadros = 0
+        self.proceso = None
+        if salida.lower().endswith(EXTENSIONES):
+            directorio = os.path.dirname(salida)
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            comando = [parte.format(ancho=ancho, alto=alto, fps=fps, salida=salida)
+                for parte in (codificador or CODIFICADOR)]
+            self.proceso = subprocess.Popen(comando, stdin=subprocess.PIPE)
+        else:
+            os.makedirs(salida, exist_ok=True)
+
+    def agregar(self, superficie):
+        """Agregar una superficie de pygame como el siguiente cuadro"""
+        if self.proceso is not None:
+            self.proceso.stdin.write(pygame.image.tobytes(superficie, "RGB"))
+        else:
+            pygame.image.save(superficie, os.path.join(self.salida, "cuadro_%06d.png" % self.cuadros))
+        self.cuadros += 1
+
+    def cerrar(self):
+        """Terminar el video. Con codificador, espera a que termine y revisa que no falle"""
+        if self.proceso is not None:
+            self.proceso.stdin.close()
+            if self.proceso.wait() != 0:
+                raise RuntimeError("el codificador terminó con código %d" % self.proceso.returncode)
+            self.proceso = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.cerrar()
+
+def video_escenario(escenario, salida, semilla=SEMILLA, replica=None, motor="numpy", cada=1, fps=30,
+    codificador=None):
+    """Simular un escenario y exportar su video.
+
+    Parámetros
+    ----------
+    escenario : dict
+        Parámetros del escenario (ver lote.ESCENARIO). Con saltar, los periodos sin
+        infectados se avanzan de una vez y se dibuja un cuadro al final del salto
+    salida : str
+        Archivo de video o directorio de imágenes (ver Video)
+    semilla : int, opcional
+        Semilla base
+    replica : int, opcional
+        Identificador de la réplica
+    motor : str, opcional
+        "python" o "numpy", por omisión "numpy"
+    cada : int, opcional
+        Ticks entre cuadros, por omisión 1
+    fps : int, opcional
+        Cuadros por segundo del video, por omisión 30
+    codificador : list, opcional
+        Comando del codificador (ver Video)
+
+    Retorna
+    -------
+    int
+        Número de cuadros
+    """
+    saltar = dict(ESCENARIO, **escenario)["saltar"]
+    sim, parametros = crear(escenario, semilla, replica, motor)
+    pantalla = superficie()
+    camara = Camara(main.ANCHO, main.ALTO, sim.x_max, sim.y_max, main.XMIN, main.YMAX)
+    grafico = main.Curva()
+    with Video(salida, fps=fps, codificador=codificador) as video:
+        main.dibujar_juego(pantalla, sim, sim.tick, camara, grafico=grafico)
+        video.agregar(pantalla)
+        while not main.terminada(sim, sim.tick):
+            anterior = sim.tick
+            if saltar and sim.quieta():
+                sim.saltar(sim.dias_simulacion)
+            else:
+                sim.paso(**parametros)
+            if sim.tick // cada > anterior // cada or main.terminada(sim, sim.tick):
+                main.dibujar_juego(pantalla, sim, sim.tick, camara, grafico=grafico)
+                video.agregar(pantalla)
+        return video.cuadros
+
+def video_grabacion(ruta, salida, cada=1, fps=30, codificador=None):
+    """Exportar el video de una grabación (ver grabacion), sin simular.
+
+    Parámetros
+    ----------
+    ruta : str
+        Archivo de la grabación
+    salida : str
+        Archivo de video o directorio de imágenes (ver Video)
+    cada : int, opcional
+        Cuadros de la grabación entre cuadros del video, por omisión 1
+    fps, codificador : opcional
+        Ver Video
+
+    Retorna
+    -------
+    int
+        Número de cuadros
+    """
+    repro = Reproduccion(ruta)
+    pantalla = superficie()
+    camara = Camara(main.ANCHO, main.ALTO, repro.x_max, repro.y_max, main.XMIN, main.YMAX)
+    grafico = main.Curva()
+    indices = list(range(0, len(repro), cada))
+    if indices and indices[-1] != len(repro) - 1:
+        indices.append(len(repro) - 1)
+    with Video(salida, fps=fps, codificador=codificador) as video:
+        for i in indices:
+            repro.posicion = i
+            cuadro = repro.cuadro()
+            pantalla.fill(main.BLANCO)
+            main.dibujar_baldosas(pantalla, camara)
+            main.contador(pantalla, repro, int(cuadro["tick"]))
+            main.panel_curva(pantalla, grafico, repro, i + 1)
+            main.plot_cuadro(pantalla, cuadro, camara)
+            video.agregar(pantalla)
+        return video.cuadros
+
+def _video_escenario(tarea):
+    """Función auxiliar para el grupo de procesos"""
+    return video_escenario(*tarea)
+
+def videos(tareas, procesos=None):
+    """Exportar varios videos en paralelo, uno por proceso.
+
+    Parámetros
+    ----------
+    tareas : list
+        Tuplas de argumentos de video_escenario (escenario, salida, semilla, replica, ...)
+    procesos : int, opcional
+        Número de procesos, por omisión uno por núcleo
+
+    Retorna
+    -------
+    list
+        Número de cuadros de cada video
+    """
+    with ProcessPoolExecutor(max_workers=procesos) as grupo:
+        return list(grupo.map(_video_escenario, tareas))
+
+def main_video():
+    parser = argparse.ArgumentParser(description="Exportar videos de simulaciones sin pantalla")
+    for nombre in PARAMETROS:
+        tipo = int if isinstance(ESCENARIO[nombre], int) else float
+        parser.add_argument("--" + nombre.replace("_", "-"), type=tipo, default=ESCENARIO[nombre])
+    parser.add_argument("--dias", type=int, default=ESCENARIO["dias_simulacion"])
+    parser.add_argument("--x-max", type=int, default=ESCENARIO["x_max"])
+    parser.add_argument("--y-max", type=int, default=ESCENARIO["y_max"])
+    parser.add_argument("--saltar", action="store_true", help="avanzar de una vez los periodos sin infectados")
+    parser.add_argument("--replicas", type=int, default=1)
+    parser.add_argument("--semilla", type=int, default=SEMILLA)
+    parser.add_argument("--motor", choices=["python", "numpy"], default="numpy")
+    parser.add_argument("--grabacion", metavar="ARCHIVO", help="exportar una grabación en vez de simular")
+    parser.add_argument("--salida", default="video_{replica}.mp4",
+        help="video o directorio de imágenes; {replica} se reemplaza por la réplica")
+    parser.add_argument("--cada", type=int, default=1, help="ticks entre cuadros")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--procesos", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.grabacion:
+        cuadros = video_grabacion(args.grabacion, args.salida, args.cada, args.fps)
+        print("%d cuadros en %s" % (cuadros, args.salida))
+        return
+    escenario = {nombre: getattr(args, nombre) for nombre in PARAMETROS}
+    escenario.update(dias_simulacion=args.dias, x_max=args.x_max, y_max=args.y_max, saltar=args.saltar)
+    tareas = [(escenario, args.salida.format(replica=r), args.semilla, r, args.motor, args.cada, args.fps)
+        for r in range(args.replicas)]
+    for tarea, cuadros in zip(tareas, videos(tareas, args.procesos)):
+        print("%d cuadros en %s" % (cuadros, tarea[1]))
+
+if __name__ == '__main__':
+    main_video()